@@ -0,0 +1,183 @@
+# coding: utf8
+"""
+Throughput / latency benchmark of OpenERPJSONRPCClient against the OpenERP stand-in server.
+
+Requires Python 3. The stand-in server runs in a separate process so that the reported CPU time is the client's only.
+For each transport and mode, it reports:
+- calls/s: number of calls per second
+- p50 / p99: call latency percentiles in milliseconds
+- bytes/call: request + response bytes on the wire per call (as counted by the server)
+- cpu/call: client CPU time per call in microseconds
+
+usage: python benchmarks/bench_client.py [--calls 500] [--records 2000] [--page-size 200]
+                                         [--latency 0.0] [--payload-size 50] [--threads 8]
+"""
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+
+import requests
+
+from openerp_jsonrpc_client import OpenERPJSONRPCClient, OpenERPJSONCodec, get_default_codec
+from openerp_jsonrpc_client.concurrency import imap
+from openerp_jsonrpc_client.testing import OpenERPStandInServer
+
+from openerp_jsonrpc_client.aio import AsyncOpenERPJSONRPCClient, aiohttp
+
+
+class UnpooledTransport(object):
+    """
+    Transport without connection reuse: one requests.post() (hence one TCP connection) per call.
+    """
+    def __init__(self):
+        self.cookies = requests.cookies.RequestsCookieJar()
+
+    def post(self, url, data, **kwargs):
+        response = requests.post(url, data=data, cookies=self.cookies, **kwargs)
+        self.cookies.update(response.cookies)
+        return response
+
+    def close(self):
+        pass
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def start_server(args):
+    port = free_port()
+    process = subprocess.Popen([sys.executable, '-m', 'openerp_jsonrpc_client.testing',
+                                '--port', str(port),
+                                '--records', str(args.records),
+                                '--payload-size', str(args.payload_size),
+                                '--latency', str(args.latency)],
+                               stdout=subprocess.PIPE)
+    url = 'http://127.0.0.1:%s' % port
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port)).close()
+            return process, url
+        except socket.error:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("stand-in server did not start")
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100.0))]
+
+
+def server_stats(url):
+    return requests.post(url + '/web/standin/stats', data='{"params": {}}').json()['result']
+
+
+def report(name, url, run):
+    """Run scenario and print its metrics. run() returns the list of calls latencies."""
+    stats_before = server_stats(url)
+    cpu_before = time.process_time()
+    started_at = time.time()
+    latencies = run()
+    elapsed = time.time() - started_at
+    cpu = time.process_time() - cpu_before
+    stats_after = server_stats(url)
+
+    calls = len(latencies)
+    wire_bytes = (stats_after['bytes_received'] + stats_after['bytes_sent']
+                  - stats_before['bytes_received'] - stats_before['bytes_sent'])
+    print("%-42s %7d %10.0f %9.2f %9.2f %12.0f %10.0f" % (
+        name, calls, calls / elapsed,
+        percentile(latencies, 50) * 1000, percentile(latencies, 99) * 1000,
+        wire_bytes / float(calls), cpu / calls * 1e6))
+
+
+def timed(func):
+    started_at = time.time()
+    func()
+    return time.time() - started_at
+
+
+def make_client(url, transport=None, codec=None, pool_maxsize=10):
+    client = OpenERPJSONRPCClient(url, transport=transport, codec=codec, pool_maxsize=pool_maxsize)
+    client.session_authenticate(OpenERPStandInServer.DEFAULT_DB, 'admin', 'admin')
+    return client
+
+
+def run_benchmarks(args, url):
+    default_codec = get_default_codec()
+    clients = [
+        ('unpooled/%s' % default_codec.name, lambda: make_client(url, transport=UnpooledTransport())),
+        ('pooled/json', lambda: make_client(url, codec=OpenERPJSONCodec())),
+        ('pooled/%s' % default_codec.name, lambda: make_client(url, pool_maxsize=args.threads)),
+    ]
+
+    print("%-42s %7s %10s %9s %9s %12s %10s" % ('transport / mode', 'calls', 'calls/s', 'p50 (ms)', 'p99 (ms)',
+                                                 'bytes/call', 'cpu/call'))
+    for client_name, client_factory in clients:
+        client = client_factory()
+        partner_obj = client.get_model('res.partner')
+        ids = partner_obj.search([], limit=args.calls)
+
+        report('%s call_kw read x1' % client_name, url,
+               lambda: [timed(lambda: partner_obj.read([ids[i % len(ids)]], ['name', 'ref']))
+                        for i in range(args.calls)])
+
+        pages = max(1, args.calls // 10)
+        report('%s search_read page=%d' % (client_name, args.page_size), url,
+               lambda: [timed(lambda: client.dataset_search_read('res.partner', limit=args.page_size))
+                        for _ in range(pages)])
+        report('%s search_read stream page=%d' % (client_name, args.page_size), url,
+               lambda: [timed(lambda: list(client.dataset_search_read('res.partner', limit=args.page_size,
+                                                                      stream=True)))
+                        for _ in range(pages)])
+
+        def threaded_reads():
+            def call(i):
+                return timed(lambda: partner_obj.read([ids[i % len(ids)]], ['name', 'ref']))
+            return [latency for _, _, latency in imap(call, range(args.calls), max_workers=args.threads)]
+        report('%s call_kw read %d threads' % (client_name, args.threads), url, threaded_reads)
+        client.close()
+
+    if aiohttp is not None:
+        def async_reads():
+            async def main():
+                async with AsyncOpenERPJSONRPCClient(url, max_concurrency=args.threads * 4) as client:
+                    await client.session_authenticate(OpenERPStandInServer.DEFAULT_DB, 'admin', 'admin')
+                    partner_obj = client.get_model('res.partner')
+
+                    async def call(i):
+                        started_at = time.time()
+                        await partner_obj.read([i % args.records + 1], ['name', 'ref'])
+                        return time.time() - started_at
+                    return await asyncio.gather(*[call(i) for i in range(args.calls)])
+            return asyncio.run(main())
+        report('aiohttp call_kw read concurrency=%d' % (args.threads * 4), url, async_reads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenERPJSONRPCClient benchmarks.")
+    parser.add_argument('--calls', type=int, default=500, help="number of calls per scenario")
+    parser.add_argument('--records', type=int, default=2000, help="number of res.partner records")
+    parser.add_argument('--page-size', type=int, default=200, help="search_read page size")
+    parser.add_argument('--latency', type=float, default=0.0, help="server latency per request (s)")
+    parser.add_argument('--payload-size', type=int, default=50, help="size of res.partner comment field")
+    parser.add_argument('--threads', type=int, default=8, help="number of threads for concurrent scenarios")
+    args = parser.parse_args()
+
+    process, url = start_server(args)
+    try:
+        run_benchmarks(args, url)
+    finally:
+        process.kill()
+
+
+if __name__ == '__main__':
+    main()
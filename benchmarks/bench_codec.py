@@ -0,0 +1,78 @@
+# coding: utf8
+"""
+Measures encode/decode time per call of each available JSON codec on
+search_read like payloads.
+
+usage: python benchmarks/bench_codec.py [number_of_records ...]
+"""
+from __future__ import print_function
+
+import sys
+import timeit
+
+from openerp_jsonrpc_client import OpenERPJSONCodec, OpenERPOrjsonCodec, OpenERPUjsonCodec
+
+
+def make_request(records):
+    return {
+        'json-rpc': "2.0",
+        'method': 'call',
+        'params': {
+            'model': 'account.move.line',
+            'method': 'write',
+            'args': [list(range(records)), {'name': u'Écriture', 'ref': 'REF/0001'}],
+            'kwargs': {'context': {'lang': 'fr_FR', 'tz': False, 'uid': 1}},
+            'session_id': 'd3b252a5526646b0b3073d4114d86bda',
+        },
+        'id': 1,
+    }
+
+
+def make_response(records):
+    return {
+        'jsonrpc': "2.0",
+        'id': 1,
+        'result': {
+            'length': records,
+            'records': [{
+                'id': i,
+                'name': u'Écriture %d' % i,
+                'debit': i * 1.5,
+                'credit': 0.0,
+                'account_id': [i % 50, u'411100 Clients'],
+                'reconcile': False,
+                'date': '2013-02-24',
+            } for i in range(records)],
+        },
+    }
+
+
+def available_codecs():
+    codecs = []
+    for codec_class in (OpenERPJSONCodec, OpenERPUjsonCodec, OpenERPOrjsonCodec):
+        try:
+            codecs.append(codec_class())
+        except ImportError:
+            pass
+    return codecs
+
+
+def best_time_per_call(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main(sizes):
+    print("%-8s %8s %14s %14s %12s" % ('codec', 'records', 'encode (us)', 'decode (us)', 'resp. bytes'))
+    for size in sizes:
+        request = make_request(size)
+        response = make_response(size)
+        number = max(1, 20000 // (size + 1))
+        for codec in available_codecs():
+            body = codec.encode(response)
+            encode_time = best_time_per_call(lambda: codec.encode(request), number)
+            decode_time = best_time_per_call(lambda: codec.decode(body), number)
+            print("%-8s %8d %14.1f %14.1f %12d" % (codec.name, size, encode_time * 1e6, decode_time * 1e6, len(body)))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10, 1000, 50000])
@@ -23,14 +23,39 @@
 #    (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 #    SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-# TODO: Add a shortcut to ir.model.data.get_object_reference('module', identifier')
 # TODO: Add a complete example of OpenERP configuration with wizard and settings to enable exec_workflow test
 # TODO: By default, reinject in every call, the context got by authenticate
 # TODO: coverage ?
 # TODO: publish on pypi
 
-import requests
+import functools
+import itertools
 import json
+import os
+import re
+import threading
+import time
+
+import requests
+
+from .batching import OpenERPBatchLoader, OpenERPDeferredResult
+from .binary import OpenERPMultipartFileBody
+from .bulk import OpenERPAdaptiveChunker
+from .cache import OpenERPMetadataCache
+from .coalescing import OpenERPCallCoalescer
+from .codec import OpenERPJSONCodec, OpenERPOrjsonCodec, OpenERPUjsonCodec, get_default_codec
+from .columnar import OpenERPColumnarResult, OpenERPColumnarRow
+from .concurrency import BackgroundCall, WorkerPool, imap
+from .hedging import OpenERPHedgingPolicy
+from .instrumentation import OpenERPCallHook, OpenERPCallInfo, OpenERPMetricsCollector
+from .recordcache import VERSION_FIELDS, OpenERPRecordCache, record_version
+from .records import OpenERPRecordEnvironment, OpenERPRecordSet
+from .streaming import OpenERPJSONArrayStreamParser
+from .sync import OpenERPCallbackSink, OpenERPJSONLinesSink, OpenERPModelSync, OpenERPSQLiteSink, OpenERPSyncSink, \
+    OpenERPSyncState
+from .transport import OpenERPHTTPTransport
+from .writebuffer import OpenERPWriteBuffer, OpenERPWriteBufferError
+from .xmlid import OpenERPXMLIDResolver, OpenERPXMLIDResolverBase
 
 
 class OpenERPJSONRPCClientMethodNotFoundError(BaseException):
@@ -41,6 +66,10 @@ class OpenERPJSONRPCClientServiceNotFoundError(BaseException):
     pass
 
 
+class OpenERPJSONRPCClientAuthenticationError(BaseException):
+    pass
+
+
 class OpenERPJSONRPCClientException(BaseException):
     """
     Raised when jsonrpc() returns an error response
@@ -54,10 +83,42 @@ class OpenERPJSONRPCClientException(BaseException):
     def __str__(self):
         return self.data.get('fault_code')+self.data.get('debug')
 
+
+class OpenERPJSONRPCClientLoadError(BaseException):
+    """
+    Raised when load() rejects rows. OpenERP rolls back the whole call so none of the rows is imported.
+    """
+    def __init__(self, messages):
+        BaseException.__init__(self, messages)
+        self.messages = messages  # load() messages: dicts with type, record and message keys
+
+    def __str__(self):
+        return '\n'.join('row %s: %s' % (message.get('record'), message.get('message')) for message in self.messages)
+
     def __repr__(self):
         return self.__str__()
         
 
+class OpenERPCallResult(object):
+    """
+    Outcome of one of the calls made by OpenERPJSONRPCClient.map()
+    """
+    def __init__(self, index, args, result=None, exception=None):
+        self.index = index  # position of args in map() iterable
+        self.args = args
+        self.result = result
+        self.exception = exception
+
+    @property
+    def ok(self):
+        return self.exception is None
+
+    def __repr__(self):
+        if self.ok:
+            return "<OpenERPCallResult #%s %r>" % (self.index, self.result)
+        return "<OpenERPCallResult #%s failed: %r>" % (self.index, self.exception)
+
+
 class OpenERPServiceProxy(object):
     """
     A proxy to a generic OpenERP Service (eg. db).
@@ -76,9 +137,10 @@ class OpenERPServiceProxy(object):
         return proxy
 
 
-class OpenERPModelProxy(object):
+class OpenERPModelProxyBase(object):
     """
     A proxy to a dataset model which allow to call methods on models using call_kw.
+    Methods return what the client dataset_call_kw() returns.
     """
     def __init__(self, json_rpc_client, model_name):
         self._json_rpc_client = json_rpc_client
@@ -95,7 +157,268 @@ class OpenERPModelProxy(object):
         return proxy
 
 
-class OpenERPJSONRPCClient():
+class OpenERPModelProxy(OpenERPModelProxyBase):
+    """
+    A proxy to a dataset model of an OpenERPJSONRPCClient, with recordsets and chunked calls.
+    """
+
+    def browse(self, ids):
+        """
+        :return: a lazily loaded recordset of ids (see OpenERPRecordSet)
+        :rtype: OpenERPRecordSet
+        """
+        return self._json_rpc_client.record_environment.browse(self.model_name, ids)
+
+    def search_records(self, domain=[], offset=0, limit=None, order=None):
+        """
+        :return: a lazily loaded recordset of the records matching domain
+        :rtype: OpenERPRecordSet
+        """
+        return self._json_rpc_client.record_environment.search(self.model_name, domain, offset=offset, limit=limit,
+                                                               order=order)
+
+    def _call_chunks(self, records, call, chunk_size, target_duration, max_workers, max_payload_size):
+        chunker = OpenERPAdaptiveChunker(chunk_size=chunk_size, target_duration=target_duration,
+                                         max_payload_size=max_payload_size)
+        codec = self._json_rpc_client.codec
+
+        def call_chunk(chunk):
+            payload_size = len(codec.encode(chunk)) if max_payload_size else None
+            started_at = time.time()
+            try:
+                result = call(chunk)
+            except (Exception, OpenERPJSONRPCClientException, OpenERPJSONRPCClientLoadError) as exc:
+                # eg. a timeout or a request too large, smaller chunks may pass
+                chunker.record_failure(len(chunk))
+                return None, exc
+            chunker.record(len(chunk), time.time() - started_at, payload_size)
+            return result, None
+
+        if max_workers > 1:
+            results = imap(call_chunk, chunker.chunks(records), max_workers=max_workers)
+        else:
+            results = ((index, chunk, call_chunk(chunk)) for index, chunk in enumerate(chunker.chunks(records)))
+        return [OpenERPCallResult(index, chunk, result, exception) for index, chunk, (result, exception) in results]
+
+    def create_many(self, values, chunk_size=100, target_duration=2.0, max_workers=1, max_payload_size=None,
+                    multi_create=False, **kwargs):
+        """
+        Creates records by chunks. Chunk size is adapted after each call so that calls last about
+        target_duration seconds and, when max_payload_size is set, chunks weigh less than
+        max_payload_size bytes.
+
+        :param values: list of values dicts
+        :param max_workers: number of chunks sent concurrently. 1 to send them one after the other.
+        :param multi_create: when True, a chunk is sent in one call to create() with the list of values
+                             which requires a server whose create() accepts a list (OpenERP 7 create()
+                             does not). When False, a chunk is sent in one call to load(): values are
+                             then import values (many2one by name, 'field/.id' for a database id,
+                             'field/id' for an external id) and a field missing from some of the chunk
+                             values is imported empty for them.
+        :param kwargs: passed to create() or load() (eg. context)
+        :return: one OpenERPCallResult per chunk whose args are the chunk values and result the
+                 list of created ids. A failed chunk does not abort the others and none of its records
+                 is created: args lists all of them and, with load(), exception is an
+                 OpenERPJSONRPCClientLoadError whose messages tell which rows were rejected.
+        :rtype: list
+        """
+        if multi_create:
+            def call(chunk):
+                return self._json_rpc_client.dataset_call_kw(self.model_name, 'create', chunk, **kwargs)
+        else:
+            def call(chunk):
+                fields = sorted(set(field for vals in chunk for field in vals))
+                rows = [[vals.get(field, False) for field in fields] for vals in chunk]
+                result = self._json_rpc_client.dataset_call_kw(self.model_name, 'load', fields, rows, **kwargs)
+                if result['ids'] is False:
+                    raise OpenERPJSONRPCClientLoadError(result['messages'])
+                return result['ids']
+        return self._call_chunks(values, call, chunk_size, target_duration, max_workers, max_payload_size)
+
+    def write_many(self, ids, vals, chunk_size=1000, target_duration=2.0, max_workers=1, **kwargs):
+        """
+        Writes vals on ids by chunks (see create_many()).
+
+        :return: one OpenERPCallResult per chunk whose args are the chunk ids
+        :rtype: list
+        """
+        def call(chunk):
+            return self._json_rpc_client.dataset_call_kw(self.model_name, 'write', chunk, vals, **kwargs)
+        return self._call_chunks(ids, call, chunk_size, target_duration, max_workers, None)
+
+    def unlink_many(self, ids, chunk_size=1000, target_duration=2.0, max_workers=1, **kwargs):
+        """
+        Deletes ids by chunks (see create_many()).
+
+        :return: one OpenERPCallResult per chunk whose args are the chunk ids
+        :rtype: list
+        """
+        def call(chunk):
+            return self._json_rpc_client.dataset_call_kw(self.model_name, 'unlink', chunk, **kwargs)
+        return self._call_chunks(ids, call, chunk_size, target_duration, max_workers, None)
+
+
+class OpenERPBatchedModelProxy(OpenERPModelProxy):
+    """
+    A model proxy whose read() and name_get() calls are batched.
+
+    read() and name_get() return an OpenERPDeferredResult immediately. All calls issued on the
+    same model with the same fields and context are merged in one dataset/call_kw which is sent
+    when result() is called on one of them. Other methods are called directly.
+    """
+    def __init__(self, json_rpc_client, model_name, window=0.0, max_batch_size=1000):
+        super(OpenERPBatchedModelProxy, self).__init__(json_rpc_client, model_name)
+        self._loader = OpenERPBatchLoader(window=window, max_batch_size=max_batch_size)
+
+    def _load(self, method, ids, args, kwargs):
+        def dispatch(merged_ids):
+            values = self._json_rpc_client.dataset_call_kw(self.model_name, method, merged_ids, *args, **kwargs)
+            if method == 'read':
+                return dict((record['id'], record) for record in values)
+            return dict((value[0], value) for value in values)
+
+        return self._loader.load([method, args, kwargs], ids, dispatch)
+
+    def read(self, ids, *args, **kwargs):
+        return self._load('read', ids, args, kwargs)
+
+    def name_get(self, ids, *args, **kwargs):
+        return self._load('name_get', ids, args, kwargs)
+
+    def flush(self):
+        """Send all pending batches"""
+        self._loader.flush()
+
+
+class OpenERPBufferedModelProxy(OpenERPModelProxy):
+    """
+    A model proxy whose write() calls are buffered (write-behind) and sent on flush() grouped by
+    identical values. Any other method call flushes pending writes first so that it sees them.
+    Use it as a context manager to flush on exit:
+
+    >>> with server.get_buffered_model('res.partner', flush_interval=5) as partner_obj:
+    ...     for partner_id, state in changes:
+    ...         partner_obj.write([partner_id], {'state': state})
+    """
+    def __init__(self, json_rpc_client, model_name, max_pending=1000, flush_interval=None):
+        super(OpenERPBufferedModelProxy, self).__init__(json_rpc_client, model_name)
+
+        def dispatch(ids, vals, kwargs):
+            try:
+                self._json_rpc_client.dataset_call_kw(self.model_name, 'write', ids, vals, **kwargs)
+            except (Exception, OpenERPJSONRPCClientException) as exc:
+                return exc
+        self._buffer = OpenERPWriteBuffer(dispatch, max_pending=max_pending, flush_interval=flush_interval)
+
+    @property
+    def write_buffer(self):
+        """The OpenERPWriteBuffer holding pending writes, its failed attribute lists failed writes"""
+        return self._buffer
+
+    def write(self, ids, vals, **kwargs):
+        """
+        Queues a write, it is sent by a later flush.
+
+        :return: True once the write is queued, not written: failures are raised later by
+                 write(), flush() or when leaving the with block (see OpenERPWriteBufferError)
+        :raise OpenERPWriteBufferError: when writes flushed on size or by the timer failed. This write
+                                        is not queued then.
+        """
+        self._buffer.add(ids, vals, kwargs)
+        return True
+
+    def __getattr__(self, method):
+        proxy = super(OpenERPBufferedModelProxy, self).__getattr__(method)
+
+        def flushing_proxy(*args, **kwargs):
+            self.flush()
+            return proxy(*args, **kwargs)
+        return flushing_proxy
+
+    def _call_chunks(self, *args):
+        self.flush()
+        return super(OpenERPBufferedModelProxy, self)._call_chunks(*args)
+
+    def flush(self):
+        """
+        Sends pending writes.
+
+        :return: list of (ids, vals, kwargs, exception) of the writes which failed
+        :raise OpenERPWriteBufferError: when writes flushed on size or by the timer failed since the
+                                        last write() or flush(). It carries them and those of this flush.
+        """
+        return self._buffer.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            failed = self.flush()
+        except OpenERPWriteBufferError as exc:
+            failed = exc.failed
+        if failed and exc_type is None:
+            raise OpenERPWriteBufferError(failed)
+
+
+class OpenERPCachedModelProxy(OpenERPModelProxy):
+    """
+    A model proxy whose read() and search_read() serve records from an OpenERPRecordCache.
+    The server is asked for the versions (write_date) of the wanted records, then only the records
+    missing from the cache or changed since they were cached are read in full.
+    Other methods are called directly.
+
+    Records are cached per database, user and context. The context defaults to the user context.
+    """
+    def __init__(self, json_rpc_client, model_name, record_cache):
+        super(OpenERPCachedModelProxy, self).__init__(json_rpc_client, model_name)
+        self.record_cache = record_cache
+
+    def _read_cached(self, versions, ids, fields, context):
+        client = self._json_rpc_client
+        uid = (client.user_context or {}).get('uid')
+        records = self.record_cache.get(client._db, uid, self.model_name, fields, context, versions)
+        stale_ids = [id for id in versions if id not in records]
+        if stale_ids:
+            values_list = client.dataset_call_kw(self.model_name, 'read', stale_ids, fields or [], context=context)
+            self.record_cache.set(client._db, uid, self.model_name, fields, context, values_list, versions)
+            records.update((values['id'], values) for values in values_list)
+        return [records[id] for id in ids if id in records]
+
+    def read(self, ids, fields=None, context=None):
+        """Same as the model read() (records are returned in ids order)"""
+        if context is None:
+            context = self._json_rpc_client.user_context or {}
+        id_list = list(ids) if isinstance(ids, (list, tuple)) else [ids]
+        versions = dict((values['id'], record_version(values))
+                        for values in self._json_rpc_client.dataset_call_kw(self.model_name, 'read', id_list,
+                                                                           VERSION_FIELDS, context=context))
+        records = self._read_cached(versions, id_list, fields, context)
+        if isinstance(ids, (list, tuple)):
+            return records
+        return records[0] if records else False
+
+    def search_read(self, domain=None, fields=None, offset=0, limit=None, order=None, context=None):
+        """
+        :return: the records matching domain, as a list of values dicts
+        """
+        if context is None:
+            context = self._json_rpc_client.user_context or {}
+        versions_list = self._json_rpc_client.dataset_search_read(self.model_name, fields=VERSION_FIELDS,
+                                                                  offset=offset, limit=limit or False,
+                                                                  domain=domain or [], sort=order,
+                                                                  context=context)['records']
+        versions = dict((values['id'], record_version(values)) for values in versions_list)
+        return self._read_cached(versions, [values['id'] for values in versions_list], fields, context)
+
+
+class OpenERPJSONRPCClientBase():
+    """
+    Request building and response handling shared by OpenERPJSONRPCClient and its asyncio flavor
+    (see openerp_jsonrpc_client.aio). Subclasses post requests: oe_jsonrpc() and the helpers built
+    on it (db_*(), session_*(), dataset_*(), service and model proxies) return what their
+    oe_jsonrpc() returns, a result or an awaitable.
+    """
     # List of OpenERP v7.0 Available Services
     # can be found in openerp/addons/web/controllers/main.py
     OE_SERVICES = (
@@ -105,85 +428,73 @@ class OpenERPJSONRPCClient():
         'report',
     )
 
-    def __init__(self, base_url):
-        self._rid = 0  # a unique request id incremented at each request
+    def __init__(self, base_url, codec=None, hooks=None, auto_reauthenticate=True):
+        # a unique request id incremented at each request.
+        # next() on an itertools.count is atomic so ids are unique across threads.
+        self._rid_sequence = itertools.count()
         self._base_url = base_url
-        self._cookies = dict()
         self._session_id = None
+        self._db = None  # database we are authenticated on
         self.user_context = None
+        self._xmlid_resolver = None
+        self.codec = codec or get_default_codec()
+        self.hooks = list(hooks or [])
+        self.auto_reauthenticate = auto_reauthenticate
+        self._credentials = None  # session_authenticate() arguments, kept to re-authenticate
 
-        # We call get_session_info() to retreive a werkzeug cookie
-        # and an OpenERP session_id
-        first_connection = self.jsonrpc(self._url_for_method('session', 'get_session_info'),
-                                        'call',
-                                        session_id=None,
-                                        context={})
-        if first_connection.cookies.get('sid', False):
-            self._cookies = dict(sid=first_connection.cookies['sid'])
-        self._session_id = first_connection.json()['result']['session_id']
+    def add_hook(self, hook):
+        """
+        Registers a hook whose before_call() and after_call() methods are called with an
+        OpenERPCallInfo around each OpenERP JSON-RPC call.
+        eg. to find the slowest calls:
+        >>> metrics = server.add_hook(OpenERPMetricsCollector(slow_call_threshold=0.5))
+        >>> metrics.hot_calls()
+
+        :type hook: OpenERPCallHook
+        :return: hook
+        """
+        self.hooks.append(hook)
+        return hook
 
-    def _url_for_method(self, service_name, method_name):
-        return self._base_url + '/web/' + service_name + '/' + method_name
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
 
-    def jsonrpc(self, url, method, *args, **kwargs):
-        """
-        Executes a "standard" JSON-RPC calls
+    def _next_rid(self):
+        return next(self._rid_sequence)
 
-        :param url: url of the end point to call
-        :param method: JSONRPC method to call
-        :param args: positional args if any
-        :param kwargs: keyword args if any
-        :return: result of the call
-        """
+    def _url_for_method(self, service_name, method_name):
+        return self._base_url + '/web/' + service_name + '/' + method_name
 
+    def _jsonrpc_post_data(self, method, args, kwargs):
         # JSONRPC do not allow to mix positional and keyword arguments
         # If args are defined we use them, else we try with keywords args then fallback to None
         params = args or kwargs
 
-        post_data = {
+        return {
             'json-rpc': "2.0",
             'method': method,
             'params': params,
-            'id': self._rid,
+            'id': self._next_rid(),
         }
 
-        server_response = requests.post(url, json.dumps(post_data), cookies=self._cookies)
-        self._rid += 1
-        return server_response
+    def _session_post_data(self, method, params):
+        # We work on a copy as caller's params may be shared with other threads
+        params = dict(params or {})
 
-    def oe_jsonrpc(self, url, method, params={}):
-        """
-        Executes an OpenERP flavored JSON-RPC calls :
-        - pass OpenERP _session_id along each request
-        - return the result key of the Call Response dict or raise an Exception
+        # We pass OpenERP _session_id at each request
+        if self._session_id:
+            params['session_id'] = self._session_id
 
-        :param url: OpenERP Service/request/ to call (cf. openerp/addons/web/controllers/main.py)
-        :type  url: str
-        :param method: JSON-RPC method name. with OE it's always call or call_kw
-        :type  method: str
-        :param params: content of the JSON-RPC params dict. Must be a dict !
-        :type  params: dict
-        :return: result of the call
-        :rtype: dict
-        """
-        post_data = {
+        return {
             'json-rpc': "2.0",
             'method': method,
             'params': params,
-            'id': self._rid,
+            'id': self._next_rid(),
         }
-        self._rid += 1
-
-        # We pass OpenERP _session_id at each request
-        if self._session_id:
-            post_data['params']['session_id'] = self._session_id
-
-        server_response = requests.post(url, json.dumps(post_data), cookies=self._cookies)
-        if server_response.status_code != 200:
-            raise OpenERPJSONRPCClientMethodNotFoundError("%s is not a valid URL." % url)
-
-        json_response = server_response.json()
 
+    @staticmethod
+    def _oe_result(json_response):
+        """:return: the result of an OpenERP JSON-RPC response or raise its error"""
         try:
             return json_response['result']
         except KeyError:
@@ -195,6 +506,35 @@ class OpenERPJSONRPCClient():
                                             json_response['error']['message'],
                                             json_response['error']['data'], json_response)
 
+    def _before_call(self, url, post_data):
+        call_info = OpenERPCallInfo(url, post_data)
+        for hook in self.hooks:
+            hook.before_call(call_info)
+        return call_info
+
+    def _after_call(self, call_info):
+        call_info.lap(None)
+        for hook in self.hooks:
+            hook.after_call(call_info)
+
+    def _should_reauthenticate(self, url, error):
+        if not (self.auto_reauthenticate and self._credentials) or '/web/session/' in url:
+            return False
+        return error.get('code') == 100 or (error.get('data') or {}).get('type') == 'session_invalid'
+
+    def set_credentials(self, db, login, password, base_location=None, context={}):
+        """
+        Sets the credentials used to re-authenticate when the server session expires without
+        authenticating now (eg. after restore_session()).
+        """
+        self._credentials = (db, login, password, base_location, context)
+
+    def _authenticated(self, db, login, password, base_location, context, result):
+        """Records the session_authenticate() result"""
+        self._db = db
+        self.user_context = result.get('user_context', {})
+        self._credentials = (db, login, password, base_location, context) if result.get('uid') else None
+
     def call_with_named_arguments(self, service, method, *args, **kwargs):
         """
         use JSON-RPC named arguments style.
@@ -266,16 +606,21 @@ class OpenERPJSONRPCClient():
 
     @property
     def get_available_services(self):
-        return OpenERPJSONRPCClient.OE_SERVICES
+        return OpenERPJSONRPCClientBase.OE_SERVICES
 
     def get_service(self, service_name):
-        if service_name in OpenERPJSONRPCClient.OE_SERVICES:
+        if service_name in OpenERPJSONRPCClientBase.OE_SERVICES:
             return OpenERPServiceProxy(self, service_name)
         raise OpenERPJSONRPCClientServiceNotFoundError()
 
-    def get_model(self, model_name):
-        """OpenERP self.pool.get(...) equivalent"""
-        return OpenERPModelProxy(self, model_name)
+    def get_object_reference(self, module, name, context={}):
+        """
+        ir.model.data.get_object_reference() shortcut. Resolved xmlids are cached.
+        Use xmlid_resolver.resolve() to resolve many xmlids at once.
+
+        :return: a (model, res_id) tuple
+        """
+        return self.xmlid_resolver.get_object_reference(module, name, context=context)
 
     #
     # database service
@@ -369,26 +714,6 @@ class OpenERPJSONRPCClient():
         """
         return self.call_with_named_arguments('session', 'get_session_info', context=context)
 
-    def session_authenticate(self, db, login, password, base_location=None, context={}):
-        """
-        Authenticate against a database.
-
-        :param db:
-        :param login:
-        :param password:
-        :param base_location:
-        :return:
-        """
-        result = self.call_with_named_arguments('session',
-                                                'authenticate',
-                                                db=db,
-                                                login=login,
-                                                password=password,
-                                                base_location=base_location,
-                                                context=context)
-        self.user_context = result.get('user_context', {})
-        return result
-
     def session_sc_list(self, context={}):
         """
         Retreive session information
@@ -433,6 +758,503 @@ class OpenERPJSONRPCClient():
                                               fields=fields,
                                               context=context)
 
+    @staticmethod
+    def _call_kw_params(model, method, args, kwargs):
+        """Packs args and kwargs in dataset/call_kw params (see OpenERPJSONRPCClient.dataset_call_kw())"""
+        return {
+            'method': method,
+            'model': model,
+            'args': args,
+            'kwargs': kwargs,
+            # if there is a context in kw_args, we duplicate it at "params" level
+            'context': kwargs.get('context', {})
+        }
+
+    def dataset_exec_workflow(self, model, id, signal):
+        """Trigger signal on object id of model
+
+        :return: workflow execution result
+        """
+        return self.call_with_named_arguments('dataset', 'exec_workflow',
+                                              model=model,
+                                              id=id,
+                                              signal=signal)
+
+
+class OpenERPJSONRPCClient(OpenERPJSONRPCClientBase):
+
+    def __init__(self, base_url, pool_connections=10, pool_maxsize=10, pool_block=False, idle_timeout=None,
+                 transport=None, metadata_cache=None, codec=None, hooks=None, auto_reauthenticate=True,
+                 coalescer=None, hedging=None, timeout=None):
+        """
+        A client is thread safe: an authenticated client can be shared by a pool of threads.
+        In that case, size pool_maxsize to the number of threads.
+
+        :param base_url: OpenERP server url (eg. http://localhost:8069)
+        :type base_url: str
+        :param pool_connections: number of per-host connection pools kept by the transport
+        :type pool_connections: int
+        :param pool_maxsize: maximum number of keep-alive connections per host
+        :type pool_maxsize: int
+        :param pool_block: when True, threads wait for a free connection when pool_maxsize connections are in use
+        :type pool_block: bool
+        :param idle_timeout: seconds after which idle connections are re-opened. None to keep them forever.
+        :type idle_timeout: float
+        :param timeout: seconds to wait for the server to answer a request. None to wait forever.
+        :type timeout: float
+        :param transport: an already built transport to use instead of creating one.
+        :type transport: OpenERPHTTPTransport
+        :param metadata_cache: cache used for fields_get, fields_view_get and ir.model.data lookups
+        :type metadata_cache: OpenERPMetadataCache
+        :param codec: JSON codec used to encode requests and decode responses. Fastest installed one by default.
+        :type codec: OpenERPJSONCodec
+        :param hooks: OpenERPCallHook called before and after each call (see add_hook())
+        :type hooks: list
+        :param auto_reauthenticate: when the server session expires, authenticate again with the credentials
+                                    given to session_authenticate() and retry the call
+        :type auto_reauthenticate: bool
+        :param coalescer: when set, identical read-only call_kw calls issued concurrently by threads sharing
+                          the client share one request
+        :type coalescer: OpenERPCallCoalescer
+        :param hedging: when set, idempotent call_kw calls answered slower than usual are sent again
+                        and the first answer is used
+        :type hedging: OpenERPHedgingPolicy
+        """
+        OpenERPJSONRPCClientBase.__init__(self, base_url, codec=codec, hooks=hooks,
+                                          auto_reauthenticate=auto_reauthenticate)
+        self.metadata_cache = metadata_cache
+        self.coalescer = coalescer
+        self.hedging = hedging
+        self._record_environment = None
+        self._session_lock = threading.Lock()
+
+        # All requests go through the same pooled transport whose cookie jar holds
+        # the werkzeug sid cookie
+        self.transport = transport or OpenERPHTTPTransport(pool_connections=pool_connections,
+                                                           pool_maxsize=pool_maxsize,
+                                                           pool_block=pool_block,
+                                                           idle_timeout=idle_timeout,
+                                                           timeout=timeout)
+
+        # The get_session_info() handshake is done on first call (see connect())
+
+    def connect(self):
+        """
+        Opens the server session if not already done. Called by the first call, use it to
+        check the server is reachable (raises requests.exceptions.ConnectionError otherwise).
+        """
+        if self._session_id is None:
+            with self._session_lock:
+                if self._session_id is None:
+                    self._handshake()
+
+    def _handshake(self):
+        # We call get_session_info() to retreive a werkzeug cookie
+        # and an OpenERP session_id
+        first_connection = self.jsonrpc(self._url_for_method('session', 'get_session_info'),
+                                        'call',
+                                        session_id=None,
+                                        context={})
+        self._session_id = self.codec.decode(first_connection.content)['result']['session_id']
+
+    def close(self):
+        """Close all connections held by the transport"""
+        self.transport.close()
+
+    def jsonrpc(self, url, method, *args, **kwargs):
+        """
+        Executes a "standard" JSON-RPC calls
+
+        :param url: url of the end point to call
+        :param method: JSONRPC method to call
+        :param args: positional args if any
+        :param kwargs: keyword args if any
+        :return: result of the call
+        """
+        post_data = self._jsonrpc_post_data(method, args, kwargs)
+        server_response = self.transport.post(url, self.codec.encode(post_data))
+        return server_response
+
+    def oe_jsonrpc(self, url, method, params=None):
+        """
+        Executes an OpenERP flavored JSON-RPC calls :
+        - pass OpenERP _session_id along each request
+        - return the result key of the Call Response dict or raise an Exception
+
+        :param url: OpenERP Service/request/ to call (cf. openerp/addons/web/controllers/main.py)
+        :type  url: str
+        :param method: JSON-RPC method name. with OE it's always call or call_kw
+        :type  method: str
+        :param params: content of the JSON-RPC params dict. Must be a dict ! It is not modified.
+        :type  params: dict
+        :return: result of the call
+        :rtype: dict
+        """
+        post_data = self._oe_post_data(method, params)
+        json_response = self._post(url, post_data)
+
+        if 'error' in json_response and self._should_reauthenticate(url, json_response['error']):
+            self._reauthenticate(post_data['params'].get('session_id'))
+            post_data = self._oe_post_data(method, params)
+            json_response = self._post(url, post_data)
+
+        return self._oe_result(json_response)
+
+    def _post(self, url, post_data):
+        """
+        Encodes and posts post_data to url then returns the decoded JSON response.
+        Registered hooks are called around the call.
+        """
+        if not self.hooks:
+            server_response = self.transport.post(url, self.codec.encode(post_data))
+            if server_response.status_code != 200:
+                raise OpenERPJSONRPCClientMethodNotFoundError("%s is not a valid URL." % url)
+            return self.codec.decode(server_response.content)
+
+        call_info = self._before_call(url, post_data)
+        try:
+            call_info.lap('encode')
+            data = self.codec.encode(post_data)
+            call_info.request_size = len(data)
+            call_info.lap('network')
+            server_response = self.transport.post(url, data)
+            if server_response.status_code != 200:
+                raise OpenERPJSONRPCClientMethodNotFoundError("%s is not a valid URL." % url)
+            content = server_response.content
+            call_info.response_size = len(content)
+            call_info.lap('decode')
+            json_response = self.codec.decode(content)
+            call_info.error = json_response.get('error')
+            return json_response
+        except BaseException as exc:
+            call_info.exception = exc
+            raise
+        finally:
+            self._after_call(call_info)
+
+    def _reauthenticate(self, expired_session_id):
+        with self._session_lock:
+            # other threads may have hit the same expired session, only the first one re-authenticates
+            if self._session_id == expired_session_id:
+                self.reauthenticate()
+
+    def reauthenticate(self):
+        """
+        Opens a new server session and authenticates it with the credentials
+        given to the last successful session_authenticate()
+        """
+        if not self._credentials:
+            raise OpenERPJSONRPCClientAuthenticationError("Client has never been authenticated.")
+        credentials = self._credentials
+        self._session_id = None
+        self.transport.cookies.clear()
+        self._handshake()
+        if not self.session_authenticate(*credentials).get('uid'):
+            raise OpenERPJSONRPCClientAuthenticationError("Authentication of %s on %s failed." % (credentials[1],
+                                                                                               credentials[0]))
+
+    def export_session(self):
+        """
+        :return: a json serializable dict of the server session (session_id, werkzeug sid cookie,
+                 database and user_context) to give to restore_session() in another process.
+        :rtype: dict
+        """
+        return {
+            'base_url': self._base_url,
+            'session_id': self._session_id,
+            'db': self._db,
+            'user_context': self.user_context,
+            'cookies': [{'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain, 'path': cookie.path}
+                        for cookie in self.transport.cookies],
+        }
+
+    def restore_session(self, session):
+        """
+        Reuses a server session exported by export_session() so that neither the handshake nor
+        session_authenticate() are needed while the server session is valid.
+        As the password is not exported, use set_credentials() to re-authenticate once it has expired.
+
+        :param session: dict returned by export_session()
+        :type session: dict
+        """
+        if session['base_url'] != self._base_url:
+            raise ValueError("Session belongs to %s, not to %s." % (session['base_url'], self._base_url))
+        for cookie in session['cookies']:
+            self.transport.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'])
+        self._db = session['db']
+        self.user_context = session['user_context']
+        self._session_id = session['session_id']
+
+    def save_session(self, path):
+        """
+        Writes export_session() in a json file readable by its owner only.
+        """
+        tmp_path = '%s.%s.tmp' % (path, os.getpid())
+        with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as session_file:
+            json.dump(self.export_session(), session_file)
+        os.rename(tmp_path, path)
+
+    def load_session(self, path):
+        """
+        Restores the session saved by save_session() in path.
+
+        :return: False if there is no session to restore
+        :rtype: bool
+        """
+        try:
+            with open(path) as session_file:
+                session = json.load(session_file)
+        except (IOError, OSError, ValueError):
+            return False
+        if session.get('base_url') != self._base_url or not session.get('session_id'):
+            return False
+        self.restore_session(session)
+        return True
+
+    def _oe_post_data(self, method, params):
+        self.connect()
+        return self._session_post_data(method, params)
+
+    def oe_jsonrpc_stream(self, url, method, params=None, path=('result',), chunk_size=65536):
+        """
+        Same as oe_jsonrpc() but the items of the array found at path in the response are
+        decoded and yielded as soon as they are downloaded. The whole response is never held in memory.
+
+        :param path: keys leading to the array to stream in the response (eg. ('result', 'records'))
+        :type  path: tuple
+        :param chunk_size: size of the chunks read from the socket
+        :type  chunk_size: int
+        :return: a generator of the array items
+        """
+        post_data = self._oe_post_data(method, params)
+        response = {}
+        for item in self._post_stream(url, post_data, path, chunk_size, response):
+            yield item
+        json_response, parser = response['json'], response['parser']
+
+        if 'error' in json_response and self._should_reauthenticate(url, json_response['error']):
+            # the session error is the whole response, no item was yielded
+            self._reauthenticate(post_data['params'].get('session_id'))
+            post_data = self._oe_post_data(method, params)
+            for item in self._post_stream(url, post_data, path, chunk_size, response):
+                yield item
+            json_response, parser = response['json'], response['parser']
+
+        if 'error' in json_response:
+            raise OpenERPJSONRPCClientException(json_response['error']['code'],
+                                                json_response['error']['message'],
+                                                json_response['error']['data'], json_response)
+
+        if not parser.found:
+            # array is not where we expected it, fallback on the whole (small) result
+            value = json_response
+            for key in path:
+                value = value[key]
+            for item in value:
+                yield item
+
+    def _post_stream(self, url, post_data, path, chunk_size, response):
+        """
+        Posts post_data and yields the items of the array found at path as they are decoded.
+        The decoded response (without the streamed items) and the parser are stored in response.
+        """
+        # network and decode times are interleaved, time spent by the caller consuming items is not counted
+        call_info = self._before_call(url, post_data) if self.hooks else OpenERPCallInfo(url, post_data)
+        try:
+            call_info.lap('encode')
+            data = self.codec.encode(post_data)
+            call_info.request_size = len(data)
+            call_info.lap('network')
+            server_response = self.transport.post(url, data, stream=True)
+            try:
+                if server_response.status_code != 200:
+                    raise OpenERPJSONRPCClientMethodNotFoundError("%s is not a valid URL." % url)
+
+                parser = OpenERPJSONArrayStreamParser(path, self.codec.decode)
+                for chunk in server_response.iter_content(chunk_size):
+                    call_info.response_size += len(chunk)
+                    call_info.lap('decode')
+                    items = parser.feed(chunk)
+                    call_info.lap(None)
+                    for item in items:
+                        yield item
+                    call_info.lap('network')
+                call_info.lap('decode')
+                json_response = parser.close()
+            finally:
+                server_response.close()
+            call_info.error = json_response.get('error')
+        except GeneratorExit:
+            raise  # caller stopped consuming items
+        except BaseException as exc:
+            call_info.exception = exc
+            raise
+        finally:
+            if self.hooks:
+                self._after_call(call_info)
+        response['json'], response['parser'] = json_response, parser
+
+    def get_model(self, model_name):
+        """OpenERP self.pool.get(...) equivalent"""
+        return OpenERPModelProxy(self, model_name)
+
+    def get_batched_model(self, model_name, window=0.0, max_batch_size=1000):
+        """
+        Same as get_model() but read() and name_get() calls are batched.
+
+        :param window: seconds a batch waits, when its first result is accessed, for calls made by other threads
+        :param max_batch_size: maximum number of ids sent in one call
+        :rtype: OpenERPBatchedModelProxy
+        """
+        return OpenERPBatchedModelProxy(self, model_name, window=window, max_batch_size=max_batch_size)
+
+    def get_buffered_model(self, model_name, max_pending=1000, flush_interval=None):
+        """
+        Same as get_model() but write() calls are buffered and coalesced (see OpenERPBufferedModelProxy).
+
+        :param max_pending: number of records with pending writes which triggers a flush
+        :param flush_interval: seconds after the first pending write after which writes are flushed
+                               by a timer thread. None to flush on size, on other calls or explicitly.
+        :rtype: OpenERPBufferedModelProxy
+        """
+        return OpenERPBufferedModelProxy(self, model_name, max_pending=max_pending, flush_interval=flush_interval)
+
+    def get_cached_model(self, model_name, record_cache):
+        """
+        Same as get_model() but read() and search_read() only read records changed since they were
+        cached in record_cache (see OpenERPCachedModelProxy).
+
+        :type record_cache: OpenERPRecordCache
+        :rtype: OpenERPCachedModelProxy
+        """
+        return OpenERPCachedModelProxy(self, model_name, record_cache)
+
+    @property
+    def record_environment(self):
+        """OpenERPRecordEnvironment used by model proxies browse() and search_records()"""
+        if self._record_environment is None:
+            self._record_environment = OpenERPRecordEnvironment(self)
+        return self._record_environment
+
+    @property
+    def xmlid_resolver(self):
+        """OpenERPXMLIDResolver used by get_object_reference()"""
+        if self._xmlid_resolver is None:
+            self._xmlid_resolver = OpenERPXMLIDResolver(self)
+        return self._xmlid_resolver
+
+    def session_authenticate(self, db, login, password, base_location=None, context={}):
+        """
+        Authenticate against a database.
+
+        :param db:
+        :param login:
+        :param password:
+        :param base_location:
+        :return:
+        """
+        result = self.call_with_named_arguments('session',
+                                                'authenticate',
+                                                db=db,
+                                                login=login,
+                                                password=password,
+                                                base_location=base_location,
+                                                context=context)
+        self._authenticated(db, login, password, base_location, context, result)
+        return result
+
+    #
+    # Dataset service
+    #
+    def dataset_search_read(self, model, fields=False, offset=0, limit=False, domain=[], sort=None, context={},
+                            stream=False, columnar=False):
+        """
+        Perform a serch and a read in the same roundtrip
+        :param model: Model involved in search
+        :param fields: Fields you want to fetch. All by default
+        :param offset: Offset of the first record you want to fetch. 0 by default
+        :param limit: Number of record you want to fetch. All by default
+        :param domain: An OpenERP domain specifying search_criteria. All records by default (OpenERP expects an empty domain( [] ) in that case)
+        :param sort: Columns to sort record by. osv.Model _order attribute by default
+        :param stream: When True, returns a generator yielding records as they are decoded from the response
+        :param columnar: When True, returns the records as an OpenERPColumnarResult filled while the
+                         response is streamed. Fields are typed with fields_get().
+        :return:
+        """
+        if columnar:
+            return self._search_read_columnar(self._columnar_field_types(model, fields, context),
+                                              model, fields, offset, limit, domain, sort, context)
+
+        if stream:
+            return self.oe_jsonrpc_stream(self._url_for_method('dataset', 'search_read'), "call",
+                                          dict(model=model, fields=fields, offset=offset, limit=limit,
+                                               domain=domain, sort=sort, context=context),
+                                          path=('result', 'records'))
+
+        return OpenERPJSONRPCClientBase.dataset_search_read(self, model, fields=fields, offset=offset, limit=limit,
+                                                            domain=domain, sort=sort, context=context)
+
+    def _columnar_field_types(self, model, fields, context):
+        fields_description = self.dataset_call_kw(model, 'fields_get', fields or [], context=context)
+        return dict((field, description['type']) for field, description in fields_description.items())
+
+    def _search_read_columnar(self, field_types, model, fields, offset, limit, domain, sort, context):
+        result = OpenERPColumnarResult(field_types)
+        result.extend(self.dataset_search_read(model, fields=fields, offset=offset, limit=limit, domain=domain,
+                                               sort=sort, context=context, stream=True))
+        return result
+
+    def iter_search_read(self, model, domain=[], fields=False, page_size=1000, prefetch=False, context={},
+                         columnar=False):
+        """
+        Iterate over all records matching domain, one record at a time.
+
+        Records are fetched by pages of page_size records ordered by id. Each page is selected
+        with an ('id', '>', last_id) criteria (keyset pagination) so that fetching a page costs
+        the same whatever its position in the table.
+
+        :param model: Model involved in search
+        :param domain: An OpenERP domain specifying search_criteria. All records by default
+        :param fields: Fields you want to fetch. All by default
+        :param page_size: Number of records fetched per roundtrip
+        :param prefetch: When True, next page is fetched in background while current one is consumed
+        :param columnar: When True, yields one OpenERPColumnarResult per page instead of records
+        :return: a generator of records (dict)
+        """
+        if columnar:
+            field_types = self._columnar_field_types(model, fields, context)
+
+        def fetch_page(last_id):
+            page_domain = list(domain) + [('id', '>', last_id)]
+            if columnar:
+                return self._search_read_columnar(field_types, model, fields, 0, page_size, page_domain, 'id',
+                                                  context)
+            return self.dataset_search_read(model,
+                                            fields=fields,
+                                            limit=page_size,
+                                            domain=page_domain,
+                                            sort='id',
+                                            context=context)['records']
+
+        records = fetch_page(0)
+        while records:
+            next_page = None
+            if len(records) == page_size:
+                if prefetch:
+                    next_page = BackgroundCall(fetch_page, records[-1]['id'])
+                else:
+                    next_page = records[-1]['id']
+
+            if columnar:
+                yield records
+            else:
+                for record in records:
+                    yield record
+
+            if next_page is None:
+                break
+            records = next_page.result() if prefetch else fetch_page(next_page)
+
     def dataset_call_kw(self, model, method, *args, **kwargs):
         """
         Packs args and kwargs so that they are compatible with dataset/call_kw json request
@@ -482,29 +1304,247 @@ class OpenERPJSONRPCClient():
         This method is used by OpenERPModelProxy
         """
         url = self._url_for_method('dataset', 'call_kw')
+        params = self._call_kw_params(model, method, args, kwargs)
 
-        # we build params
-        params = {
-            'method': method,
+        call = lambda: self.oe_jsonrpc(url, "call", params)
+        if self.hedging is not None and self.hedging.is_hedgeable(model, method):
+            call = functools.partial(self.hedging.call, model + '.' + method, call)
+        if self.coalescer is not None and self.coalescer.is_coalescable(model, method):
+            key = self.coalescer.make_key(self._session_id, model, method, args, kwargs)
+            call = functools.partial(self.coalescer.get_or_call, key, call)
+
+        if self.metadata_cache is not None and self.metadata_cache.is_cacheable(model, method):
+            return self.metadata_cache.get_or_call(self._db, model, method, args, kwargs,
+                                                   kwargs.get('context', self.user_context), call)
+
+        response = call()
+        return response
+
+    def dataset_call_kw_stream(self, model, method, *args, **kwargs):
+        """
+        Same as dataset_call_kw() for methods returning a list (eg. read, search_read)
+        but records are yielded as they are decoded from the response.
+
+        :return: a generator of the result items
+        """
+        return self.oe_jsonrpc_stream(self._url_for_method('dataset', 'call_kw'), "call",
+                                      self._call_kw_params(model, method, args, kwargs))
+
+    def map(self, model, method, iterable_of_args, max_workers=8, ordered=True):
+        """
+        Call method on model once per item of iterable_of_args using max_workers threads
+        which share the client connection pool.
+
+        Each item gives the arguments of one call:
+        - a tuple is passed as positional arguments, eg. ([partner_id], {'name': 'Cyril'}) for write,
+        - a dict is passed as keyword arguments,
+        - any other value is passed as the only positional argument.
+
+        Methods are called with dataset_call_kw() except 'exec_workflow' which is called
+        with dataset_exec_workflow() and expects (id, signal) items.
+
+        :param ordered: when True results are yielded in iterable_of_args order, else as they complete
+        :return: a generator of OpenERPCallResult. A call raising an OpenERPJSONRPCClientException
+                 (or any Exception) does not abort the others, the exception is stored in the
+                 OpenERPCallResult.
+        """
+        if method == 'exec_workflow':
+            def call(*args, **kwargs):
+                return self.dataset_exec_workflow(model, *args, **kwargs)
+        else:
+            def call(*args, **kwargs):
+                return self.dataset_call_kw(model, method, *args, **kwargs)
+
+        def safe_call(args):
+            try:
+                if isinstance(args, tuple):
+                    return call(*args), None
+                if isinstance(args, dict):
+                    return call(**args), None
+                return call(args), None
+            except (Exception, OpenERPJSONRPCClientException) as exc:
+                return None, exc
+
+        for index, args, (result, exception) in imap(safe_call, iterable_of_args,
+                                                     max_workers=max_workers, ordered=ordered):
+            yield OpenERPCallResult(index, args, result, exception)
+
+    #
+    # Downloads
+    #
+    def download(self, url, form, dest, chunk_size=65536, progress=None):
+        """
+        POSTs form (with the session_id) to a plain http controller of the server (eg. export/csv)
+        and writes the response body to dest chunk by chunk, so the body is never held in memory.
+
+        :param url: url of the controller
+        :param form: dict of form fields
+        :param dest: a file path or a file-like object open in binary mode. A file path is written
+                     atomically (the file appears when the download is complete).
+        :param chunk_size: size of the chunks read from the socket and written to dest
+        :param progress: callable receiving (bytes received, total bytes or None when unknown) after each chunk
+        :return: number of bytes written
+        :rtype: int
+        """
+        self.connect()
+        form = dict(form, session_id=self._session_id)
+        server_response = self.transport.post(url, form, stream=True)
+        try:
+            if server_response.status_code == 404:
+                raise OpenERPJSONRPCClientMethodNotFoundError("%s is not a valid URL or has nothing to download." % url)
+            server_response.raise_for_status()
+            total = int(server_response.headers.get('Content-Length') or 0) or None
+
+            if hasattr(dest, 'write'):
+                return self._write_chunks(server_response, dest, chunk_size, total, progress)
+
+            tmp_path = '%s.%s.part' % (dest, os.getpid())
+            try:
+                with open(tmp_path, 'wb') as dest_file:
+                    written = self._write_chunks(server_response, dest_file, chunk_size, total, progress)
+                os.rename(tmp_path, dest)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            return written
+        finally:
+            server_response.close()
+
+    @staticmethod
+    def _write_chunks(server_response, dest_file, chunk_size, total, progress):
+        written = 0
+        for chunk in server_response.iter_content(chunk_size):
+            dest_file.write(chunk)
+            written += len(chunk)
+            if progress is not None:
+                progress(written, total)
+        return written
+
+    #
+    # Export service
+    #
+    def export(self, file_format, model, fields, dest, ids=False, domain=[], import_compat=False, context={},
+               chunk_size=65536, progress=None):
+        """
+        Exports fields of model records to dest the same way the web client "Export" dialog does.
+        The export is streamed to dest (see download()).
+
+        :param file_format: 'csv' or 'xls' (requires xlwt on the server)
+        :param fields: list of field names (or of {'name': ..., 'label': ...} dicts)
+        :param dest: a file path or a file-like object open in binary mode
+        :param ids: ids of the records to export. When False, records matching domain are exported
+        :param import_compat: when True, columns are named after the fields so that the file can be imported
+        :return: number of bytes written
+        """
+        data = {
             'model': model,
-            'args': args,
-            'kwargs': kwargs,
-            # if there is a context in kw_args, we duplicate it at "params" level
-            'context': kwargs.get('context', {})
+            'fields': [field if isinstance(field, dict) else {'name': field, 'label': field} for field in fields],
+            'ids': ids,
+            'domain': domain,
+            'import_compat': import_compat,
+            'context': context,
         }
+        form = {'data': json.dumps(data), 'token': str(int(time.time() * 1000))}
+        return self.download(self._url_for_method('export', file_format), form, dest, chunk_size=chunk_size,
+                             progress=progress)
 
-        response = self.oe_jsonrpc(url, "call", params)
-        return response
+    def export_csv(self, model, fields, dest, **kwargs):
+        """export() in csv format"""
+        return self.export('csv', model, fields, dest, **kwargs)
 
-    def dataset_exec_workflow(self, model, id, signal):
-        """Trigger signal on object id of model
+    def export_xls(self, model, fields, dest, **kwargs):
+        """export() in xls format"""
+        return self.export('xls', model, fields, dest, **kwargs)
 
-        :return: workflow execution result
+    #
+    # Binary service
+    #
+    def binary_saveas(self, model, field, id, dest, filename_field=None, chunk_size=65536, progress=None):
         """
-        return self.call_with_named_arguments('dataset', 'exec_workflow',
-                                              model=model,
-                                              id=id,
-                                              signal=signal)
+        Downloads the content of a binary field to dest (see download()). The server sends the
+        decoded content so base64 text is neither transferred nor held in memory.
+
+        :param filename_field: field holding the file name sent back in the Content-Disposition header
+        :return: number of bytes written
+        """
+        form = {'model': model, 'field': field, 'id': id}
+        if filename_field:
+            form['filename_field'] = filename_field
+        return self.download(self._url_for_method('binary', 'saveas'), form, dest, chunk_size=chunk_size,
+                             progress=progress)
+
+    def download_attachment(self, attachment_id, dest, chunk_size=65536, progress=None):
+        """Downloads the content of an ir.attachment to dest (see binary_saveas())"""
+        return self.binary_saveas('ir.attachment', 'datas', attachment_id, dest, filename_field='datas_fname',
+                                  chunk_size=chunk_size, progress=progress)
+
+    def download_attachments(self, attachment_ids, dest_dir, max_workers=8, chunk_size=65536, context={}):
+        """
+        Downloads ir.attachment contents concurrently in dest_dir, as <id>_<file name> files.
+        Downloads share the client connection pool (size it to max_workers).
+
+        :return: one OpenERPCallResult per attachment whose args is the attachment id and result
+                 the file path. A failed download does not abort the others.
+        :rtype: list
+        """
+        names = dict((attachment['id'], attachment['datas_fname'] or attachment['name'] or '')
+                     for attachment in self.dataset_call_kw('ir.attachment', 'read', list(attachment_ids),
+                                                            ['datas_fname', 'name'], context=context))
+
+        def download(attachment_id):
+            filename = os.path.basename(names.get(attachment_id, '').replace('\\', '/'))
+            path = os.path.join(dest_dir, '%s_%s' % (attachment_id, filename) if filename else str(attachment_id))
+            try:
+                self.download_attachment(attachment_id, path, chunk_size=chunk_size)
+                return path, None
+            except (Exception, OpenERPJSONRPCClientMethodNotFoundError, OpenERPJSONRPCClientException) as exc:
+                return None, exc
+
+        return [OpenERPCallResult(index, attachment_id, path, exception)
+                for index, attachment_id, (path, exception) in imap(download, attachment_ids,
+                                                                   max_workers=max_workers)]
+
+    def upload_attachment(self, model, id, src, filename=None, chunk_size=65536, progress=None):
+        """
+        Attaches a file to a record as the web client does. The file is read and sent chunk by
+        chunk so it is never held in memory.
+
+        :param src: a file path or a file object open in binary mode
+        :param filename: name of the attachment. src file name by default.
+        :param progress: callable receiving (bytes sent, file size) after each chunk
+        :return: id of the created ir.attachment
+        :rtype: int
+        """
+        self.connect()
+        if hasattr(src, 'read'):
+            return self._upload_attachment(model, id, src, filename or os.path.basename(getattr(src, 'name', 'file')),
+                                           chunk_size, progress)
+        with open(src, 'rb') as src_file:
+            return self._upload_attachment(model, id, src_file, filename or os.path.basename(src), chunk_size,
+                                           progress)
+
+    def _upload_attachment(self, model, id, src_file, filename, chunk_size, progress):
+        url = self._url_for_method('binary', 'upload_attachment')
+        body = OpenERPMultipartFileBody({'callback': 'oe_fileupload', 'model': model, 'id': id,
+                                         'session_id': self._session_id},
+                                        'ufile', filename, src_file, chunk_size=chunk_size, progress=progress)
+        server_response = self.transport.post(url, body, headers={'Content-Type': body.content_type})
+        if server_response.status_code == 404:
+            raise OpenERPJSONRPCClientMethodNotFoundError("%s is not a valid URL." % url)
+        server_response.raise_for_status()
+
+        # OpenERP answers a script calling the upload callback: trigger("oe_fileupload", {"id": ...})
+        match = re.search(r'trigger\((.*?),\s*(\{.*\})\);', server_response.text, re.DOTALL)
+        if match is None:
+            raise OpenERPJSONRPCClientException(200, 'Unexpected upload response',
+                                                {'fault_code': 'Unexpected upload response',
+                                                 'debug': server_response.text}, None)
+        result = json.loads(match.group(2))
+        if 'error' in result:
+            raise OpenERPJSONRPCClientException(200, result['error'], {'fault_code': result['error'], 'debug': ''},
+                                                result)
+        return result['id']
 
     # Note: We don't implement exec_button() as it modifies returned action values
     #       in a way which is not consistent with server side behavior
@@ -0,0 +1,294 @@
+# coding: utf8
+"""
+asyncio flavor of OpenERPJSONRPCClient (Python 3 only, requires aiohttp).
+
+AsyncOpenERPJSONRPCClient shares request building and response handling with OpenERPJSONRPCClient
+(see OpenERPJSONRPCClientBase): its helpers (call_with_named_arguments(), dataset_call_kw(), db_*(), ...)
+as well as the service and model proxies return awaitables:
+
+    >>> async with AsyncOpenERPJSONRPCClient('http://localhost:8069', max_concurrency=50) as server:
+    ...     await server.session_authenticate('db', 'admin', 'admin')
+    ...     res_users_obj = server.get_model('res.users')
+    ...     users = await asyncio.gather(*[res_users_obj.read(uid, ['login']) for uid in uids])
+"""
+import asyncio
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is an optional dependency
+    aiohttp = None
+
+from openerp_jsonrpc_client import OpenERPJSONRPCClientAuthenticationError, OpenERPJSONRPCClientBase, \
+    OpenERPJSONRPCClientMethodNotFoundError, OpenERPModelProxyBase, OpenERPXMLIDResolverBase
+
+
+class AsyncOpenERPModelProxy(OpenERPModelProxyBase):
+    """
+    A proxy to a dataset model of an AsyncOpenERPJSONRPCClient whose methods return awaitables.
+    """
+
+
+class AsyncOpenERPXMLIDResolver(OpenERPXMLIDResolverBase):
+    """
+    asyncio flavor of OpenERPXMLIDResolver: resolve(), get_object_reference() and preload()
+    are coroutines.
+    """
+    async def resolve(self, xmlids, context={}):
+        """
+        Resolve a list of xmlids.
+
+        :return: a dict of {xmlid: (model, res_id)}. Unknown xmlids are missing from the dict.
+        :rtype: dict
+        """
+        for domain in self._missing_domains(xmlids):
+            result = await self._json_rpc_client.dataset_search_read('ir.model.data',
+                                                                      fields=self.FIELDS,
+                                                                      domain=domain,
+                                                                      context=context)
+            self._store(result['records'])
+        return self._resolved(xmlids)
+
+    async def get_object_reference(self, module, name, context={}):
+        """
+        :return: a (model, res_id) tuple
+        :raise ValueError: if xmlid does not exist
+        """
+        xmlid = '%s.%s' % (module, name)
+        return self._object_reference(await self.resolve([xmlid], context=context), xmlid)
+
+    async def preload(self, modules, context={}):
+        """
+        Resolve all xmlids of some modules at once.
+        """
+        records = [record async for record in self._json_rpc_client.iter_search_read(
+            'ir.model.data', domain=[('module', 'in', list(modules))], fields=self.FIELDS,
+            page_size=self.chunk_size * 10, context=context)]
+        self._store(records)
+
+
+class AsyncOpenERPJSONRPCClient(OpenERPJSONRPCClientBase):
+    """
+    A JSON-RPC client whose calls are coroutines.
+
+    Request building is shared with OpenERPJSONRPCClient, only the transport layer
+    (jsonrpc() and oe_jsonrpc()) is asynchronous. At most max_concurrency requests are
+    in flight at the same time.
+
+    Helpers of OpenERPJSONRPCClient built on blocking calls (streaming, downloads, uploads,
+    recordsets, map(), session export, batched, buffered and cached models) are not provided.
+    """
+    def __init__(self, base_url, max_concurrency=100, pool_maxsize=100, idle_timeout=15.0, codec=None,
+                 hooks=None, auto_reauthenticate=True):
+        """
+        :param base_url: OpenERP server url (eg. http://localhost:8069)
+        :type base_url: str
+        :param max_concurrency: maximum number of requests in flight
+        :type max_concurrency: int
+        :param pool_maxsize: maximum number of keep-alive connections per host
+        :type pool_maxsize: int
+        :param idle_timeout: seconds an idle connection is kept alive
+        :type idle_timeout: float
+        :param codec: JSON codec used to encode requests and decode responses. Fastest installed one by default.
+        :type codec: OpenERPJSONCodec
+        :param hooks: OpenERPCallHook called before and after each call. Called from the event loop thread.
+        :type hooks: list
+        :param auto_reauthenticate: when the server session expires, authenticate again with the credentials
+                                    given to session_authenticate() and retry the call
+        :type auto_reauthenticate: bool
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncOpenERPJSONRPCClient requires the aiohttp library.")
+        OpenERPJSONRPCClientBase.__init__(self, base_url, codec=codec, hooks=hooks,
+                                          auto_reauthenticate=auto_reauthenticate)
+        self._session_lock = asyncio.Lock()
+
+        self.max_concurrency = max_concurrency
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._http_session = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _get_http_session(self):
+        if self._http_session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency,
+                                             limit_per_host=self.pool_maxsize,
+                                             keepalive_timeout=self.idle_timeout)
+            # unsafe=True so that sid cookie is also kept when server is addressed by IP
+            self._http_session = aiohttp.ClientSession(connector=connector,
+                                                       cookie_jar=aiohttp.CookieJar(unsafe=True))
+        return self._http_session
+
+    async def connect(self):
+        """
+        Retrieve a werkzeug cookie and an OpenERP session_id. Called on first request if needed.
+        """
+        async with self._session_lock:
+            if self._session_id is None:
+                await self._handshake()
+
+    async def _handshake(self):
+        json_response = await self.jsonrpc(self._url_for_method('session', 'get_session_info'),
+                                           'call',
+                                           session_id=None,
+                                           context={})
+        self._session_id = json_response['result']['session_id']
+
+    async def close(self):
+        """Close all connections"""
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
+
+    async def _post(self, url, post_data):
+        if not self.hooks:
+            async with self._semaphore:
+                async with self._get_http_session().post(url, data=self.codec.encode(post_data)) as server_response:
+                    if server_response.status != 200:
+                        raise OpenERPJSONRPCClientMethodNotFoundError("%s is not a valid URL." % url)
+                    return self.codec.decode(await server_response.read())
+
+        # network time includes the time spent waiting for a free slot of max_concurrency
+        call_info = self._before_call(url, post_data)
+        try:
+            call_info.lap('encode')
+            data = self.codec.encode(post_data)
+            call_info.request_size = len(data)
+            call_info.lap('network')
+            async with self._semaphore:
+                async with self._get_http_session().post(url, data=data) as server_response:
+                    if server_response.status != 200:
+                        raise OpenERPJSONRPCClientMethodNotFoundError("%s is not a valid URL." % url)
+                    content = await server_response.read()
+            call_info.response_size = len(content)
+            call_info.lap('decode')
+            json_response = self.codec.decode(content)
+            call_info.error = json_response.get('error')
+            return json_response
+        except BaseException as exc:
+            call_info.exception = exc
+            raise
+        finally:
+            self._after_call(call_info)
+
+    async def jsonrpc(self, url, method, *args, **kwargs):
+        """
+        Executes a "standard" JSON-RPC calls
+
+        :return: the decoded JSON response
+        :rtype: dict
+        """
+        return await self._post(url, self._jsonrpc_post_data(method, args, kwargs))
+
+    async def oe_jsonrpc(self, url, method, params=None):
+        """
+        Executes an OpenERP flavored JSON-RPC calls (see OpenERPJSONRPCClient.oe_jsonrpc())
+
+        :return: result of the call
+        """
+        post_data = await self._oe_post_data(method, params)
+        json_response = await self._post(url, post_data)
+
+        if 'error' in json_response and self._should_reauthenticate(url, json_response['error']):
+            await self._reauthenticate(post_data['params'].get('session_id'))
+            post_data = await self._oe_post_data(method, params)
+            json_response = await self._post(url, post_data)
+
+        return self._oe_result(json_response)
+
+    async def _oe_post_data(self, method, params):
+        if self._session_id is None:
+            await self.connect()
+        return self._session_post_data(method, params)
+
+    async def _reauthenticate(self, expired_session_id):
+        async with self._session_lock:
+            # other tasks may have hit the same expired session, only the first one re-authenticates
+            if self._session_id == expired_session_id:
+                await self.reauthenticate()
+
+    async def reauthenticate(self):
+        """
+        Opens a new server session and authenticates it with the credentials
+        given to the last successful session_authenticate()
+        """
+        if not self._credentials:
+            raise OpenERPJSONRPCClientAuthenticationError("Client has never been authenticated.")
+        credentials = self._credentials
+        self._session_id = None
+        self._get_http_session().cookie_jar.clear()
+        await self._handshake()
+        if not (await self.session_authenticate(*credentials)).get('uid'):
+            raise OpenERPJSONRPCClientAuthenticationError("Authentication of %s on %s failed." % (credentials[1],
+                                                                                               credentials[0]))
+
+    async def session_authenticate(self, db, login, password, base_location=None, context={}):
+        """
+        Authenticate against a database.
+        """
+        result = await self.call_with_named_arguments('session',
+                                                      'authenticate',
+                                                      db=db,
+                                                      login=login,
+                                                      password=password,
+                                                      base_location=base_location,
+                                                      context=context)
+        self._authenticated(db, login, password, base_location, context, result)
+        return result
+
+    def get_model(self, model_name):
+        return AsyncOpenERPModelProxy(self, model_name)
+
+    @property
+    def xmlid_resolver(self):
+        """AsyncOpenERPXMLIDResolver used by get_object_reference()"""
+        if self._xmlid_resolver is None:
+            self._xmlid_resolver = AsyncOpenERPXMLIDResolver(self)
+        return self._xmlid_resolver
+
+    def dataset_call_kw(self, model, method, *args, **kwargs):
+        """Same as OpenERPJSONRPCClient.dataset_call_kw() without metadata cache, coalescing nor hedging"""
+        return self.oe_jsonrpc(self._url_for_method('dataset', 'call_kw'), "call",
+                               self._call_kw_params(model, method, args, kwargs))
+
+    async def iter_search_read(self, model, domain=[], fields=False, page_size=1000, prefetch=False, context={}):
+        """
+        Asynchronous generator version of OpenERPJSONRPCClient.iter_search_read():
+
+            >>> async for partner in server.iter_search_read('res.partner', fields=['name'], prefetch=True):
+            ...     print(partner['name'])
+        """
+        async def fetch_page(last_id):
+            result = await self.dataset_search_read(model,
+                                                    fields=fields,
+                                                    limit=page_size,
+                                                    domain=list(domain) + [('id', '>', last_id)],
+                                                    sort='id',
+                                                    context=context)
+            return result['records']
+
+        records = await fetch_page(0)
+        next_page = None
+        try:
+            while records:
+                last_id = records[-1]['id'] if len(records) == page_size else None
+                if prefetch and last_id is not None:
+                    next_page = asyncio.ensure_future(fetch_page(last_id))
+
+                for record in records:
+                    yield record
+
+                if last_id is None:
+                    break
+                records = await next_page if prefetch else await fetch_page(last_id)
+                next_page = None
+        finally:
+            if next_page is not None:
+                next_page.cancel()  # caller stopped consuming records
+
@@ -0,0 +1,304 @@
+# coding: utf8
+"""
+A client spreading its calls over several OpenERP nodes (servers or workers listening on their
+own url) when there is no load balancer in front of them.
+
+A server session lives on the node which opened it so session-bound calls are pinned to that node.
+Calls which don't depend on the session (eg. database/get_list) go to the least loaded node.
+A node failing max_failures times in a row is ejected for eject_time seconds, then it gets one
+probe request and is readmitted if it succeeds:
+
+    >>> server = OpenERPLoadBalancedClient(['http://node1:8069', 'http://node2:8069', 'http://node3:8069'])
+    >>> server.session_authenticate('db', 'admin', 'admin')
+    >>> server.node
+    'http://node2:8069'
+"""
+import itertools
+import threading
+import time
+
+import requests
+
+from openerp_jsonrpc_client import OpenERPHTTPTransport, OpenERPJSONRPCClient
+
+try:
+    from requests.packages.urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+except ImportError:  # urllib3 < 1.17
+    from requests.packages.urllib3.exceptions import ConnectTimeoutError
+    NewConnectionError = ConnectTimeoutError
+
+# paths of calls which don't need the client session
+STATELESS_PATHS = (
+    '/web/database/get_list',
+    '/web/database/list',
+    '/web/webclient/version_info',
+    '/web/session/get_lang_list',
+)
+
+# responses of an overloaded or restarting node
+FAILURE_STATUS_CODES = (502, 503, 504)
+
+
+class OpenERPNode(object):
+    """
+    State of one node.
+
+    :ivar outstanding: number of requests in progress
+    :ivar latency: EWMA of request durations in seconds, None until a request is done
+    :ivar failures: number of consecutive failed requests
+    :ivar ejected_until: time at which an ejected node gets a probe request, None when healthy
+    """
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.outstanding = 0
+        self.latency = None
+        self.failures = 0
+        self.ejected_until = None
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def healthy(self):
+        return self.ejected_until is None
+
+    def __repr__(self):
+        return "<OpenERPNode %s%s>" % (self.base_url, '' if self.healthy else ' ejected')
+
+
+class OpenERPNodeSet(object):
+    """
+    Chooses nodes and keeps their state.
+
+    :param base_urls: urls of the nodes
+    :type base_urls: list
+    :param strategy: 'least_outstanding' picks the node with the fewest requests in progress,
+                     'latency' the node with the lowest latency EWMA weighted by its requests in progress
+    :param max_failures: consecutive failures after which a node is ejected
+    :type max_failures: int
+    :param eject_time: seconds before an ejected node is probed again
+    :type eject_time: float
+    :param smoothing: weight of the last request in the latency EWMA
+    :type smoothing: float
+    """
+    STRATEGIES = ('least_outstanding', 'latency')
+
+    def __init__(self, base_urls, strategy='least_outstanding', max_failures=3, eject_time=30.0, smoothing=0.3):
+        if not base_urls:
+            raise ValueError("At least one node url is required.")
+        if strategy not in self.STRATEGIES:
+            raise ValueError("Unknown strategy %r, use one of %s." % (strategy, ', '.join(self.STRATEGIES)))
+        self.nodes = [OpenERPNode(base_url.rstrip('/')) for base_url in base_urls]
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.eject_time = eject_time
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._rotation = itertools.count()  # ties are broken round robin
+
+    def node_for_url(self, url):
+        """:return: the node url belongs to, or None"""
+        for node in self.nodes:
+            if url.startswith(node.base_url + '/'):
+                return node
+        return None
+
+    def _load(self, node):
+        if self.strategy == 'least_outstanding':
+            return node.outstanding
+        return (node.latency or 0.0) * (node.outstanding + 1)
+
+    def pick(self, exclude=()):
+        """
+        :return: an ejected node due for a probe request, else the healthy node with the lowest load,
+                 else the node whose ejection ends first. None when all nodes are excluded.
+        :rtype: OpenERPNode
+        """
+        now = time.time()
+        with self._lock:
+            start = next(self._rotation) % len(self.nodes)
+            nodes = [node for node in self.nodes[start:] + self.nodes[:start] if node not in exclude]
+            if not nodes:
+                return None
+            for node in nodes:
+                if not node.healthy and node.ejected_until <= now:
+                    # one probe request at a time, the node is readmitted if it succeeds (see end())
+                    node.ejected_until = now + self.eject_time
+                    return node
+            healthy = [node for node in nodes if node.healthy]
+            if healthy:
+                return min(healthy, key=self._load)
+            return min(nodes, key=lambda node: node.ejected_until)
+
+    def begin(self, node):
+        with self._lock:
+            node.outstanding += 1
+            node.requests += 1
+
+    def end(self, node, duration, failed=False):
+        with self._lock:
+            node.outstanding -= 1
+            if failed:
+                node.errors += 1
+                node.failures += 1
+                if node.failures >= self.max_failures:
+                    node.ejected_until = time.time() + self.eject_time
+            else:
+                node.failures = 0
+                node.ejected_until = None
+                node.latency = duration if node.latency is None else \
+                    self.smoothing * duration + (1 - self.smoothing) * node.latency
+
+    @property
+    def stats(self):
+        return [{'base_url': node.base_url, 'healthy': node.healthy, 'outstanding': node.outstanding,
+                 'latency': node.latency, 'requests': node.requests, 'errors': node.errors}
+                for node in self.nodes]
+
+
+class OpenERPBalancedTransport(OpenERPHTTPTransport):
+    """
+    A transport which keeps the state of the nodes requests are posted to.
+    Streamed responses are accounted for until their headers are received.
+
+    :param nodes: OpenERPNodeSet
+    """
+    def __init__(self, nodes, **kwargs):
+        super(OpenERPBalancedTransport, self).__init__(**kwargs)
+        self.nodes = nodes
+
+    def post(self, url, data, **kwargs):
+        node = self.nodes.node_for_url(url)
+        if node is None:
+            return super(OpenERPBalancedTransport, self).post(url, data, **kwargs)
+
+        self.nodes.begin(node)
+        start = time.time()
+        failed = False
+        try:
+            server_response = super(OpenERPBalancedTransport, self).post(url, data, **kwargs)
+            failed = server_response.status_code in FAILURE_STATUS_CODES
+            return server_response
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            failed = True
+            raise
+        finally:
+            self.nodes.end(node, time.time() - start, failed)
+
+    def probe(self):
+        """
+        Sends a version_info request to each ejected node so that nodes back up are readmitted
+        without waiting for a client request.
+        """
+        for node in self.nodes.nodes:
+            if not node.healthy:
+                try:
+                    self.post(node.base_url + '/web/webclient/version_info',
+                              '{"jsonrpc": "2.0", "method": "call", "params": {}, "id": null}',
+                              headers={'Content-Type': 'application/json'})
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                    pass
+
+
+def _not_sent(exc):
+    """:return: True when exc was raised before the request reached the server"""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+class OpenERPLoadBalancedClient(OpenERPJSONRPCClient):
+    """
+    An OpenERPJSONRPCClient bound to several nodes.
+
+    When the node holding the session can't be reached, the client re-authenticates on another
+    node (see auto_reauthenticate) and the call is sent again. Calls are only sent again when
+    the connection failed, so that a call is never executed twice.
+
+    :param base_urls: urls of the nodes. They must serve the same databases.
+    :type base_urls: list
+    :param strategy: see OpenERPNodeSet
+    :param max_failures: see OpenERPNodeSet
+    :param eject_time: see OpenERPNodeSet
+    :param kwargs: any other OpenERPJSONRPCClient argument but transport
+    """
+    def __init__(self, base_urls, strategy='least_outstanding', max_failures=3, eject_time=30.0,
+                 pool_connections=10, pool_maxsize=10, pool_block=False, idle_timeout=None, timeout=None, **kwargs):
+        self.nodes = OpenERPNodeSet(base_urls, strategy=strategy, max_failures=max_failures, eject_time=eject_time)
+        self._node = None  # node holding the session
+        self._node_lock = threading.Lock()
+        transport = OpenERPBalancedTransport(self.nodes,
+                                             pool_connections=max(pool_connections, len(self.nodes.nodes)),
+                                             pool_maxsize=pool_maxsize, pool_block=pool_block,
+                                             idle_timeout=idle_timeout, timeout=timeout)
+        OpenERPJSONRPCClient.__init__(self, self.nodes.nodes[0].base_url, transport=transport, **kwargs)
+
+    @property
+    def node(self):
+        """url of the node holding the session, None before the first call"""
+        return self._node.base_url if self._node is not None else None
+
+    def _session_node(self):
+        with self._node_lock:
+            if self._node is None or (self._session_id is None and not self._node.healthy):
+                self._node = self.nodes.pick()
+            return self._node
+
+    def _url_for_method(self, service_name, method_name):
+        path = '/web/' + service_name + '/' + method_name
+        node = self.nodes.pick() if path in STATELESS_PATHS else self._session_node()
+        return node.base_url + path
+
+    def oe_jsonrpc(self, url, method, params=None):
+        session_id = self._session_id
+        try:
+            return OpenERPJSONRPCClient.oe_jsonrpc(self, url, method, params)
+        except requests.exceptions.RequestException as exc:
+            if not _not_sent(exc):
+                raise
+            retry_url = self._failover_url(url, session_id)
+            if retry_url is None:
+                raise
+        return OpenERPJSONRPCClient.oe_jsonrpc(self, retry_url, method, params)
+
+    def _failover_url(self, url, session_id):
+        """:return: url on another node to send the failed call to, None when it can't be sent again"""
+        node = self.nodes.node_for_url(url)
+        if node is None:
+            return None
+        path = url[len(node.base_url):]
+        if path in STATELESS_PATHS:
+            other = self.nodes.pick(exclude=(node,))
+            return other.base_url + path if other is not None else None
+
+        with self._node_lock:
+            if self._node is node:
+                other = self.nodes.pick(exclude=(node,))
+                if other is None:
+                    return None
+                self._node = other
+
+        # the session is lost with its node
+        expired_session_id = session_id if session_id is not None else self._session_id
+        if expired_session_id is not None:
+            if path.startswith('/web/session/'):
+                # the call opens a new session itself (eg. session_authenticate())
+                with self._session_lock:
+                    if self._session_id == expired_session_id:
+                        self._session_id = None
+                        self.transport.cookies.clear()
+            elif self.auto_reauthenticate and self._credentials:
+                self._reauthenticate(expired_session_id)
+            else:
+                return None
+        return self._node.base_url + path
+
+    def export_session(self):
+        session = OpenERPJSONRPCClient.export_session(self)
+        session['node'] = self.node
+        return session
+
+    def restore_session(self, session):
+        OpenERPJSONRPCClient.restore_session(self, session)
+        with self._node_lock:
+            self._node = self.nodes.node_for_url(session.get('node', '') + '/') or self._node
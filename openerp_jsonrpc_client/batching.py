@@ -0,0 +1,138 @@
+# coding: utf8
+"""
+Batching of read() / name_get() calls (DataLoader pattern).
+
+Each call returns an OpenERPDeferredResult immediately. Calls on the same model with the same
+method, fields and context are accumulated in a batch which is sent as one dataset/call_kw with
+the merged ids list when result() is called on any of them. A full batch (max_batch_size ids) is closed
+and further calls start a new one.
+"""
+import json
+import threading
+import time
+
+
+class OpenERPDeferredResult(object):
+    """
+    Result of a batched call. Like a concurrent.futures.Future, it does not stand for the value:
+    call result() to dispatch the batch (if needed) and get the record dict or the list of records.
+    """
+    def __init__(self, batch, ids):
+        self._batch = batch
+        self._ids = ids
+
+    def done(self):
+        """True when the batch has been sent and its answer (or exception) received"""
+        return self._batch._done.is_set()
+
+    def result(self):
+        """
+        Dispatch the batch if needed and return the result of this call.
+        The batch exception, if any, is raised to every caller.
+        """
+        records_by_id = self._batch.resolve()
+        if isinstance(self._ids, (list, tuple)):
+            return [records_by_id[id] for id in self._ids if id in records_by_id]
+        return records_by_id.get(self._ids, False)
+
+    def __repr__(self):
+        return '<OpenERPDeferredResult %r %s>' % (self._ids, 'done' if self.done() else 'pending')
+
+
+class OpenERPBatch(object):
+    """
+    Ids collected for one (model, method, fields, context) combination.
+    """
+    def __init__(self, dispatch, window):
+        self._dispatch = dispatch  # a callable taking the ids list and returning a {id: value} dict
+        self._window = window
+        self._created_at = time.time()
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._dispatched = False
+        self._result = None
+        self._exception = None
+        self.ids = []
+        self._known_ids = set()
+
+    def add(self, ids):
+        for id in ids:
+            if id not in self._known_ids:
+                self._known_ids.add(id)
+                self.ids.append(id)
+
+    def resolve(self):
+        """Send the batch (once) and return the {id: value} dict"""
+        if not self._done.is_set():
+            remaining = self._window - (time.time() - self._created_at)
+            if remaining > 0:
+                # give other threads a chance to join the batch
+                time.sleep(remaining)
+            with self._lock:
+                dispatch = not self._dispatched
+                self._dispatched = True
+            if dispatch:
+                try:
+                    self._result = self._dispatch(self.ids)
+                except BaseException as exc:
+                    self._exception = exc
+                self._done.set()
+            else:
+                self._done.wait()
+
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
+class OpenERPBatchLoader(object):
+    """
+    Accumulates calls in OpenERPBatch objects keyed by (method, args, kwargs).
+    """
+    def __init__(self, window=0.0, max_batch_size=1000):
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._batches = {}
+
+    def load(self, key, ids, dispatch):
+        """
+        Add ids to the pending batch identified by key.
+
+        :param key: any json serializable value identifying calls which can be merged
+        :param ids: an id or a list of ids
+        :param dispatch: callable receiving the merged ids list, returning a {id: value} dict
+        :return: a deferred result
+        :rtype: OpenERPDeferredResult
+        """
+        batch_key = json.dumps(key, sort_keys=True)
+        with self._lock:
+            batch = self._batches.get(batch_key)
+            if batch is None or batch._dispatched:
+                batch = self._batches[batch_key] = OpenERPBatch(self._make_dispatcher(batch_key, dispatch),
+                                                                self.window)
+            batch.add(ids if isinstance(ids, (list, tuple)) else [ids])
+            if len(batch.ids) >= self.max_batch_size:
+                del self._batches[batch_key]
+        return OpenERPDeferredResult(batch, ids)
+
+    def _make_dispatcher(self, batch_key, dispatch):
+        def dispatcher(ids):
+            with self._lock:
+                # a dispatched batch can't accept new ids anymore
+                batch = self._batches.get(batch_key)
+                if batch is not None and batch.ids is ids:
+                    del self._batches[batch_key]
+            return dispatch(list(ids))
+        return dispatcher
+
+    def flush(self):
+        """Dispatch all pending batches"""
+        with self._lock:
+            batches = list(self._batches.values())
+            self._batches.clear()
+        for batch in batches:
+            try:
+                batch.resolve()
+            except BaseException:
+                pass  # exception will be raised to each caller on access
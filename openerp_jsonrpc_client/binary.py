@@ -0,0 +1,65 @@
+# coding: utf8
+"""
+Helpers to move binary content without holding it in memory.
+
+OpenERPMultipartFileBody is a multipart/form-data request body which reads the uploaded file
+as it is sent, with a known length so that no chunked transfer encoding is needed.
+"""
+import os
+import uuid
+
+
+def _file_size(fileobj):
+    try:
+        return os.fstat(fileobj.fileno()).st_size - fileobj.tell()
+    except (AttributeError, OSError, IOError, ValueError):
+        position = fileobj.tell()
+        fileobj.seek(0, os.SEEK_END)
+        size = fileobj.tell() - position
+        fileobj.seek(position)
+        return size
+
+
+class OpenERPMultipartFileBody(object):
+    """
+    A multipart/form-data body made of form fields followed by one file, read chunk by chunk.
+
+    :param fields: dict of form fields
+    :param file_field: name of the file form field
+    :param filename: file name sent to the server
+    :param fileobj: a file object open in binary mode, read from its current position
+    :param chunk_size: size of the chunks read from fileobj
+    :param progress: callable receiving (file bytes sent, file size) after each chunk
+    """
+    def __init__(self, fields, file_field, filename, fileobj, chunk_size=65536, progress=None,
+                 content_type='application/octet-stream'):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = 'multipart/form-data; boundary=%s' % self.boundary
+        self._fileobj = fileobj
+        self._chunk_size = chunk_size
+        self._progress = progress
+        self.file_size = _file_size(fileobj)
+
+        head = []
+        for name, value in sorted(fields.items()):
+            head.append('--%s\r\nContent-Disposition: form-data; name="%s"\r\n\r\n%s\r\n' % (self.boundary, name, value))
+        head.append('--%s\r\nContent-Disposition: form-data; name="%s"; filename="%s"\r\nContent-Type: %s\r\n\r\n'
+                    % (self.boundary, file_field, filename.replace('"', '_'), content_type))
+        self._head = u''.join(head).encode('utf-8')
+        self._tail = ('\r\n--%s--\r\n' % self.boundary).encode('utf-8')
+
+    def __len__(self):
+        return len(self._head) + self.file_size + len(self._tail)
+
+    def __iter__(self):
+        yield self._head
+        sent = 0
+        while sent < self.file_size:
+            chunk = self._fileobj.read(min(self._chunk_size, self.file_size - sent))
+            if not chunk:
+                raise IOError("File shrank while being uploaded.")
+            sent += len(chunk)
+            yield chunk
+            if self._progress is not None:
+                self._progress(sent, self.file_size)
+        yield self._tail
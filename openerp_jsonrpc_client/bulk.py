@@ -0,0 +1,91 @@
+# coding: utf8
+"""
+Chunking of bulk calls (see OpenERPModelProxy create_many(), write_many() and unlink_many()).
+
+Sending one record per call costs one round trip per record while sending all of them in one
+call hits server timeouts and request size limits. OpenERPAdaptiveChunker splits records in
+chunks whose size is adapted after each call so that calls last about target_duration.
+"""
+import threading
+
+
+class OpenERPAdaptiveChunker(object):
+    """
+    :param chunk_size: size of the first chunk
+    :type chunk_size: int
+    :param target_duration: wanted duration of a call in seconds. None to keep chunk_size.
+    :type target_duration: float
+    :param min_size: minimum chunk size
+    :type min_size: int
+    :param max_size: maximum chunk size
+    :type max_size: int
+    :param max_payload_size: maximum size in bytes of the records of a chunk once encoded. None for no limit.
+    :type max_payload_size: int
+    """
+    # weight of the last call in the per record time and size estimates
+    SMOOTHING = 0.5
+    # a chunk is at most GROWTH times bigger or smaller than the previous one
+    GROWTH = 2.0
+
+    def __init__(self, chunk_size=100, target_duration=2.0, min_size=1, max_size=10000, max_payload_size=None):
+        self.chunk_size = chunk_size
+        self.target_duration = target_duration
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_payload_size = max_payload_size
+        self._lock = threading.Lock()
+        self._time_per_record = None
+        self._bytes_per_record = None
+
+    def chunks(self, records):
+        """
+        :return: a generator of lists of records. The size of each chunk is read when the chunk
+                 is built so it follows the adaptations made by record().
+        """
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _smooth(self, estimate, value):
+        if estimate is None:
+            return value
+        return self.SMOOTHING * value + (1 - self.SMOOTHING) * estimate
+
+    def record(self, size, duration, payload_size=None):
+        """
+        Adapts chunk_size after a successful call (see record_failure() for failed calls).
+
+        :param size: number of records of the chunk
+        :param duration: duration of the call in seconds
+        :param payload_size: size of the encoded records in bytes, if known
+        """
+        with self._lock:
+            wanted_size = self.chunk_size
+            if self.target_duration:
+                self._time_per_record = self._smooth(self._time_per_record, duration / float(size))
+                if self._time_per_record > 0:
+                    wanted_size = self.target_duration / self._time_per_record
+                else:
+                    wanted_size = self.chunk_size * self.GROWTH
+                wanted_size = max(self.chunk_size / self.GROWTH, min(self.chunk_size * self.GROWTH, wanted_size))
+
+            if payload_size is not None and self.max_payload_size:
+                self._bytes_per_record = self._smooth(self._bytes_per_record, payload_size / float(size))
+                wanted_size = min(wanted_size, self.max_payload_size / max(self._bytes_per_record, 1.0))
+
+            self.chunk_size = int(max(self.min_size, min(self.max_size, wanted_size)))
+
+    def record_failure(self, size):
+        """
+        Shrinks chunk_size after a failed call: a call which timed out or was too large may pass
+        with fewer records, and a record the server rejects fails a smaller chunk.
+
+        :param size: number of records of the chunk
+        """
+        with self._lock:
+            self.chunk_size = int(max(self.min_size, min(self.chunk_size, size) / self.GROWTH))
@@ -0,0 +1,168 @@
+# coding: utf8
+"""
+Read-through cache for metadata calls (fields_get, fields_view_get, ir.model.data lookups)
+whose answers don't change unless modules are installed or updated.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+_logger = logging.getLogger('openerp_jsonrpc_client')
+
+# persisted caches still referenced at exit are flushed, without being kept alive until then
+_persisted_caches = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_persisted_caches():
+    for cache in list(_persisted_caches):
+        cache.flush()
+
+
+class OpenERPMetadataCache(object):
+    """
+    LRU + TTL cache of call_kw results keyed by database, model, method, arguments and context.
+
+    :param max_size: maximum number of cached answers. Least recently used are evicted first.
+    :type max_size: int
+    :param ttl: seconds an answer is kept. None to keep it until evicted or invalidated.
+    :type ttl: float
+    :param path: optional json file where the cache is persisted so that it survives restarts.
+                 Changes are written by flush(), close(), at exit and at most every save_interval seconds.
+                 An unreadable file is logged and the cache starts empty.
+    :type path: str
+    :param methods: dict of {model_name or None (any model): tuple of cacheable method names}
+    :type methods: dict
+    :param save_interval: seconds after which a change is written to path by the next change.
+                          None to write changes only on flush(), close() and at exit.
+    :type save_interval: float
+    """
+    DEFAULT_METHODS = {
+        None: ('fields_get', 'fields_view_get'),
+        'ir.model.data': ('get_object_reference',),
+    }
+
+    def __init__(self, max_size=1000, ttl=3600, path=None, methods=None, save_interval=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self.methods = methods or self.DEFAULT_METHODS
+        self.save_interval = save_interval
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()  # one writer at a time, without blocking readers
+        self._entries = OrderedDict()  # key => [expires_at, db, model, value]
+        self._dirty = False  # entries changed since they were written to path
+        self._saved_at = time.time()
+        if path:
+            if os.path.exists(path):
+                self._load()
+            _persisted_caches.add(self)
+
+    def is_cacheable(self, model, method):
+        return method in self.methods.get(None, ()) or method in self.methods.get(model, ())
+
+    @staticmethod
+    def make_key(db, model, method, args, kwargs, context):
+        kwargs = dict((k, v) for (k, v) in kwargs.items() if k != 'context')
+        return json.dumps([db, model, method, args, kwargs, context], sort_keys=True)
+
+    def get_or_call(self, db, model, method, args, kwargs, context, call):
+        """
+        Return the cached answer for this call or invoke call() and cache its result.
+        Answers are deep copied so callers can't alter cached values.
+        """
+        key = self.make_key(db, model, method, args, kwargs, context)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.time()):
+                # LRU: move entry to the end
+                del self._entries[key]
+                self._entries[key] = entry
+                self.hits += 1
+                return copy.deepcopy(entry[3])
+            self.misses += 1
+
+        value = call()
+        self.set(key, db, model, value)
+        return copy.deepcopy(value)
+
+    def set(self, key, db, model, value):
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = [expires_at, db, model, copy.deepcopy(value)]
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._dirty = True
+        if self.save_interval is not None and time.time() - self._saved_at >= self.save_interval:
+            self.flush()
+
+    def invalidate(self, db=None, model=None):
+        """
+        Drop cached answers. With no arguments, the whole cache is cleared.
+
+        :param db: only drop answers for this database
+        :param model: only drop answers for this model
+        """
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if (db is None or entry[1] == db) and (model is None or entry[2] == model):
+                    del self._entries[key]
+                    self._dirty = True
+        # invalidations are written at once so that other processes don't reload stale answers
+        self.flush()
+
+    def clear(self):
+        self.invalidate()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _load(self):
+        try:
+            with open(self.path) as cache_file:
+                entries = json.load(cache_file)
+            now = time.time()
+            for key, entry in entries:
+                if entry[0] is None or entry[0] > now:
+                    self._entries[key] = entry
+        except (IOError, OSError, ValueError, TypeError, IndexError) as exc:
+            # eg. a file truncated by a crash, it is overwritten by next flush
+            _logger.warning("Metadata cache %s can't be loaded, starting empty: %s", self.path, exc)
+            self._entries.clear()
+
+    def flush(self):
+        """Writes the cache to path if it changed since it was last written"""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                entries = json.dumps(list(self._entries.items()))
+                self._dirty = False
+                self._saved_at = time.time()
+            try:
+                # write then rename so that a concurrent reader never sees a partial file
+                tmp_path = '%s.%s.tmp' % (self.path, os.getpid())
+                with open(tmp_path, 'w') as cache_file:
+                    cache_file.write(entries)
+                os.rename(tmp_path, self.path)
+            except BaseException:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+    def close(self):
+        """Writes pending changes to path"""
+        self.flush()
+        _persisted_caches.discard(self)
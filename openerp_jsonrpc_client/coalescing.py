@@ -0,0 +1,93 @@
+# coding: utf8
+"""
+Coalescing of identical in-flight calls.
+
+When several threads sharing a client issue the same read-only call at the same time
+(eg. a dashboard read_group or a name_search), the first one sends the request and the
+others wait for its answer instead of sending their own.
+"""
+import copy
+import json
+import threading
+
+
+class _OpenERPFlight(object):
+    """A call in flight and the callers waiting for it"""
+    __slots__ = ('done', 'waiters', 'result', 'exception')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.exception = None
+
+
+class OpenERPCallCoalescer(object):
+    """
+    Shares one request between identical concurrent calls. The result is deep copied for each
+    waiting caller and an exception is raised in all of them.
+
+    :param methods: dict of {model_name or None (any model): tuple of method names safe to coalesce}.
+                    Only read-only methods belong here.
+    :type methods: dict
+    """
+    DEFAULT_METHODS = {
+        None: ('read', 'search', 'search_read', 'search_count', 'name_get', 'name_search', 'read_group',
+               'fields_get', 'fields_view_get', 'default_get'),
+    }
+
+    def __init__(self, methods=None):
+        self.methods = methods or self.DEFAULT_METHODS
+        self.calls = 0  # requests sent
+        self.coalesced = 0  # calls answered by another caller request
+
+        self._lock = threading.Lock()
+        self._flights = {}  # key => _OpenERPFlight
+
+    def is_coalescable(self, model, method):
+        return method in self.methods.get(None, ()) or method in self.methods.get(model, ())
+
+    @staticmethod
+    def make_key(session_id, model, method, args, kwargs):
+        return json.dumps([session_id, model, method, args, kwargs], sort_keys=True)
+
+    def get_or_call(self, key, call):
+        """
+        Wait for the answer of the identical call in flight, or invoke call() when there is none.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _OpenERPFlight()
+                self.calls += 1
+                leader = True
+            else:
+                flight.waiters += 1
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            flight.done.wait()
+            if flight.exception is not None:
+                raise flight.exception
+            return copy.deepcopy(flight.result)
+
+        try:
+            result = call()
+        except BaseException as exc:
+            flight.exception = exc
+            raise
+        else:
+            flight.result = result
+        finally:
+            # no caller can join the flight once it is removed
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+        # waiters copy flight.result, so the leader gets its own copy when there are some
+        return copy.deepcopy(result) if flight.waiters else result
+
+    @property
+    def stats(self):
+        return {'calls': self.calls, 'coalesced': self.coalesced, 'in_flight': len(self._flights)}
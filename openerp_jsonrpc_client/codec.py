@@ -0,0 +1,98 @@
+# coding: utf8
+"""
+JSON codecs used by OpenERPJSONRPCClient to encode requests and decode responses.
+
+A codec encodes a python object into bytes (the request body) and decodes bytes
+(the response body). get_default_codec() returns the fastest codec available.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+class OpenERPJSONCodec(object):
+    """
+    Standard library json codec. Encoder and decoder instances are built once and reused.
+    """
+    name = 'json'
+
+    def __init__(self):
+        self._encoder = json.JSONEncoder(separators=(',', ':'))
+        self._decoder = json.JSONDecoder()
+
+    def encode(self, obj):
+        """
+        :return: obj JSON representation
+        :rtype: bytes
+        """
+        # ensure_ascii is on so encoding to utf-8 is a plain copy
+        return self._encoder.encode(obj).encode('utf-8')
+
+    def decode(self, data):
+        """
+        :param data: a JSON document
+        :type data: bytes
+        """
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return self._decoder.decode(data)
+
+
+class OpenERPOrjsonCodec(OpenERPJSONCodec):
+    """
+    orjson codec (https://github.com/ijl/orjson). Encodes straight to bytes.
+    """
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("OpenERPOrjsonCodec requires the orjson library.")
+
+    def encode(self, obj):
+        # OpenERP contexts may use non str keys
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def decode(self, data):
+        return orjson.loads(data)
+
+
+class OpenERPUjsonCodec(OpenERPJSONCodec):
+    """
+    ujson codec (https://github.com/ultrajson/ultrajson).
+
+    ujson has no bytes output (dumps() returns a str and dump() writes a str to a file object) so
+    the request body is encoded from the str. As with OpenERPJSONCodec the str is pure ascii, which
+    makes that encoding a plain copy. Requests are byte for byte those of OpenERPJSONCodec, except
+    for float exponents (1e-7 instead of 1e-07) and an unescaped DEL character, which decode alike.
+    """
+    name = 'ujson'
+
+    def __init__(self):
+        if ujson is None:
+            raise ImportError("OpenERPUjsonCodec requires the ujson library.")
+
+    def encode(self, obj):
+        # ujson escapes '/' by default, json does not
+        return ujson.dumps(obj, ensure_ascii=True, escape_forward_slashes=False).encode('utf-8')
+
+    def decode(self, data):
+        return ujson.loads(data)
+
+
+def get_default_codec():
+    """
+    :return: the fastest installed codec. orjson, then ujson, then standard library json.
+    """
+    if orjson is not None:
+        return OpenERPOrjsonCodec()
+    if ujson is not None:
+        return OpenERPUjsonCodec()
+    return OpenERPJSONCodec()
@@ -0,0 +1,283 @@
+# coding: utf8
+"""
+Columnar storage of search_read results.
+
+A list of records dicts repeats the keys and a dict header for every record. OpenERPColumnarResult
+stores one column per field instead: integers, floats, booleans and many2one ids in array buffers,
+strings interned in lists, x2many ids flattened in an array with offsets. Records are accessed
+through OpenERPColumnarRow views and columns can be converted to NumPy arrays.
+"""
+import array
+import sys
+
+try:
+    intern = sys.intern
+except AttributeError:  # Python 2
+    pass
+
+try:
+    import numpy
+except ImportError:  # numpy is an optional dependency
+    numpy = None
+
+# strings longer than this are not interned as they are unlikely to be repeated
+MAX_INTERNED_LENGTH = 100
+
+# typecode of integer arrays: 'l' is only 32 bits on Windows, 'q' (64 bits) is missing in Python 2
+try:
+    array.array('q')
+    INTEGER_TYPECODE = 'q'
+except ValueError:
+    INTEGER_TYPECODE = 'l'
+
+
+class OpenERPColumn(object):
+    """Values of a field kept as returned by the server"""
+    def __init__(self):
+        self.values = []
+
+    def append(self, value):
+        self.values.append(value)
+
+    def __getitem__(self, index):
+        return self.values[index]
+
+    def to_numpy(self):
+        return numpy.array(self.values, dtype=object)
+
+
+class OpenERPStringColumn(OpenERPColumn):
+    """char, text, selection, date and datetime fields. Short strings are interned."""
+    def append(self, value):
+        if isinstance(value, str) and len(value) <= MAX_INTERNED_LENGTH:
+            value = intern(value)
+        self.values.append(value)
+
+
+class OpenERPNumberColumn(OpenERPColumn):
+    """
+    integer, float and boolean fields in an array buffer. False / None values are stored as 0
+    and flagged in a mask. A value the array can't hold turns it into a list.
+    """
+    def __init__(self, typecode, null=False):
+        self.typecode = typecode
+        self.values = array.array(typecode)
+        self.null = null  # value returned for masked entries
+        self.mask = None  # bytearray, 1 for False / None values
+
+    def append(self, value):
+        if value is None or (value is False and self.typecode != 'b'):
+            if self.mask is None:
+                self.mask = bytearray(len(self.values))
+            self.mask.append(1)
+            value = 0
+        elif self.mask is not None:
+            self.mask.append(0)
+        try:
+            self.values.append(value)
+        except OverflowError:
+            self.values = self.values.tolist()
+            self.values.append(value)
+
+    def __getitem__(self, index):
+        if self.mask is not None and self.mask[index]:
+            return self.null
+        value = self.values[index]
+        return bool(value) if self.typecode == 'b' else value
+
+    def to_numpy(self):
+        if isinstance(self.values, list):
+            values = numpy.array(self.values, dtype=object)
+        else:
+            values = numpy.frombuffer(self.values, dtype=self.typecode).copy() if self.values else \
+                numpy.array([], dtype=self.typecode)
+        if self.typecode == 'b':
+            values = values.astype(bool)
+        if self.mask is not None:
+            return numpy.ma.masked_array(values, mask=numpy.frombuffer(bytes(self.mask), dtype=numpy.uint8))
+        return values
+
+
+class OpenERPMany2oneColumn(OpenERPColumn):
+    """many2one fields: ids in an array buffer (0 for False) and interned display names"""
+    def __init__(self):
+        self.ids = array.array(INTEGER_TYPECODE)
+        self.names = []
+
+    def append(self, value):
+        if value:
+            self.ids.append(value[0])
+            name = value[1]
+            self.names.append(intern(name) if isinstance(name, str) and len(name) <= MAX_INTERNED_LENGTH else name)
+        else:
+            self.ids.append(0)
+            self.names.append(False)
+
+    def __getitem__(self, index):
+        id = self.ids[index]
+        return [id, self.names[index]] if id else False
+
+    def to_numpy(self):
+        """:return: the ids array (0 for False)"""
+        return numpy.frombuffer(self.ids, dtype=self.ids.typecode).copy() if self.ids else \
+            numpy.array([], dtype=self.ids.typecode)
+
+
+class OpenERPX2manyColumn(OpenERPColumn):
+    """one2many and many2many fields: all ids in one array buffer, record i ids are ids[offsets[i]:offsets[i+1]]"""
+    def __init__(self):
+        self.ids = array.array(INTEGER_TYPECODE)
+        self.offsets = array.array(INTEGER_TYPECODE, [0])
+
+    def append(self, value):
+        self.ids.extend(value or [])
+        self.offsets.append(len(self.ids))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.offsets) - 1
+        return self.ids[self.offsets[index]:self.offsets[index + 1]].tolist()
+
+    def to_numpy(self):
+        """:return: an object array of ids lists"""
+        values = numpy.empty(len(self.offsets) - 1, dtype=object)
+        for index in range(len(values)):
+            values[index] = self[index]
+        return values
+
+
+def make_column(field_type):
+    """:return: the column storing values of a field of type field_type"""
+    if field_type == 'integer':
+        return OpenERPNumberColumn(INTEGER_TYPECODE, null=False)
+    if field_type == 'float':
+        return OpenERPNumberColumn('d', null=False)
+    if field_type == 'boolean':
+        return OpenERPNumberColumn('b', null=False)
+    if field_type == 'many2one':
+        return OpenERPMany2oneColumn()
+    if field_type in ('one2many', 'many2many'):
+        return OpenERPX2manyColumn()
+    if field_type in ('char', 'text', 'html', 'selection', 'date', 'datetime', 'reference'):
+        return OpenERPStringColumn()
+    return OpenERPColumn()
+
+
+class OpenERPColumnarRow(object):
+    """A view on one record of an OpenERPColumnarResult, behaves like a read-only record dict"""
+    __slots__ = ('_result', '_index')
+
+    def __init__(self, result, index):
+        self._result = result
+        self._index = index
+
+    def __getitem__(self, field):
+        return self._result.columns[field][self._index]
+
+    def __getattr__(self, field):
+        try:
+            return self._result.columns[field][self._index]
+        except KeyError:
+            raise AttributeError(field)
+
+    def get(self, field, default=None):
+        column = self._result.columns.get(field)
+        return default if column is None else column[self._index]
+
+    def keys(self):
+        return list(self._result.columns)
+
+    def __iter__(self):
+        return iter(self._result.columns)
+
+    def __contains__(self, field):
+        return field in self._result.columns
+
+    def to_dict(self):
+        return dict((field, column[self._index]) for field, column in self._result.columns.items())
+
+    def __eq__(self, other):
+        if isinstance(other, OpenERPColumnarRow):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+class OpenERPColumnarResult(object):
+    """
+    Records stored by columns.
+
+    :param field_types: {field name: field type} (as in fields_get()) of the stored fields.
+                        Fields found in records but missing here are stored as returned by the server.
+    :type field_types: dict
+    """
+    def __init__(self, field_types):
+        self.field_types = dict(field_types)
+        self.field_types.setdefault('id', 'integer')
+        self.columns = dict((field, make_column(field_type)) for field, field_type in self.field_types.items())
+        self._length = 0
+
+    def append(self, record):
+        """:param record: a record dict as returned by read() or search_read()"""
+        for field, value in record.items():
+            column = self.columns.get(field)
+            if column is None:
+                # a field we don't know the type of, pad it for previous records
+                column = self.columns[field] = OpenERPColumn()
+                column.values.extend([False] * self._length)
+            column.append(value)
+        self._length += 1
+        if len(record) < len(self.columns):
+            # fields missing from this record
+            for column in self.columns.values():
+                if self._column_length(column) < self._length:
+                    column.append(False)
+
+    @staticmethod
+    def _column_length(column):
+        if isinstance(column, OpenERPX2manyColumn):
+            return len(column.offsets) - 1
+        if isinstance(column, OpenERPMany2oneColumn):
+            return len(column.ids)
+        return len(column.values)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return OpenERPColumnarRow(self, index)
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield OpenERPColumnarRow(self, index)
+
+    def column(self, field):
+        """:return: the values of field as a list"""
+        column = self.columns[field]
+        return [column[index] for index in range(self._length)]
+
+    def to_records(self):
+        """:return: the records as a list of dicts"""
+        return [row.to_dict() for row in self]
+
+    def to_numpy(self):
+        """
+        :return: {field: numpy array}. Numbers are typed arrays (masked arrays when a value is False),
+                 many2one fields arrays of ids, other fields object arrays.
+        """
+        if numpy is None:
+            raise ImportError("OpenERPColumnarResult.to_numpy() requires numpy.")
+        return dict((field, column.to_numpy()) for field, column in self.columns.items())
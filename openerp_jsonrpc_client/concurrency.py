@@ -0,0 +1,164 @@
+# coding: utf8
+"""
+Threading helpers used by OpenERPJSONRPCClient to run calls in the background or concurrently.
+"""
+import threading
+
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
+
+
+class BackgroundCall(object):
+    """
+    Runs func(*args, **kwargs) in a daemon thread. result() waits for the call to
+    complete then returns its result or re-raises its exception.
+    """
+    def __init__(self, func, *args, **kwargs):
+        self._result = None
+        self._exception = None
+        self._thread = threading.Thread(target=self._run, args=(func, args, kwargs))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, func, args, kwargs):
+        try:
+            self._result = func(*args, **kwargs)
+        except BaseException as exc:  # OpenERPJSONRPCClient exceptions derive from BaseException
+            self._exception = exc
+
+    def result(self):
+        self._thread.join()
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
+class WorkerPool(object):
+    """
+    Daemon threads running submitted functions. Threads are started on demand, up to max_workers,
+    reused, and exit after idle_timeout seconds without work.
+    """
+    def __init__(self, max_workers=32, idle_timeout=60.0):
+        self.max_workers = max_workers
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._tasks = queue.Queue()
+        self._workers = 0  # started threads
+        self._idle = 0  # threads waiting for a task which is not queued yet
+
+    def try_submit(self, func, *args):
+        """
+        Runs func(*args) in a worker thread.
+
+        :return: False, without running func, when max_workers threads are busy
+        :rtype: bool
+        """
+        with self._lock:
+            if self._idle:
+                self._idle -= 1
+            elif self._workers < self.max_workers:
+                self._workers += 1
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                thread.start()
+            else:
+                return False
+            self._tasks.put((func, args))
+        return True
+
+    def _work(self):
+        while True:
+            try:
+                func, args = self._tasks.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                with self._lock:
+                    # a task may have been queued for this thread in the meantime
+                    if not self._tasks.empty():
+                        continue
+                    self._idle -= 1
+                    self._workers -= 1
+                    return
+            try:
+                func(*args)
+            except BaseException:
+                pass  # submitted functions report their errors themselves, the thread is kept
+            with self._lock:
+                self._idle += 1
+
+    def __len__(self):
+        """number of started threads"""
+        return self._workers
+
+
+def imap(func, iterable, max_workers=8, ordered=True):
+    """
+    Apply func to each item of iterable using max_workers threads.
+
+    Items are consumed lazily (at most 2 * max_workers items are pending at any time)
+    and results are yielded as soon as they are available.
+
+    :param ordered: when True results are yielded in iterable order, else in completion order
+    :return: a generator of (index, item, result) tuples. If func raises, the exception
+             is raised by the generator.
+    """
+    tasks = queue.Queue()
+    results = queue.Queue()
+
+    def worker():
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            index, item = task
+            try:
+                results.put((index, item, func(item), None))
+            except BaseException as exc:
+                results.put((index, item, None, exc))
+
+    workers = []
+    for _ in range(max_workers):
+        thread = threading.Thread(target=worker)
+        thread.daemon = True
+        thread.start()
+        workers.append(thread)
+
+    items = enumerate(iterable)
+    pending = 0
+    exhausted = False
+    next_index = 0
+    completed = {}
+    try:
+        while True:
+            while not exhausted and pending < 2 * max_workers:
+                try:
+                    tasks.put(next(items))
+                    pending += 1
+                except StopIteration:
+                    exhausted = True
+            if not pending:
+                break
+
+            index, item, result, exc = results.get()
+            pending -= 1
+            if exc is not None:
+                raise exc
+            if not ordered:
+                yield index, item, result
+                continue
+
+            completed[index] = (item, result)
+            while next_index in completed:
+                item, result = completed.pop(next_index)
+                yield next_index, item, result
+                next_index += 1
+    finally:
+        # drop tasks not started yet then stop workers
+        try:
+            while True:
+                tasks.get_nowait()
+        except queue.Empty:
+            pass
+        for _ in workers:
+            tasks.put(None)
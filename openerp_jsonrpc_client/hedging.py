@@ -0,0 +1,183 @@
+# coding: utf8
+"""
+Hedged requests: when an idempotent call has not been answered after a delay, the same request is
+sent again on another pooled connection (so most likely to another server worker) and the first
+answer wins. A few calls stuck on a busy or stalled worker no longer dominate tail latency.
+
+The delay is a percentile of the latencies observed for the same model and method, so only the
+slowest calls are hedged, and a budget caps the extra load put on the server.
+"""
+import collections
+import threading
+import time
+
+from .concurrency import WorkerPool
+
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
+
+
+class OpenERPHedgingPolicy(object):
+    """
+    :param methods: dict of {model_name or None (any model): tuple of idempotent method names to hedge}
+    :type methods: dict
+    :param percentile: calls not answered after this percentile of the observed latencies are hedged
+    :type percentile: float
+    :param initial_delay: hedging delay in seconds until min_samples latencies are observed
+    :type initial_delay: float
+    :param min_delay: minimum hedging delay in seconds
+    :type min_delay: float
+    :param max_delay: maximum hedging delay in seconds
+    :type max_delay: float
+    :param budget: maximum ratio of hedged calls (eg. 0.05 adds at most 5% requests)
+    :type budget: float
+    :param burst: maximum number of hedges sent in a row when budget was not used for a while
+    :type burst: int
+    :param window: number of latencies kept per model and method
+    :type window: int
+    :param min_samples: number of latencies needed to compute the percentile
+    :type min_samples: int
+    :param max_workers: maximum number of threads sending hedgeable requests. When they are all busy,
+                        calls are sent from the caller thread without hedging.
+    :type max_workers: int
+    """
+    DEFAULT_METHODS = {
+        None: ('read', 'search', 'search_read', 'search_count', 'name_get', 'name_search', 'read_group',
+               'fields_get', 'fields_view_get', 'default_get'),
+    }
+
+    def __init__(self, methods=None, percentile=95, initial_delay=0.1, min_delay=0.005, max_delay=2.0, budget=0.05,
+                 burst=10, window=500, min_samples=20, max_workers=32):
+        self.methods = methods or self.DEFAULT_METHODS
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.burst = burst
+        self.window = window
+        self.min_samples = min_samples
+
+        self._pool = WorkerPool(max_workers)
+        self._lock = threading.Lock()
+        self._latencies = {}  # key => deque of the last window latencies
+        self._tokens = 1.0  # hedges which can be sent now, each call earns budget tokens
+        self.calls = 0
+        self.hedged = 0  # calls for which a hedge request was sent
+        self.wins = 0  # calls answered by their hedge request
+        self.denied = 0  # slow calls whose hedge was not sent because the budget was used up
+        self.over_budget = 0  # calls not eligible for a hedge because the budget was used up when they started
+        self.saturated = 0  # calls not hedged because all the worker threads were busy
+
+    def is_hedgeable(self, model, method):
+        return method in self.methods.get(None, ()) or method in self.methods.get(model, ())
+
+    def delay(self, key):
+        """:return: seconds to wait for an answer before hedging a call of key"""
+        latencies = sorted(self._latencies.get(key, ()))
+        if len(latencies) < self.min_samples:
+            delay = self.initial_delay
+        else:
+            delay = latencies[min(len(latencies) - 1, int(len(latencies) * self.percentile / 100.0))]
+        return max(self.min_delay, min(self.max_delay, delay))
+
+    def _record(self, key, latency):
+        with self._lock:
+            latencies = self._latencies.get(key)
+            if latencies is None:
+                latencies = self._latencies[key] = collections.deque(maxlen=self.window)
+            latencies.append(latency)
+
+    def _acquire(self):
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.hedged += 1
+                return True
+            self.denied += 1
+            return False
+
+    def _release(self):
+        # a hedge acquired but not sent
+        with self._lock:
+            self._tokens += 1
+            self.hedged -= 1
+            self.saturated += 1
+
+    def _send(self, key, send):
+        # sends from the caller thread, without hedging
+        start = time.time()
+        result = send()
+        self._record(key, time.time() - start)
+        return result
+
+    def call(self, key, send):
+        """
+        Invoke send() and, when it has not returned after delay(key), invoke it again in parallel.
+
+        The first answer wins; the other request is not interrupted (the server would process it
+        anyway) but its answer is ignored. When the first answer is an exception, the other request
+        answer is waited for.
+
+        Requests are sent by the threads of a bounded pool so that the caller can return the first
+        answer. When no hedge can be sent (budget used up or all threads busy), send() is invoked
+        from the caller thread.
+
+        :param key: key of the latencies used to compute the delay (eg. 'res.partner.read')
+        :param send: callable sending the request and returning its result
+        :return: result of send()
+        """
+        with self._lock:
+            self.calls += 1
+            self._tokens = min(self.burst, self._tokens + self.budget)
+            hedgeable = self._tokens >= 1
+            if not hedgeable:
+                self.over_budget += 1
+
+        if not hedgeable:
+            return self._send(key, send)
+
+        answers = queue.Queue()
+
+        def run(hedge):
+            start = time.time()
+            try:
+                answer = (send(), None)
+            except BaseException as exc:  # OpenERPJSONRPCClient exceptions derive from BaseException
+                answer = (None, exc)
+            if not hedge and answer[1] is None:
+                # latencies of first requests only, so that hedging doesn't hide slow calls
+                self._record(key, time.time() - start)
+            answers.put((hedge, answer))
+
+        if not self._pool.try_submit(run, False):
+            with self._lock:
+                self.saturated += 1
+            return self._send(key, send)
+        try:
+            hedge, (result, exception) = answers.get(timeout=self.delay(key))
+        except queue.Empty:
+            if not self._acquire():
+                hedge, (result, exception) = answers.get()
+            elif not self._pool.try_submit(run, True):
+                self._release()
+                hedge, (result, exception) = answers.get()
+            else:
+                hedge, (result, exception) = answers.get()
+                if exception is not None:
+                    hedge, (result, exception) = answers.get()
+                if hedge and exception is None:
+                    with self._lock:
+                        self.wins += 1
+
+        if exception is not None:
+            raise exception
+        return result
+
+    @property
+    def stats(self):
+        return {'calls': self.calls, 'hedged': self.hedged, 'wins': self.wins, 'denied': self.denied,
+                'over_budget': self.over_budget, 'saturated': self.saturated,
+                'hedge_rate': float(self.hedged) / self.calls if self.calls else 0.0}
@@ -0,0 +1,193 @@
+# coding: utf8
+"""
+Per call instrumentation of OpenERPJSONRPCClient.
+
+Hooks registered with OpenERPJSONRPCClient.add_hook() are called before and after each
+JSON-RPC call with an OpenERPCallInfo describing it. OpenERPMetricsCollector is a hook
+aggregating counters and latency histograms per service/model/method.
+"""
+import json
+import logging
+import threading
+import time
+
+_logger = logging.getLogger('openerp_jsonrpc_client')
+
+
+class OpenERPCallInfo(object):
+    """
+    Description of one JSON-RPC call. Sizes are in bytes, times in seconds.
+    """
+    __slots__ = ('url', 'service', 'method', 'model', 'model_method', 'rid',
+                 'request_size', 'response_size', 'encode_time', 'network_time', 'decode_time',
+                 'error', 'exception', '_phase', '_mark')
+
+    def __init__(self, url, post_data):
+        self.url = url
+        # url is <base_url>/web/<service>/<method>
+        self.service, _, self.method = url.split('/web/', 1)[-1].rpartition('/')
+        params = post_data.get('params')
+        if not isinstance(params, dict):
+            params = {}
+        self.model = params.get('model')
+        self.model_method = params.get('method') if self.method == 'call_kw' else None
+        self.rid = post_data.get('id')
+        self.request_size = 0
+        self.response_size = 0
+        self.encode_time = 0.0
+        self.network_time = 0.0
+        self.decode_time = 0.0
+        self.error = None  # the JSON-RPC error object returned by the server
+        self.exception = None  # exception raised while calling (eg. a ConnectionError)
+        self._phase = None
+        self._mark = None
+
+    def lap(self, phase=None):
+        """
+        Adds the time elapsed since previous lap() to the current phase then starts phase.
+
+        :param phase: 'encode', 'network', 'decode' or None to stop timing
+        :type phase: str
+        """
+        now = time.time()
+        if self._phase is not None:
+            attribute = self._phase + '_time'
+            setattr(self, attribute, getattr(self, attribute) + now - self._mark)
+        self._phase = phase
+        self._mark = now
+
+    @property
+    def total_time(self):
+        return self.encode_time + self.network_time + self.decode_time
+
+    @property
+    def key(self):
+        """'service/method' or 'model.method' for call_kw calls"""
+        if self.model_method:
+            return '%s.%s' % (self.model, self.model_method)
+        return '%s/%s' % (self.service, self.method)
+
+    @property
+    def failed(self):
+        return self.error is not None or self.exception is not None
+
+    def __repr__(self):
+        return "<OpenERPCallInfo %s rid=%s %.1fms (encode=%.1f network=%.1f decode=%.1f) %s/%s bytes>" % (
+            self.key, self.rid, self.total_time * 1000, self.encode_time * 1000, self.network_time * 1000,
+            self.decode_time * 1000, self.request_size, self.response_size)
+
+
+class OpenERPCallHook(object):
+    """
+    Base class of hooks. Hooks must be thread safe when the client is shared between threads.
+    """
+    def before_call(self, call_info):
+        pass
+
+    def after_call(self, call_info):
+        pass
+
+
+class OpenERPMetricsCollector(OpenERPCallHook):
+    """
+    Aggregates calls counters, sizes and latency histograms per call key ('service/method'
+    or 'model.method' for call_kw calls).
+
+    :param slow_call_threshold: calls longer than this number of seconds are logged
+                                as warnings on the 'openerp_jsonrpc_client' logger. None to disable.
+    :type slow_call_threshold: float
+    :param buckets: latency histogram buckets upper bounds in seconds
+    :type buckets: tuple
+    """
+    DEFAULT_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0)
+
+    def __init__(self, slow_call_threshold=None, buckets=DEFAULT_BUCKETS):
+        self.slow_call_threshold = slow_call_threshold
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _new_metrics(self):
+        return {
+            'calls': 0,
+            'errors': 0,
+            'request_bytes': 0,
+            'response_bytes': 0,
+            'encode_time': 0.0,
+            'network_time': 0.0,
+            'decode_time': 0.0,
+            'total_time': 0.0,
+            'max_time': 0.0,
+            'histogram': [0] * (len(self.buckets) + 1),  # last one counts calls above last bucket
+        }
+
+    def after_call(self, call_info):
+        total_time = call_info.total_time
+        bucket = len(self.buckets)
+        for index, upper_bound in enumerate(self.buckets):
+            if total_time <= upper_bound:
+                bucket = index
+                break
+
+        with self._lock:
+            metrics = self._metrics.get(call_info.key)
+            if metrics is None:
+                metrics = self._metrics[call_info.key] = self._new_metrics()
+            metrics['calls'] += 1
+            metrics['errors'] += call_info.failed
+            metrics['request_bytes'] += call_info.request_size
+            metrics['response_bytes'] += call_info.response_size
+            metrics['encode_time'] += call_info.encode_time
+            metrics['network_time'] += call_info.network_time
+            metrics['decode_time'] += call_info.decode_time
+            metrics['total_time'] += total_time
+            metrics['max_time'] = max(metrics['max_time'], total_time)
+            metrics['histogram'][bucket] += 1
+
+        if self.slow_call_threshold is not None and total_time > self.slow_call_threshold:
+            _logger.warning("Slow call: %r", call_info)
+
+    def _percentile(self, histogram, calls, percent):
+        """upper bound of the bucket holding the percentile (None when above last bucket)"""
+        threshold = calls * percent / 100.0
+        count = 0
+        for index, bucket_count in enumerate(histogram[:-1]):
+            count += bucket_count
+            if count >= threshold:
+                return self.buckets[index]
+        return None
+
+    def snapshot(self):
+        """
+        :return: a json serializable dict of {call key: metrics}. Metrics include calls, errors,
+                 sizes, times (total and split in encode/network/decode), mean/p50/p99 estimates and
+                 the latency histogram as a list of [bucket upper bound, count].
+        :rtype: dict
+        """
+        with self._lock:
+            metrics_by_key = dict((key, dict(metrics, histogram=list(metrics['histogram'])))
+                                  for (key, metrics) in self._metrics.items())
+
+        for metrics in metrics_by_key.values():
+            histogram = metrics['histogram']
+            metrics['mean_time'] = metrics['total_time'] / metrics['calls']
+            metrics['p50'] = self._percentile(histogram, metrics['calls'], 50)
+            metrics['p99'] = self._percentile(histogram, metrics['calls'], 99)
+            metrics['histogram'] = [[bound, count] for (bound, count) in zip(self.buckets + (None,), histogram)]
+        return metrics_by_key
+
+    def export_json(self, fileobj):
+        """Write snapshot() to fileobj as JSON"""
+        json.dump(self.snapshot(), fileobj, indent=2, sort_keys=True)
+
+    def hot_calls(self, limit=10):
+        """
+        :return: (call key, metrics) of the calls which consumed the most time
+        :rtype: list
+        """
+        snapshot = self.snapshot()
+        return sorted(snapshot.items(), key=lambda item: item[1]['total_time'], reverse=True)[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
@@ -0,0 +1,205 @@
+# coding: utf8
+"""
+A pool of authenticated OpenERPJSONRPCClient shared by short lived jobs.
+
+Opening a client costs a get_session_info() round trip and a session_authenticate() which is
+heavy on the server side. OpenERPSessionPool keeps authenticated clients per (base_url, db, login)
+and hands them out:
+
+    >>> pool = OpenERPSessionPool(max_size=8, idle_timeout=600)
+    >>> with pool.session('http://localhost:8069', 'db', 'admin', 'admin') as server:
+    ...     server.get_model('res.partner').search([])
+"""
+import collections
+import contextlib
+import hashlib
+import threading
+import time
+
+from openerp_jsonrpc_client import OpenERPJSONRPCClient, OpenERPJSONRPCClientAuthenticationError, \
+    OpenERPJSONRPCClientException
+
+
+class OpenERPSessionPoolExhaustedError(BaseException):
+    pass
+
+
+class OpenERPSessionPoolClosedError(BaseException):
+    pass
+
+
+class OpenERPSessionPool(object):
+    """
+    Clients are created with client_factory(base_url, **client_kwargs) and authenticated on first
+    checkout. They re-authenticate transparently when their server session expires (see
+    OpenERPJSONRPCClient auto_reauthenticate).
+
+    :param max_size: maximum number of clients per (base_url, db, login): each user of each database
+                     gets its own max_size clients
+    :type max_size: int
+    :param max_total: maximum number of clients of all keys. When reached, the least recently used idle
+                      client of another key is closed to make room. None for no global limit.
+    :type max_total: int
+    :param idle_timeout: seconds after which an idle client is closed. None to keep them forever.
+    :type idle_timeout: float
+    :param client_factory: callable returning a new OpenERPJSONRPCClient
+    :param client_kwargs: passed to client_factory (eg. pool_maxsize, codec, metadata_cache)
+    """
+    def __init__(self, max_size=10, idle_timeout=600.0, client_factory=OpenERPJSONRPCClient, max_total=None,
+                 **client_kwargs):
+        self.max_size = max_size
+        self.max_total = max_total
+        self.idle_timeout = idle_timeout
+        self.client_factory = client_factory
+        self.client_kwargs = client_kwargs
+        self._condition = threading.Condition()
+        self._idle = {}  # key => deque of (client, checked in at), most recently used on the right
+        self._sizes = {}  # key => number of clients, idle or checked out
+        self._checked_out = {}  # id(client) => key
+        self._closed = False
+        self.stats = {'created': 0, 'reused': 0, 'evicted': 0}
+
+    @staticmethod
+    def _key(base_url, db, login, password):
+        # password is part of the key so that a client is never handed out with a wrong password
+        return base_url, db, login, hashlib.sha1(password.encode('utf-8')).hexdigest()
+
+    def checkout(self, base_url, db, login, password, timeout=None):
+        """
+        :param timeout: seconds to wait for a client when max_size clients are checked out.
+                        None to wait forever.
+        :type timeout: float
+        :return: an authenticated client which must be given back with checkin()
+        :rtype: OpenERPJSONRPCClient
+        :raise OpenERPSessionPoolClosedError: when the pool is closed, before or while waiting
+        """
+        key = self._key(base_url, db, login, password)
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise OpenERPSessionPoolClosedError("Session pool is closed.")
+                self._evict_idle()
+                idle = self._idle.get(key)
+                if idle:
+                    client, _ = idle.pop()
+                    self._checked_out[id(client)] = key
+                    self.stats['reused'] += 1
+                    return client
+                if self._sizes.get(key, 0) < self.max_size and (
+                        self.max_total is None or sum(self._sizes.values()) < self.max_total or
+                        self._evict_least_recently_used()):
+                    self._sizes[key] = self._sizes.get(key, 0) + 1  # reserve a slot
+                    break
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise OpenERPSessionPoolExhaustedError("No client available for %s on %s." % (login, db))
+                self._condition.wait(remaining)
+
+        # connect outside of the lock
+        try:
+            client = self.client_factory(base_url, **self.client_kwargs)
+            if not client.session_authenticate(db, login, password).get('uid'):
+                client.close()
+                raise OpenERPJSONRPCClientAuthenticationError("Authentication of %s on %s failed." % (login, db))
+        except BaseException:
+            with self._condition:
+                self._sizes[key] -= 1
+                # waiters may be waiting for another key
+                self._condition.notify_all()
+            raise
+
+        with self._condition:
+            self._checked_out[id(client)] = key
+            self.stats['created'] += 1
+        return client
+
+    def checkin(self, client, discard=False):
+        """
+        Gives back a client obtained from checkout().
+
+        :param discard: close the client instead of reusing it (eg. after an unexpected error)
+        :type discard: bool
+        """
+        with self._condition:
+            key = self._checked_out.pop(id(client))
+            discard = discard or self._closed
+            if discard:
+                self._sizes[key] -= 1
+            else:
+                self._idle.setdefault(key, collections.deque()).append((client, time.time()))
+            self._condition.notify_all()
+        if discard:
+            client.close()
+
+    @contextlib.contextmanager
+    def session(self, base_url, db, login, password, timeout=None):
+        """
+        Context manager version of checkout() / checkin(). The client is discarded when the
+        block raises something else than a server error.
+        """
+        client = self.checkout(base_url, db, login, password, timeout=timeout)
+        discard = False
+        try:
+            yield client
+        except OpenERPJSONRPCClientException:
+            raise  # the session is still usable
+        except BaseException:
+            discard = True
+            raise
+        finally:
+            self.checkin(client, discard=discard)
+
+    def _evict_idle(self):
+        # called with the lock held
+        if self.idle_timeout is None:
+            return
+        expired_before = time.time() - self.idle_timeout
+        for key, idle in self._idle.items():
+            # least recently used clients are on the left
+            while idle and idle[0][1] <= expired_before:
+                client, _ = idle.popleft()
+                self._sizes[key] -= 1
+                self.stats['evicted'] += 1
+                client.close()
+
+    def _evict_least_recently_used(self):
+        # called with the lock held, returns False when no client is idle
+        candidates = [(idle[0][1], key) for key, idle in self._idle.items() if idle]
+        if not candidates:
+            return False
+        _, key = min(candidates)
+        client, _ = self._idle[key].popleft()
+        self._sizes[key] -= 1
+        self.stats['evicted'] += 1
+        client.close()
+        return True
+
+    def evict_idle(self):
+        """Close the clients idle for more than idle_timeout"""
+        with self._condition:
+            self._evict_idle()
+            self._condition.notify_all()
+
+    def __len__(self):
+        """number of clients, idle or checked out"""
+        with self._condition:
+            return sum(self._sizes.values())
+
+    def close(self):
+        """
+        Close idle clients. Checked out clients are closed when checked in.
+        Further checkouts raise OpenERPSessionPoolClosedError.
+        """
+        with self._condition:
+            self._closed = True
+            for idle in self._idle.values():
+                while idle:
+                    client, _ = idle.popleft()
+                    client.close()
+            self._idle.clear()
+            self._sizes = dict((key, 0) for key in self._sizes)
+            for key in self._checked_out.values():
+                self._sizes[key] += 1
+            # waiters raise OpenERPSessionPoolClosedError
+            self._condition.notify_all()
@@ -0,0 +1,133 @@
+# coding: utf8
+"""
+Persistent cache of records (see OpenERPCachedModelProxy).
+
+Records read from the server are kept in a SQLite database with their version: write_date
+(or create_date for records never written). A later read only asks the server for the versions
+of the wanted records, which is cheap, and reads in full the records whose version changed.
+
+OpenERP 7 sets write_date to the start time of the writing transaction (PostgreSQL now()) and
+reads it back with its microseconds, so every committed write() gives the record a new version,
+however close the writes. Changes made without write() are not seen: SQL updates and non stored
+function fields computed from other records.
+"""
+import json
+import sqlite3
+import threading
+
+# fields read to know whether a cached record is up to date
+VERSION_FIELDS = ['write_date', 'create_date']
+
+
+def record_version(values):
+    """:return: version of a record read with VERSION_FIELDS, None when it can't be known"""
+    if not (values.get('write_date') or values.get('create_date')):
+        return None
+    return '%s|%s' % (values.get('write_date') or '', values.get('create_date') or '')
+
+
+class OpenERPRecordCache(object):
+    """
+    Records values keyed by database, user, model, id, fields and context, with their version.
+    The user is part of the key as record rules and field access rights depend on it.
+
+    :param path: SQLite database file. ':memory:' for a cache lost when the process exits.
+    :type path: str
+    """
+    # ids per SQL query, under SQLite host parameters limit
+    CHUNK_SIZE = 500
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        columns = [row[1] for row in self._db.execute('PRAGMA table_info(records)')]
+        if columns and 'uid' not in columns:
+            # cache written by a version which did not key records by user
+            self._db.execute('DROP TABLE records')
+        self._db.execute('CREATE TABLE IF NOT EXISTS records ('
+                         'db TEXT, uid INTEGER, model TEXT, id INTEGER, fields TEXT, context TEXT, version TEXT, '
+                         'data TEXT, PRIMARY KEY (db, uid, model, id, fields, context))')
+        self._db.commit()
+
+    @staticmethod
+    def _fields_key(fields):
+        return ','.join(sorted(fields)) if fields else '*'
+
+    @staticmethod
+    def _context_key(context):
+        return json.dumps(context or {}, sort_keys=True)
+
+    def get(self, db, uid, model, fields, context, versions):
+        """
+        :param uid: id of the user reading the records
+        :param versions: {id: current version} of the wanted records
+        :return: {id: values} of the cached records whose version is current
+        :rtype: dict
+        """
+        ids = list(versions)
+        key = (db, uid, model, self._fields_key(fields), self._context_key(context))
+        records = {}
+        with self._lock:
+            for start in range(0, len(ids), self.CHUNK_SIZE):
+                chunk = ids[start:start + self.CHUNK_SIZE]
+                rows = self._db.execute('SELECT id, version, data FROM records '
+                                        'WHERE db = ? AND uid = ? AND model = ? AND fields = ? AND context = ? '
+                                        'AND id IN (%s)' % ','.join('?' * len(chunk)), key + tuple(chunk))
+                for id, version, data in rows:
+                    if version is not None and version == versions[id]:
+                        records[id] = json.loads(data)
+            self.hits += len(records)
+            self.misses += len(ids) - len(records)
+        return records
+
+    def set(self, db, uid, model, fields, context, records, versions):
+        """
+        Stores records read with fields.
+
+        :param records: list of values dicts as returned by read()
+        :param versions: {id: version} of the records
+        """
+        key = (db, uid, model, self._fields_key(fields), self._context_key(context))
+        rows = [key[:3] + (values['id'],) + key[3:] + (versions.get(values['id']), json.dumps(values))
+                for values in records if versions.get(values['id']) is not None]
+        with self._lock:
+            self._db.executemany('INSERT OR REPLACE INTO records (db, uid, model, id, fields, context, version, '
+                                 'data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            self._db.commit()
+
+    def invalidate(self, db=None, model=None, ids=None):
+        """
+        Drop cached records of all users. With no arguments, the whole cache is cleared.
+        """
+        conditions, params = [], []
+        if db is not None:
+            conditions.append('db = ?')
+            params.append(db)
+        if model is not None:
+            conditions.append('model = ?')
+            params.append(model)
+        with self._lock:
+            if ids is None:
+                self._db.execute('DELETE FROM records' + (' WHERE ' + ' AND '.join(conditions) if conditions else ''),
+                                 params)
+            else:
+                ids = list(ids)
+                for start in range(0, len(ids), self.CHUNK_SIZE):
+                    chunk = ids[start:start + self.CHUNK_SIZE]
+                    self._db.execute('DELETE FROM records WHERE %s' % ' AND '.join(
+                        conditions + ['id IN (%s)' % ','.join('?' * len(chunk))]), params + chunk)
+            self._db.commit()
+
+    def clear(self):
+        self.invalidate()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
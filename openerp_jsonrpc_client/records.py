@@ -0,0 +1,278 @@
+# coding: utf8
+"""
+A lightweight record layer over dataset call_kw.
+
+Records are browsed lazily from an OpenERPRecordEnvironment which holds fields metadata
+(fields_get) and loaded values. Accessing a field of one record reads it for all the records
+browsed together (up to PREFETCH_MAX) in one read() call; relational fields return recordsets
+prefetched together as well, so that traversing a relation costs one call per level instead of
+one call per record:
+
+    >>> partners = server.get_model('res.partner').search_records([('customer', '=', True)])
+    >>> for partner in partners:
+    ...     print partner.name, partner.parent_id.name, partner.category_id.mapped('name')
+"""
+import threading
+
+# field types read together on first access to any of them
+PREFETCH_TYPES = ('char', 'text', 'html', 'integer', 'float', 'boolean', 'selection', 'date', 'datetime',
+                  'many2one', 'reference')
+RELATIONAL_TYPES = ('many2one', 'one2many', 'many2many')
+
+
+class OpenERPRecordEnvironment(object):
+    """
+    Fields metadata and values cache shared by the recordsets browsed through it.
+
+    :param client: an authenticated OpenERPJSONRPCClient
+    :param context: context of read() calls. Client user_context by default.
+    :type context: dict
+    """
+    PREFETCH_MAX = 1000
+
+    def __init__(self, client, context=None):
+        self.client = client
+        self._context = context
+        self._lock = threading.RLock()
+        self._fields = {}  # model => fields_get() result
+        self._cache = {}  # model => {id: {field: value as returned by read()}}
+        # model => {(field, id(prefetch ids)): (prefetch ids, related ids)}, dropped when values of model change
+        self._related_ids = {}
+        self.stats = {'reads': 0}
+
+    @property
+    def context(self):
+        return self._context if self._context is not None else (self.client.user_context or {})
+
+    def fields(self, model):
+        """:return: fields_get() of model"""
+        fields = self._fields.get(model)
+        if fields is None:
+            fields = self._fields[model] = self.client.dataset_call_kw(model, 'fields_get', context=self.context)
+        return fields
+
+    def browse(self, model, ids, prefetch_ids=None):
+        """
+        :param ids: an id or a list of ids
+        :param prefetch_ids: ids whose fields are read together with ids. ids by default.
+        :rtype: OpenERPRecordSet
+        """
+        if not isinstance(ids, (list, tuple)):
+            ids = [ids] if ids else []
+        return OpenERPRecordSet(self, model, ids, prefetch_ids)
+
+    def search(self, model, domain=None, offset=0, limit=None, order=None):
+        """:rtype: OpenERPRecordSet"""
+        kwargs = {'offset': offset, 'limit': limit, 'order': order, 'context': self.context}
+        ids = self.client.dataset_call_kw(model, 'search', domain or [], **kwargs)
+        return self.browse(model, ids)
+
+    def invalidate(self, model=None, ids=None):
+        """Forget loaded values of ids of model, of all records of model or of all models"""
+        with self._lock:
+            if model is None:
+                self._cache.clear()
+                self._related_ids.clear()
+                return
+            self._related_ids.pop(model, None)
+            if ids is None:
+                self._cache.pop(model, None)
+            else:
+                records = self._cache.get(model, {})
+                for id in ids:
+                    records.pop(id, None)
+
+    def get(self, model, id, field, prefetch_ids):
+        """
+        :return: value of field of record id as returned by read(), reading it first
+                 for the records of prefetch_ids which miss it
+        """
+        records = self._cache.setdefault(model, {})
+        values = records.get(id)
+        if values is None or field not in values:
+            self._load(model, id, field, prefetch_ids)
+            values = records[id]
+        return values[field]
+
+    def cached_values(self, model, ids, field):
+        """:return: values of field already loaded for ids"""
+        records = self._cache.get(model, {})
+        return [records[id][field] for id in ids if id in records and field in records[id]]
+
+    def related_ids(self, model, field, prefetch_ids):
+        """
+        :return: ids of the records related through field to the loaded records of prefetch_ids.
+                 Computed once per prefetch group and field until values of model change.
+        """
+        memo = self._related_ids.setdefault(model, {})
+        key = (field, id(prefetch_ids))
+        entry = memo.get(key)
+        if entry is None or entry[0] is not prefetch_ids:  # id() of a garbage collected list may be reused
+            many2one = self.fields(model)[field]['type'] == 'many2one'
+            related_ids = []
+            for value in self.cached_values(model, prefetch_ids, field):
+                if many2one:
+                    if value:
+                        related_ids.append(value[0])
+                else:
+                    related_ids.extend(value)
+            entry = memo[key] = (prefetch_ids, list(_unique(related_ids)))
+        return entry[1]
+
+    def _load(self, model, id, field, prefetch_ids):
+        fields = self.fields(model)
+        if field not in fields:
+            raise AttributeError("%s has no field %s" % (model, field))
+        if fields[field]['type'] in PREFETCH_TYPES:
+            field_names = [name for name, description in fields.items() if description['type'] in PREFETCH_TYPES]
+        else:
+            field_names = [field]
+
+        records = self._cache.setdefault(model, {})
+        ids = [id]
+        for other_id in prefetch_ids:
+            if len(ids) >= self.PREFETCH_MAX:
+                break
+            if other_id != id and field not in records.get(other_id, ()):
+                ids.append(other_id)
+
+        values_list = self.client.dataset_call_kw(model, 'read', ids, field_names, context=self.context)
+        with self._lock:
+            self.stats['reads'] += 1
+            self._related_ids.pop(model, None)
+            for values in values_list:
+                records.setdefault(values['id'], {}).update(values)
+            for missing_id in set(ids) - set(values['id'] for values in values_list):
+                # deleted or not readable record
+                records.setdefault(missing_id, {}).update((name, False) for name in field_names)
+
+
+class OpenERPRecordSet(object):
+    """
+    An ordered set of records of a model.
+
+    Fields are read on singletons (a recordset of one record) as attributes:
+    many2one fields return a recordset of zero or one record, one2many and many2many fields
+    a recordset, other fields their value. Any other attribute is a method of the model called
+    with the recordset ids as first argument (eg. partners.write({'active': False})).
+    """
+    __slots__ = ('_env', '_model', '_ids', '_prefetch_ids')
+
+    def __init__(self, env, model, ids, prefetch_ids=None):
+        self._env = env
+        self._model = model
+        self._ids = list(ids)
+        self._prefetch_ids = self._ids if prefetch_ids is None else prefetch_ids
+
+    @property
+    def ids(self):
+        return list(self._ids)
+
+    @property
+    def id(self):
+        return self._ids[0] if self._ids else False
+
+    @property
+    def model_name(self):
+        return self._model
+
+    @property
+    def env(self):
+        return self._env
+
+    def ensure_one(self):
+        if len(self._ids) != 1:
+            raise ValueError("Expected singleton: %r" % self)
+        return self
+
+    def __iter__(self):
+        for id in self._ids:
+            yield OpenERPRecordSet(self._env, self._model, [id], self._prefetch_ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __bool__(self):
+        return bool(self._ids)
+    __nonzero__ = __bool__
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return OpenERPRecordSet(self._env, self._model, self._ids[index], self._prefetch_ids)
+        return OpenERPRecordSet(self._env, self._model, [self._ids[index]], self._prefetch_ids)
+
+    def __eq__(self, other):
+        return isinstance(other, OpenERPRecordSet) and (self._model, self._ids) == (other._model, other._ids)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((self._model, tuple(self._ids)))
+
+    def __repr__(self):
+        return "%s(%s)" % (self._model, ', '.join(str(id) for id in self._ids))
+
+    def _convert(self, field, value):
+        description = self._env.fields(self._model)[field]
+        field_type = description['type']
+        if field_type not in RELATIONAL_TYPES:
+            return value
+
+        # records related to the prefetched records are prefetched together
+        related_ids = self._env.related_ids(self._model, field, self._prefetch_ids)
+        if field_type == 'many2one':
+            ids = [value[0]] if value else []
+        else:
+            ids = value or []
+        return OpenERPRecordSet(self._env, description['relation'], ids, related_ids)
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if name in self._env.fields(self._model):
+            self.ensure_one()
+            return self._convert(name, self._env.get(self._model, self._ids[0], name, self._prefetch_ids))
+
+        def method(*args, **kwargs):
+            kwargs.setdefault('context', self._env.context)
+            result = self._env.client.dataset_call_kw(self._model, name, self._ids, *args, **kwargs)
+            if name in ('write', 'unlink'):
+                self._env.invalidate(self._model, self._ids)
+            return result
+        return method
+
+    def mapped(self, path):
+        """
+        :param path: a field name or a dotted path of fields (eg. 'parent_id.name')
+        :return: a recordset for relational fields (union of the records), else the list of values
+        """
+        records = self
+        for field in path.split('.'):
+            description = self._env.fields(records._model)[field]
+            values = [getattr(record, field) for record in records]
+            if description['type'] in RELATIONAL_TYPES:
+                ids = _unique(id for value in values for id in value._ids)
+                records = OpenERPRecordSet(self._env, description['relation'], ids)
+            else:
+                return values
+        return records
+
+    def filtered(self, func):
+        """:return: the records for which func(record) is true"""
+        return OpenERPRecordSet(self._env, self._model, [record.id for record in self if func(record)],
+                                self._prefetch_ids)
+
+    def read(self, fields):
+        """:return: list of dicts of fields values (relational fields as returned by read())"""
+        return [dict([('id', record.id)] + [(field, self._env.get(self._model, record.id, field, self._prefetch_ids))
+                                            for field in fields])
+                for record in self]
+
+
+def _unique(values):
+    seen = set()
+    for value in values:
+        if value not in seen:
+            seen.add(value)
+            yield value
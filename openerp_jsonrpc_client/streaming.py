@@ -0,0 +1,237 @@
+# coding: utf8
+"""
+Incremental decoding of large JSON-RPC responses.
+
+OpenERPJSONArrayStreamParser is fed with the response body chunk by chunk and returns each
+item of one array of the document (eg. result.records of a search_read response) as soon as
+it is complete, so that records can be processed while the response is still downloading and
+the whole response is never held in memory.
+"""
+import codecs
+import json
+import re
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+_STRUCTURAL = re.compile(r'[\[\]{}",:]')
+# inside the streamed array we only need to find items boundaries: a token is either
+# a complete string, a structural char or an unterminated string (lone quote)
+_ITEM_TOKENS = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{},]|"')
+_OBJECT_END = re.compile(r'\}\s*([,\]])')
+_WHITESPACE = re.compile(r'\s*')
+
+
+class OpenERPJSONArrayStreamParser(object):
+    """
+    Streams the items of one array of a JSON document.
+
+    :param path: keys leading to the array to stream, eg. ('result', 'records')
+    :type path: tuple
+    :param decode: function used to decode each array item (a JSON text)
+    """
+    MAX_DECODE_ATTEMPTS = 8
+
+    def __init__(self, path, decode):
+        self.path = tuple(path)
+        self._decode = decode
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+
+        self._buffer = u''
+        self._pos = 0  # next position to scan in _buffer
+        self._skeleton = []  # document text without the streamed array items
+        self._skeleton_mark = 0  # position in _buffer up to which text has been stored in _skeleton
+
+        self._frames = []  # stack of [container char, current key, expecting a key]
+        self._in_string = False
+        self._string_start = None
+        self._string_is_key = False
+
+        self._target_depth = None  # len(_frames) when inside streamed array
+        self._item_start = None
+        self._item_depth = 0
+        self._tokenizing = False  # True when current item is scanned token by token
+        self._attempts = 0  # failed decode attempts for current item
+        self.found = False  # True when the array has been found
+
+    def feed(self, data):
+        """
+        :param data: a chunk of the JSON document
+        :type data: bytes
+        :return: list of the items completed by this chunk
+        """
+        self._buffer += self._text_decoder.decode(data)
+        items = self._scan()
+        self._compact()
+        return items
+
+    def close(self):
+        """
+        :return: the document decoded without the streamed array items
+                 (eg. {'jsonrpc': '2.0', 'result': {'length': 5000, 'records': []}})
+        """
+        self._buffer += self._text_decoder.decode(b'', True)
+        self._skeleton.append(self._buffer[self._skeleton_mark:])
+        return json.loads(u''.join(self._skeleton))
+
+    def _scan(self):
+        items = []
+        buf = self._buffer
+        pos = self._pos
+        while True:
+            if self._target_depth is not None:
+                pos = self._scan_items(buf, pos, items)
+                if self._target_depth is not None:
+                    break  # need more data
+
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buf, pos)
+                if match is None:
+                    pos = len(buf)
+                    break
+                if match.group() == '\\':
+                    if match.end() >= len(buf):
+                        # escaped char is in next chunk
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                pos = match.end()
+                self._in_string = False
+                if self._string_is_key:
+                    self._frames[-1][1] = json.loads(buf[self._string_start:pos])
+                continue
+
+            match = _STRUCTURAL.search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                break
+            char = match.group()
+            index = match.start()
+            pos = match.end()
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+                self._string_is_key = bool(self._frames) and self._frames[-1][0] == '{' and self._frames[-1][2]
+            elif char == ':':
+                self._frames[-1][2] = False
+            elif char == ',':
+                frame = self._frames[-1]
+                if frame[0] == '{':
+                    frame[2] = True
+            elif char in '{[':
+                if char == '[' and not self.found and tuple(frame[1] for frame in self._frames) == self.path:
+                    self.found = True
+                    self._target_depth = len(self._frames) + 1
+                    self._skeleton.append(buf[self._skeleton_mark:pos])
+                    self._skeleton_mark = pos
+                    self._item_start = pos
+                self._frames.append([char, None, char == '{'])
+            else:  # } or ]
+                self._frames.pop()
+
+        self._pos = pos
+        return items
+
+    def _scan_items(self, buf, pos, items):
+        while True:
+            if self._tokenizing:
+                pos, item_done = self._tokenize_item(buf, pos, items)
+                if not item_done or self._target_depth is None:
+                    return pos
+                continue
+
+            # Fast path for objects: an object item ends at the first '}' followed by ',' or ']'
+            # which gives a valid JSON document, so we try to decode at each candidate end.
+            start = _WHITESPACE.match(buf, self._item_start).end()
+            if start >= len(buf):
+                return len(buf)
+            if buf[start] == ']':
+                self._end_array(start)
+                return start + 1
+            if buf[start] != '{':
+                self._tokenizing = True
+                pos = self._item_start
+                continue
+
+            search_from = max(pos, start)
+            while True:
+                match = _OBJECT_END.search(buf, search_from)
+                if match is None:
+                    return search_from  # wait for next chunk
+                try:
+                    item = self._decode(buf[start:match.start() + 1])
+                except ValueError:
+                    self._attempts += 1
+                    if self._attempts >= self.MAX_DECODE_ATTEMPTS:
+                        # many '}' inside this item, find its end token by token
+                        self._tokenizing = True
+                        pos = self._item_start
+                        break
+                    search_from = match.start() + 1
+                    continue
+
+                items.append(item)
+                self._attempts = 0
+                if match.group(1) == ']':
+                    self._end_array(match.end() - 1)
+                    return match.end()
+                self._item_start = pos = match.end()
+                break
+
+    def _tokenize_item(self, buf, pos, items):
+        """
+        :return: (position to resume scanning at, True when item is complete)
+        """
+        depth = self._item_depth
+        for match in _ITEM_TOKENS.finditer(buf, pos):
+            token = match.group()
+            if token[0] == '"':
+                if len(token) > 1:
+                    continue  # a complete string
+                # unterminated string, wait for next chunk
+                self._item_depth = depth
+                return match.start(), False
+            if token in '[{':
+                depth += 1
+            elif depth:
+                if token != ',':
+                    depth -= 1
+            else:  # , or ] at item level
+                item = buf[self._item_start:match.start()]
+                if item.strip():
+                    items.append(self._decode(item))
+                self._tokenizing = False
+                self._attempts = 0
+                self._item_depth = 0
+                if token == ',':
+                    self._item_start = match.end()
+                else:
+                    self._end_array(match.start())
+                return match.end(), True
+        self._item_depth = depth
+        return len(buf), False
+
+    def _end_array(self, index):
+        self._frames.pop()
+        self._target_depth = None
+        self._item_start = None
+        self._skeleton_mark = index
+
+    def _compact(self):
+        # drop the text which has been either decoded or stored in the skeleton
+        if self._target_depth is not None:
+            keep_from = self._item_start
+        else:
+            keep_from = self._pos
+            if self._in_string and self._string_is_key:
+                keep_from = min(keep_from, self._string_start)
+            self._skeleton.append(self._buffer[self._skeleton_mark:keep_from])
+            self._skeleton_mark = keep_from
+
+        self._buffer = self._buffer[keep_from:]
+        self._pos -= keep_from
+        self._skeleton_mark -= keep_from
+        if self._item_start is not None:
+            self._item_start -= keep_from
+        if self._string_start is not None:
+            self._string_start -= keep_from
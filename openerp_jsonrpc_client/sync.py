@@ -0,0 +1,309 @@
+# coding: utf8
+"""
+Incremental synchronisation of a model into a local mirror (change data capture).
+
+Each run of an OpenERPModelSync reads only the records created or modified since the previous run,
+page by page, ordered by (write_date, id) from a high-water mark, and hands them to a sink. Deleted
+records are found by comparing the ids known locally with the server ids, chunk by chunk of sorted ids.
+
+Progress is committed to an OpenERPSyncState (a SQLite file) after each page, so an interrupted run
+restarts where it stopped. Records may be handed twice to the sink (eg. a page processed before an
+interruption), sinks must upsert.
+
+    >>> state = OpenERPSyncState('/var/lib/mirror/sync.sqlite')
+    >>> sink = OpenERPSQLiteSink('/var/lib/mirror/mirror.sqlite')
+    >>> OpenERPModelSync(server, 'res.partner', sink, state, fields=['name', 'email']).run()
+    {'upserted': 118, 'deleted': 2, 'pages': 1}
+"""
+import datetime
+import json
+import os
+import sqlite3
+import threading
+
+# (cursor field, domain restricting the pass): records never written have no write_date in OpenERP 7,
+# they are followed on their create_date
+_PASSES = (
+    ('write_date', [('write_date', '!=', False)]),
+    ('create_date', [('write_date', '=', False)]),
+)
+
+# format of OpenERP datetime values
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _seconds_before(mark, seconds):
+    mark = datetime.datetime.strptime(mark[:19], DATETIME_FORMAT)
+    return (mark - datetime.timedelta(seconds=seconds)).strftime(DATETIME_FORMAT)
+
+
+class OpenERPSyncState(object):
+    """
+    Checkpoints of model synchronisations: high-water marks and ids known locally.
+
+    :param path: SQLite database file
+    :type path: str
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS sync_state (model TEXT PRIMARY KEY, state TEXT)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS sync_ids (model TEXT, id INTEGER, PRIMARY KEY (model, id))')
+        self._db.commit()
+
+    def load(self, model):
+        """:return: the checkpoint of model, None if it was never synchronised"""
+        with self._lock:
+            row = self._db.execute('SELECT state FROM sync_state WHERE model = ?', (model,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, model, checkpoint, added_ids=(), removed_ids=()):
+        """Saves checkpoint and updates the known ids in one transaction"""
+        with self._lock:
+            try:
+                self._db.execute('INSERT OR REPLACE INTO sync_state (model, state) VALUES (?, ?)',
+                                 (model, json.dumps(checkpoint)))
+                self._db.executemany('INSERT OR IGNORE INTO sync_ids (model, id) VALUES (?, ?)',
+                                     [(model, id) for id in added_ids])
+                self._db.executemany('DELETE FROM sync_ids WHERE model = ? AND id = ?',
+                                     [(model, id) for id in removed_ids])
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+
+    def ids(self, model, after=0, until=None):
+        """:return: sorted list of the known ids of model greater than after and up to until"""
+        query = 'SELECT id FROM sync_ids WHERE model = ? AND id > ?'
+        params = [model, after]
+        if until is not None:
+            query += ' AND id <= ?'
+            params.append(until)
+        with self._lock:
+            return [row[0] for row in self._db.execute(query + ' ORDER BY id', params)]
+
+    def reset(self, model):
+        """Forget model checkpoint: its next synchronisation reads all its records"""
+        with self._lock:
+            self._db.execute('DELETE FROM sync_state WHERE model = ?', (model,))
+            self._db.execute('DELETE FROM sync_ids WHERE model = ?', (model,))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+#
+# Sinks
+#
+class OpenERPSyncSink(object):
+    """Receives synchronised records. flush() is called before each checkpoint."""
+    def upsert(self, model, records):
+        raise NotImplementedError
+
+    def delete(self, model, ids):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class OpenERPCallbackSink(OpenERPSyncSink):
+    """
+    :param upsert: callable receiving (model, list of records values)
+    :param delete: callable receiving (model, list of deleted ids). Deletions are ignored when None.
+    """
+    def __init__(self, upsert, delete=None):
+        self._upsert = upsert
+        self._delete = delete
+
+    def upsert(self, model, records):
+        self._upsert(model, records)
+
+    def delete(self, model, ids):
+        if self._delete is not None:
+            self._delete(model, ids)
+
+
+class OpenERPJSONLinesSink(OpenERPSyncSink):
+    """
+    Appends one json line per change to a file:
+    {"model": "res.partner", "op": "upsert", "record": {...}} or {"model": "res.partner", "op": "delete", "id": 7}
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a')
+
+    def upsert(self, model, records):
+        for record in records:
+            self._file.write(json.dumps({'model': model, 'op': 'upsert', 'record': record}) + '\n')
+
+    def delete(self, model, ids):
+        for id in ids:
+            self._file.write(json.dumps({'model': model, 'op': 'delete', 'id': id}) + '\n')
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class OpenERPSQLiteSink(OpenERPSyncSink):
+    """
+    Mirrors each model in a table of a SQLite database named after the model (res_partner for
+    res.partner) with columns id and data (the record values as json).
+    """
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._tables = set()
+
+    def table(self, model):
+        table = model.replace('.', '_')
+        if table not in self._tables:
+            self._db.execute('CREATE TABLE IF NOT EXISTS "%s" (id INTEGER PRIMARY KEY, data TEXT)' % table)
+            self._tables.add(table)
+        return table
+
+    def upsert(self, model, records):
+        self._db.executemany('INSERT OR REPLACE INTO "%s" (id, data) VALUES (?, ?)' % self.table(model),
+                             [(record['id'], json.dumps(record)) for record in records])
+
+    def delete(self, model, ids):
+        self._db.executemany('DELETE FROM "%s" WHERE id = ?' % self.table(model), [(id,) for id in ids])
+
+    def flush(self):
+        self._db.commit()
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+
+
+class OpenERPModelSync(object):
+    """
+    Synchronises the records of model matching domain into sink.
+
+    Records modified in the second of the high-water mark are read again by the next run, as
+    OpenERP dates have a one second resolution.
+
+    write_date is set when a transaction writes, not when it commits: a long transaction committing
+    after a run may hold records dated before the high-water mark. Each run re-reads the records
+    modified in the overlap seconds before the high-water mark so that they are not missed.
+
+    :param client: an authenticated OpenERPJSONRPCClient
+    :param model: name of the model
+    :param sink: OpenERPSyncSink receiving the changes
+    :param state: OpenERPSyncState holding the checkpoints
+    :param fields: fields of the synchronised records. All by default.
+    :type fields: list
+    :param domain: records to synchronise. Records leaving the domain are seen as deleted.
+                   Pass context={'active_test': False} to synchronise inactive records too.
+    :type domain: list
+    :param page_size: number of records read per call
+    :type page_size: int
+    :param id_chunk_size: number of ids compared per call when looking for deleted records
+    :type id_chunk_size: int
+    :param overlap: seconds before the high-water mark read again by each run. Set it to the duration
+                    of the longest transactions writing the model.
+    :type overlap: float
+    """
+    def __init__(self, client, model, sink, state, fields=None, domain=None, page_size=1000, id_chunk_size=10000,
+                 context=None, overlap=0):
+        self.client = client
+        self.model = model
+        self.sink = sink
+        self.state = state
+        self.fields = list(fields) if fields else False
+        self.domain = list(domain or [])
+        self.page_size = page_size
+        self.id_chunk_size = id_chunk_size
+        self.context = context or {}
+        self.overlap = overlap
+        if self.fields:
+            self.fields += [field for field in ('write_date', 'create_date') if field not in self.fields]
+
+    def _new_checkpoint(self):
+        return {'domain': self.domain, 'fields': self.fields, 'phase': 'changes', 'running': False,
+                'cursors': dict((field, [None, 0]) for field, _ in _PASSES), 'deletion_cursor': 0}
+
+    def run(self, detect_deletions=True):
+        """
+        Hands the changes since the last run to the sink.
+
+        :param detect_deletions: when False, only created and modified records are synchronised
+        :return: {'upserted': number of records upserted, 'deleted': number of records deleted,
+                  'pages': number of pages read}
+        :rtype: dict
+        """
+        stats = {'upserted': 0, 'deleted': 0, 'pages': 0}
+        checkpoint = self.state.load(self.model) or self._new_checkpoint()
+        if (checkpoint['domain'], checkpoint['fields']) != (json.loads(json.dumps(self.domain)), self.fields):
+            raise ValueError("%s was synchronised with another domain or other fields, "
+                             "reset its state first." % self.model)
+
+        if checkpoint['phase'] == 'changes':
+            if not checkpoint['running']:
+                # a new run starts at the beginning of the high-water mark second, minus overlap
+                for cursor in checkpoint['cursors'].values():
+                    if cursor[0] and self.overlap:
+                        cursor[0] = _seconds_before(cursor[0], self.overlap)
+                    cursor[1] = 0
+                checkpoint['running'] = True
+            for field, domain in _PASSES:
+                self._pull_changes(checkpoint, field, domain, stats)
+            checkpoint['phase'], checkpoint['deletion_cursor'] = 'deletions', 0
+            self.state.save(self.model, checkpoint)
+
+        if detect_deletions:
+            self._detect_deletions(checkpoint, stats)
+
+        checkpoint['phase'], checkpoint['running'] = 'changes', False
+        self.state.save(self.model, checkpoint)
+        return stats
+
+    def _pull_changes(self, checkpoint, field, pass_domain, stats):
+        cursor = checkpoint['cursors'][field]
+        while True:
+            mark, last_id = cursor
+            domain = self.domain + pass_domain
+            if mark is not None:
+                domain += ['|', (field, '>', mark), '&', (field, '=', mark), ('id', '>', last_id)]
+            records = list(self.client.dataset_search_read(self.model, fields=self.fields, limit=self.page_size,
+                                                           domain=domain, sort='%s, id' % field,
+                                                           context=self.context, stream=True))
+            if not records:
+                return
+            self.sink.upsert(self.model, records)
+            self.sink.flush()
+            cursor[:] = [records[-1][field], records[-1]['id']]
+            self.state.save(self.model, checkpoint, added_ids=[record['id'] for record in records])
+            stats['upserted'] += len(records)
+            stats['pages'] += 1
+            if len(records) < self.page_size:
+                return
+
+    def _detect_deletions(self, checkpoint, stats):
+        while True:
+            after = checkpoint['deletion_cursor'] or 0
+            server_ids = self.client.dataset_call_kw(self.model, 'search', self.domain + [('id', '>', after)],
+                                                     limit=self.id_chunk_size, order='id', context=self.context)
+            # the last chunk covers all the ids above after
+            until = server_ids[-1] if len(server_ids) >= self.id_chunk_size else None
+            server_id_set = set(server_ids)
+            deleted_ids = [id for id in self.state.ids(self.model, after, until) if id not in server_id_set]
+            if deleted_ids:
+                self.sink.delete(self.model, deleted_ids)
+                self.sink.flush()
+                stats['deleted'] += len(deleted_ids)
+            checkpoint['deletion_cursor'] = until
+            self.state.save(self.model, checkpoint, removed_ids=deleted_ids)
+            if until is None:
+                return
@@ -0,0 +1,934 @@
+# coding: utf8
+"""
+An in-memory OpenERP stand-in server speaking the /web/<service>/<method> JSON-RPC protocol.
+
+It allows to run tests and benchmarks without a real OpenERP server:
+
+    >>> server = OpenERPStandInServer(records=10000, payload_size=200, latency=0.002).start()
+    >>> client = OpenERPJSONRPCClient(server.url)
+    >>> client.session_authenticate(server.DEFAULT_DB, 'admin', 'admin')
+    >>> ...
+    >>> server.stop()
+
+It can also be run standalone:
+
+    python -m openerp_jsonrpc_client.testing --port 8069 --records 10000 --latency 0.002
+
+Supported services are session (get_session_info, authenticate, sc_list), database (get_list,
+create, duplicate, drop, change_password), dataset (search_read, load, call_kw, exec_workflow) and
+the export/csv, export/xls, binary/saveas and binary/upload_attachment http controllers.
+call_kw supports the common ORM methods (search, search_count, read, search_read, create, write,
+unlink, load, name_get, name_search, fields_get, fields_view_get, get_object_reference, ...).
+
+A 'standin' service gives access to the server statistics (standin/stats, standin/reset_stats).
+"""
+from __future__ import print_function
+
+import argparse
+import base64
+import copy
+import json
+import re
+import socket
+import sys
+import threading
+import time
+import traceback
+import uuid
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qsl
+except ImportError:  # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qsl
+
+
+class OpenERPStandInError(Exception):
+    """
+    Raised by stand-in methods. Converted into a JSON-RPC error response.
+    """
+    def __init__(self, message, code=200, error_type='server_exception'):
+        super(OpenERPStandInError, self).__init__(message)
+        self.message = message
+        self.code = code
+        self.error_type = error_type
+
+
+def _now():
+    # as PostgreSQL timestamps read by OpenERP 7: with microseconds, trailing zeros dropped
+    now = time.time()
+    value = '%s.%06d' % (time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now)), now % 1 * 1000000)
+    return value.rstrip('0').rstrip('.')
+
+
+#
+# Domain evaluation
+#
+def _like(value, pattern, case_sensitive):
+    if value is False or value is None:
+        return False
+    if not case_sensitive:
+        return pattern.lower() in value.lower()
+    return pattern in value
+
+
+def _evaluate_leaf(leaf, record):
+    field, operator, value = leaf
+    record_value = record.get(field, False)
+    if isinstance(record_value, list):  # x2many
+        if operator in ('in', '='):
+            targets = value if isinstance(value, list) else [value]
+            return bool(set(record_value) & set(targets))
+        if operator in ('not in', '!='):
+            targets = value if isinstance(value, list) else [value]
+            return not set(record_value) & set(targets)
+        raise OpenERPStandInError("Unsupported operator %s on x2many field %s" % (operator, field))
+
+    if operator == '=':
+        return record_value == value
+    if operator in ('!=', '<>'):
+        return record_value != value
+    if operator == 'in':
+        return record_value in value
+    if operator == 'not in':
+        return record_value not in value
+    if operator == 'like':
+        return _like(record_value, value, True)
+    if operator == 'ilike':
+        return _like(record_value, value, False)
+    if operator == 'not ilike':
+        return not _like(record_value, value, False)
+    if record_value is False or record_value is None:
+        return False
+    if operator == '>':
+        return record_value > value
+    if operator == '>=':
+        return record_value >= value
+    if operator == '<':
+        return record_value < value
+    if operator == '<=':
+        return record_value <= value
+    raise OpenERPStandInError("Unsupported operator %s" % operator)
+
+
+def evaluate_domain(domain, record):
+    """
+    :return: True if record matches the OpenERP domain (polish notation with implicit &)
+    """
+    stack = []
+    for token in reversed(domain or []):
+        if token == '&':
+            stack.append(stack.pop() & stack.pop())
+        elif token == '|':
+            stack.append(stack.pop() | stack.pop())
+        elif token == '!':
+            stack.append(not stack.pop())
+        else:
+            stack.append(_evaluate_leaf(token, record))
+    return all(stack)
+
+
+def _sort_key_function(field):
+    def sort_key(record):
+        value = record.get(field, False)
+        if value is False or value is None:
+            return (True, 0)  # NULL values last
+        return (False, value)
+    return sort_key
+
+
+def _parse_order(order):
+    parsed = []
+    for part in (order or 'id').split(','):
+        tokens = part.split()
+        if tokens:
+            parsed.append((tokens[0], len(tokens) > 1 and tokens[1].lower() == 'desc'))
+    return parsed
+
+
+#
+# Models
+#
+class OpenERPStandInModel(object):
+    """
+    An in-memory model: a dict of records and a fields description (fields_get() format).
+    many2one fields are stored as an id (or False) and read as [id, display_name].
+    """
+    def __init__(self, database, name, fields, rec_name='name'):
+        self.database = database
+        self.name = name
+        self.fields = fields
+        self.rec_name = rec_name
+        self.records = {}
+        self._next_id = 1
+
+    def _check_ids(self, ids):
+        return [ids] if isinstance(ids, int) else list(ids)
+
+    def display_name(self, record):
+        return record.get(self.rec_name) or '%s,%s' % (self.name, record['id'])
+
+    def _read_record(self, record, fields):
+        result = {'id': record['id']}
+        for field in fields:
+            if field == 'id':
+                continue
+            value = record.get(field, False)
+            description = self.fields.get(field, {})
+            if description.get('type') == 'many2one' and value:
+                target = self.database.models[description['relation']]
+                target_record = target.records.get(value)
+                value = [value, target.display_name(target_record)] if target_record else False
+            elif isinstance(value, list):
+                value = list(value)
+            result[field] = value
+        return result
+
+    def _select(self, domain, offset=0, limit=None, order=None):
+        parsed_order = _parse_order(order)
+        records = [record for record in self.records.values() if evaluate_domain(domain, record)]
+        # sort on each key, last key first (sort is stable)
+        for field, descending in reversed(parsed_order):
+            records.sort(key=_sort_key_function(field), reverse=descending)
+        offset = offset or 0
+        if limit:
+            return records[offset:offset + limit]
+        return records[offset:]
+
+    #
+    # ORM methods
+    #
+    def search(self, domain=None, offset=0, limit=None, order=None, context=None, count=False):
+        records = self._select(domain, offset, limit, order)
+        if count:
+            return len(records)
+        return [record['id'] for record in records]
+
+    def search_count(self, domain=None, context=None):
+        return len(self._select(domain))
+
+    def read(self, ids, fields=None, context=None, load='_classic_read'):
+        fields = fields or list(self.fields)
+        single = isinstance(ids, int)
+        result = [self._read_record(self.records[id], fields) for id in self._check_ids(ids) if id in self.records]
+        if single:
+            return result[0] if result else False
+        return result
+
+    def search_read(self, domain=None, fields=None, offset=0, limit=None, order=None, context=None):
+        fields = fields or list(self.fields)
+        return [self._read_record(record, fields) for record in self._select(domain, offset, limit, order)]
+
+    def _create(self, vals):
+        record = dict((field, False) for field, description in self.fields.items()
+                      if description['type'] not in ('one2many', 'many2many'))
+        for field, description in self.fields.items():
+            if description['type'] in ('one2many', 'many2many'):
+                record[field] = []
+        record.update(self._convert_values(vals))
+        record['id'] = self._next_id
+        self._next_id += 1
+        # as OpenERP 7, write_date is only set by write()
+        record['create_date'], record['write_date'] = _now(), False
+        self.records[record['id']] = record
+        return record['id']
+
+    def create(self, vals, context=None):
+        # as OpenERP 7, one values dict per call
+        if not isinstance(vals, dict):
+            raise OpenERPStandInError("'%s' object has no attribute 'keys'" % type(vals).__name__)
+        return self._create(vals)
+
+    def _import_reference(self, relation, subfield, value):
+        target = self.database.models[relation]
+        if subfield == '.id':
+            return int(value)
+        if subfield == 'id':
+            module, _, name = value.rpartition('.')
+            for record in self.database.models['ir.model.data'].records.values():
+                if record['model'] == relation and record['module'] == module and record['name'] == name:
+                    return record['res_id']
+            raise OpenERPStandInError("No matching record found for external id '%s' in field '%s'" % (value, relation))
+        for record in target.records.values():
+            if target.display_name(record) == value:
+                return record['id']
+        raise OpenERPStandInError("No matching record found for name '%s' in field '%s'" % (value, relation))
+
+    def _import_value(self, field, subfield, value):
+        description = self.fields[field]
+        if value in ('', False, None):
+            return [] if description['type'] in ('one2many', 'many2many') else False
+        if description['type'] == 'many2one':
+            return self._import_reference(description['relation'], subfield, value)
+        if description['type'] in ('one2many', 'many2many'):
+            values = value if isinstance(value, list) else (u'%s' % value).split(',')
+            return [(6, 0, [self._import_reference(description['relation'], subfield, v) for v in values])]
+        if description['type'] == 'integer':
+            return int(value)
+        if description['type'] == 'float':
+            return float(value)
+        if description['type'] == 'boolean' and not isinstance(value, bool):
+            return (u'%s' % value).lower() not in ('0', 'false', 'off', 'no')
+        return value
+
+    def load(self, fields, data, context=None):
+        # as OpenERP 7, rows are imported in one transaction: any error rolls back all of them
+        paths = [path.partition('/') for path in fields]
+        unknown = [field for field, _, _ in paths if field not in self.fields]
+        if unknown:
+            message = "Unknown field %r on model %r" % (unknown[0], self.name)
+            return {'ids': False, 'messages': [{'type': 'error', 'record': None,
+                                                'rows': {'from': 0, 'to': len(data) - 1}, 'message': message}]}
+        ids, messages = [], []
+        for index, row in enumerate(data):
+            try:
+                vals = {}
+                for (field, _, subfield), value in zip(paths, row):
+                    vals[field] = self._import_value(field, subfield, value)
+                ids.append(self._create(vals))
+            except (OpenERPStandInError, ValueError, AttributeError) as exc:
+                message = exc.message if isinstance(exc, OpenERPStandInError) else str(exc)
+                messages.append({'type': 'error', 'record': index, 'rows': {'from': index, 'to': index},
+                                 'message': message})
+        if messages:
+            for id in ids:
+                self.records.pop(id, None)
+            return {'ids': False, 'messages': messages}
+        return {'ids': ids, 'messages': messages}
+
+    def _convert_values(self, vals):
+        converted = {}
+        for field, value in vals.items():
+            if field not in self.fields:
+                raise OpenERPStandInError("Invalid field %r on model %r" % (field, self.name))
+            if self.fields[field]['type'] in ('one2many', 'many2many'):
+                ids = []
+                for command in value or []:
+                    if command[0] == 6:
+                        ids = list(command[2])
+                    elif command[0] == 4:
+                        ids.append(command[1])
+                value = ids
+            converted[field] = value
+        return converted
+
+    def write(self, ids, vals, context=None):
+        vals = self._convert_values(vals)
+        for id in self._check_ids(ids):
+            if id not in self.records:
+                raise OpenERPStandInError("Record %s,%s does not exist" % (self.name, id))
+            self.records[id].update(vals)
+            self.records[id]['write_date'] = _now()
+        return True
+
+    def unlink(self, ids, context=None):
+        for id in self._check_ids(ids):
+            self.records.pop(id, None)
+        return True
+
+    def name_get(self, ids, context=None):
+        return [[id, self.display_name(self.records[id])] for id in self._check_ids(ids) if id in self.records]
+
+    def name_search(self, name='', args=None, operator='ilike', context=None, limit=100):
+        domain = list(args or []) + ([(self.rec_name, operator, name)] if name else [])
+        return self.name_get(self.search(domain, limit=limit))
+
+    def fields_get(self, allfields=None, context=None, attributes=None):
+        return dict((field, dict(description)) for (field, description) in self.fields.items()
+                    if not allfields or field in allfields)
+
+    def fields_view_get(self, view_id=None, view_type='form', context=None, toolbar=False, submenu=False):
+        arch = '<%s string="%s">%s</%s>' % (view_type, self.name,
+                                            ''.join('<field name="%s"/>' % field for field in sorted(self.fields)),
+                                            view_type)
+        return {'arch': arch, 'fields': self.fields_get(), 'model': self.name, 'type': view_type,
+                'view_id': view_id or 1, 'name': 'default'}
+
+    def copy(self, id, default=None, context=None):
+        vals = dict((field, value) for (field, value) in self.records[id].items()
+                    if field not in ('id', 'create_date', 'write_date'))
+        for field, description in self.fields.items():
+            if description['type'] in ('one2many', 'many2many'):
+                vals[field] = [(6, 0, vals.get(field) or [])]
+        vals.update(default or {})
+        return self._create(vals)
+
+    def exec_workflow(self, id, signal):
+        if id not in self.records:
+            raise OpenERPStandInError("Record %s,%s does not exist" % (self.name, id))
+        if 'state' in self.fields:
+            self.records[id]['state'] = signal
+            self.records[id]['write_date'] = _now()
+        return True
+
+
+class OpenERPStandInIrModelData(OpenERPStandInModel):
+    def get_object_reference(self, module, xml_id, context=None):
+        for record in self.records.values():
+            if record['module'] == module and record['name'] == xml_id:
+                return [record['model'], record['res_id']]
+        raise OpenERPStandInError("No such external ID currently defined in the system: %s.%s" % (module, xml_id))
+
+
+def _field(field_type, string, relation=None, **attributes):
+    description = dict(type=field_type, string=string, **attributes)
+    if relation:
+        description['relation'] = relation
+    return description
+
+
+class OpenERPStandInDatabase(object):
+    """
+    A database with a few standard models:
+    res.users, res.partner, res.partner.category, ir.model.data and ir.attachment
+    """
+    def __init__(self, name, admin_password='admin', records=100, payload_size=0):
+        self.name = name
+        self.models = {}
+        common_fields = {
+            'create_date': _field('datetime', 'Created on', readonly=True),
+            'write_date': _field('datetime', 'Last Updated on', readonly=True),
+        }
+
+        def add_model(name, fields, model_class=OpenERPStandInModel, rec_name='name'):
+            all_fields = dict(common_fields)
+            all_fields.update(fields)
+            self.models[name] = model_class(self, name, all_fields, rec_name=rec_name)
+            return self.models[name]
+
+        users = add_model('res.users', {
+            'name': _field('char', 'Name'),
+            'login': _field('char', 'Login'),
+            'password': _field('char', 'Password'),
+            'active': _field('boolean', 'Active'),
+            'partner_id': _field('many2one', 'Related Partner', 'res.partner'),
+        })
+        categories = add_model('res.partner.category', {
+            'name': _field('char', 'Category Name'),
+            'active': _field('boolean', 'Active'),
+        })
+        partners = add_model('res.partner', {
+            'name': _field('char', 'Name'),
+            'ref': _field('char', 'Reference'),
+            'email': _field('char', 'Email'),
+            'comment': _field('text', 'Notes'),
+            'active': _field('boolean', 'Active'),
+            'customer': _field('boolean', 'Customer'),
+            'credit_limit': _field('float', 'Credit Limit'),
+            'color': _field('integer', 'Color Index'),
+            'state': _field('selection', 'Status', selection=[['draft', 'Draft'], ['done', 'Done']]),
+            'image': _field('binary', 'Image'),
+            'parent_id': _field('many2one', 'Related Company', 'res.partner'),
+            'child_ids': _field('one2many', 'Contacts', 'res.partner', relation_field='parent_id'),
+            'category_id': _field('many2many', 'Tags', 'res.partner.category'),
+            'user_id': _field('many2one', 'Salesperson', 'res.users'),
+        })
+        model_data = add_model('ir.model.data', {
+            'name': _field('char', 'External Identifier'),
+            'module': _field('char', 'Module'),
+            'model': _field('char', 'Model Name'),
+            'res_id': _field('integer', 'Record ID'),
+        }, model_class=OpenERPStandInIrModelData)
+        add_model('ir.attachment', {
+            'name': _field('char', 'Attachment Name'),
+            'datas': _field('binary', 'File Content'),
+            'datas_fname': _field('char', 'File Name'),
+            'res_model': _field('char', 'Resource Model'),
+            'res_id': _field('integer', 'Resource ID'),
+        })
+
+        admin_partner_id = partners.create({'name': 'Administrator', 'active': True})
+        users.create({'name': 'Administrator', 'login': 'admin', 'password': admin_password,
+                      'active': True, 'partner_id': admin_partner_id})
+        category_ids = [categories.create({'name': 'Category %d' % i, 'active': True}) for i in range(1, 6)]
+
+        payload = 'x' * payload_size
+        company_id = False
+        for i in range(1, records + 1):
+            if i % 10 == 1:
+                company_id = False
+            partner_id = partners.create({
+                'name': 'Partner %d' % i,
+                'ref': 'P%06d' % i,
+                'email': 'partner%d@example.com' % i,
+                'comment': payload,
+                'active': True,
+                'customer': i % 2 == 0,
+                'credit_limit': i * 10.5,
+                'color': i % 10,
+                'state': 'draft',
+                'parent_id': company_id,
+                'category_id': [(6, 0, [category_ids[i % len(category_ids)]])],
+                'user_id': 1,
+            })
+            if company_id is False:
+                company_id = partner_id
+            else:
+                partners.records[company_id]['child_ids'].append(partner_id)
+            model_data.create({'module': 'standin', 'name': 'partner_%d' % i,
+                               'model': 'res.partner', 'res_id': partner_id})
+
+    def duplicate(self, name):
+        duplicated = copy.deepcopy(self)
+        duplicated.name = name
+        return duplicated
+
+
+def _parse_multipart(body, boundary):
+    """
+    :return: dict of form fields, files are (filename, content) tuples
+    """
+    form = {}
+    delimiter = b'--' + boundary.encode('ascii')
+    for part in body.split(delimiter)[1:]:
+        if part.startswith(b'--'):
+            break
+        head, _, content = part[2:].partition(b'\r\n\r\n')
+        content = content[:-2]  # \r\n before next delimiter
+        disposition = dict(re.findall(r'(\w+)="([^"]*)"', head.decode('utf-8')))
+        if 'filename' in disposition:
+            form[disposition['name']] = (disposition['filename'], content)
+        else:
+            form[disposition['name']] = content.decode('utf-8')
+    return form
+
+
+#
+# HTTP server
+#
+class _OpenERPStandInRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are sent in separate writes
+    _COOKIE_SID = re.compile(r'(?:^|;)\s*sid=([^;]+)')
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        stand_in = self.server.stand_in
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        status, headers, response_body = stand_in.handle(self.path, self.headers, body)
+        sid = self._COOKIE_SID.search(self.headers.get('Cookie') or '')
+        if not sid:
+            headers.append(('Set-Cookie', 'sid=%s; Path=/' % uuid.uuid4().hex))
+
+        self.send_response(status)
+        for header in headers:
+            self.send_header(*header)
+        self.send_header('Content-Length', str(len(response_body)))
+        self.end_headers()
+        self.wfile.write(response_body)
+
+        stand_in.count_bytes(len(self.raw_requestline) + len(str(self.headers)) + len(body),
+                             len(response_body) + sum(len(name) + len(value) + 4 for (name, value) in headers) + 100)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # many clients connect at once in concurrent benchmarks
+    allow_reuse_address = True
+
+    def server_bind(self):
+        HTTPServer.server_bind(self)
+        self.connections = set()  # open (keep-alive) client sockets
+
+    def process_request(self, request, client_address):
+        self.connections.add(request)
+        ThreadingMixIn.process_request(self, request, client_address)
+
+    def shutdown_request(self, request):
+        self.connections.discard(request)
+        HTTPServer.shutdown_request(self, request)
+
+    def handle_error(self, request, client_address):
+        # clients may go away before their answer is sent (eg. closed client, ignored hedged request)
+        if not isinstance(sys.exc_info()[1], socket.error):
+            HTTPServer.handle_error(self, request, client_address)
+
+    def close_connections(self):
+        for request in list(self.connections):
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except (OSError, socket.error):
+                pass
+
+
+class OpenERPStandInServer(object):
+    """
+    :param host: interface to listen on
+    :param port: port to listen on. 0 to use a free port (see url attribute)
+    :param latency: seconds added to each request processing. Can be a callable
+                    receiving (service, method) and returning a number of seconds.
+    :param records: number of res.partner records created in the default database
+    :param payload_size: size (in characters) of each res.partner 'comment' field
+    :param admin_password: super admin password, also password of the 'admin' user
+    """
+    DEFAULT_DB = 'standin'
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, records=100, payload_size=0, admin_password='admin'):
+        self.latency = latency
+        self.records = records
+        self.payload_size = payload_size
+        self.admin_password = admin_password
+
+        self._lock = threading.RLock()
+        self.databases = {self.DEFAULT_DB: OpenERPStandInDatabase(self.DEFAULT_DB, admin_password,
+                                                                  records, payload_size)}
+        self.sessions = {}  # session_id => {'db': ..., 'uid': ..., 'login': ...}
+        self.reset_stats()
+
+        self._httpd = _ThreadingHTTPServer((host, port), _OpenERPStandInRequestHandler)
+        self._httpd.stand_in = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return 'http://%s:%s' % (host, port)
+
+    def start(self):
+        """Serve requests in a background thread"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        """Stop serving and close client connections, as a crashed server would"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._httpd.close_connections()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    #
+    # Statistics
+    #
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {'requests': 0, 'bytes_received': 0, 'bytes_sent': 0, 'calls': {}}
+
+    def count_bytes(self, received, sent):
+        with self._lock:
+            self.stats['bytes_received'] += received
+            self.stats['bytes_sent'] += sent
+
+    def _count_call(self, name):
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['calls'][name] = self.stats['calls'].get(name, 0) + 1
+
+    def expire_sessions(self):
+        """Forget all sessions, next calls will fail with a 'session_invalid' error"""
+        with self._lock:
+            self.sessions.clear()
+
+    #
+    # Request dispatching
+    #
+    def handle(self, path, headers, body):
+        """
+        :return: (status, headers list, response body)
+        """
+        if not path.startswith('/web/') or path.count('/') < 3:
+            return 404, [], b'Not Found'
+        service, method = path[len('/web/'):].rsplit('/', 1)
+        handler_name = '%s_%s' % (service.replace('/', '_'), method)
+
+        # plain http (form posted) controllers, eg. export/csv
+        http_handler = getattr(self, '_http_' + handler_name, None)
+        if http_handler is not None:
+            content_type = headers.get('Content-Type') or ''
+            if content_type.startswith('multipart/form-data'):
+                form = _parse_multipart(body, content_type.split('boundary=', 1)[1])
+            else:
+                form = dict(parse_qsl(body.decode('utf-8')))
+            try:
+                return http_handler(form)
+            except OpenERPStandInError as exc:
+                return 500, [('Content-Type', 'text/plain')], exc.message.encode('utf-8')
+
+        handler = getattr(self, '_' + handler_name, None)
+        if handler is None:
+            return 404, [], b'Not Found'
+
+        request = json.loads(body.decode('utf-8'))
+        params = request.get('params') or {}
+        if isinstance(params, list):  # positional params are not used by OpenERP
+            params = {}
+
+        latency = self.latency(service, method) if callable(self.latency) else self.latency
+        if latency:
+            time.sleep(latency)
+
+        try:
+            result = handler(params)
+            response = {'jsonrpc': '2.0', 'id': request.get('id'), 'result': result}
+        except OpenERPStandInError as exc:
+            response = {'jsonrpc': '2.0', 'id': request.get('id'), 'error': {
+                'code': exc.code,
+                'message': 'OpenERP Server Error' if exc.code == 200 else 'OpenERP Session Invalid',
+                'data': {'type': exc.error_type, 'fault_code': exc.message, 'debug': traceback.format_exc()},
+            }}
+        return 200, [('Content-Type', 'application/json')], json.dumps(response).encode('utf-8')
+
+    def _get_session(self, params, authenticated=True):
+        with self._lock:
+            session = self.sessions.get(params.get('session_id'))
+        if session is None or (authenticated and not session.get('uid')):
+            raise OpenERPStandInError('Session expired', code=100, error_type='session_invalid')
+        return session
+
+    def _session_info(self, session_id, session):
+        return {
+            'session_id': session_id,
+            'uid': session.get('uid') or None,
+            'user_context': session.get('user_context') or {},
+            'db': session.get('db'),
+            'username': session.get('login'),
+        }
+
+    def _get_model(self, params):
+        session = self._get_session(params)
+        database = self.databases.get(session['db'])
+        if database is None or params.get('model') not in database.models:
+            raise OpenERPStandInError("Object %s doesn't exist" % params.get('model'))
+        return database.models[params['model']]
+
+    def _check_super_admin(self, password):
+        if password != self.admin_password:
+            raise OpenERPStandInError('AccessDenied')
+
+    @staticmethod
+    def _fields_params(params):
+        return dict((field['name'], field['value']) for field in params.get('fields') or [])
+
+    # session service
+    def _session_get_session_info(self, params):
+        self._count_call('session/get_session_info')
+        session_id = params.get('session_id')
+        with self._lock:
+            if session_id not in self.sessions:
+                session_id = uuid.uuid4().hex
+                self.sessions[session_id] = {}
+            session = self.sessions[session_id]
+        return self._session_info(session_id, session)
+
+    def _session_authenticate(self, params):
+        self._count_call('session/authenticate')
+        session_id = params.get('session_id')
+        with self._lock:
+            session = self.sessions.setdefault(session_id, {})
+            database = self.databases.get(params.get('db'))
+            if database is None:
+                raise OpenERPStandInError('FATAL: database "%s" does not exist' % params.get('db'))
+            uid = False
+            for user in database.models['res.users'].records.values():
+                if user['login'] == params.get('login') and user['password'] == params.get('password'):
+                    uid = user['id']
+            session.update({'db': database.name, 'uid': uid, 'login': params.get('login'),
+                            'user_context': {'lang': 'en_US', 'tz': False, 'uid': uid} if uid else {}})
+        return self._session_info(session_id, session)
+
+    def _session_sc_list(self, params):
+        self._count_call('session/sc_list')
+        self._get_session(params)
+        return []
+
+    # database service
+    def _database_get_list(self, params):
+        self._count_call('database/get_list')
+        with self._lock:
+            return sorted(self.databases)
+
+    def _database_create(self, params):
+        self._count_call('database/create')
+        fields = self._fields_params(params)
+        self._check_super_admin(fields.get('super_admin_pwd'))
+        with self._lock:
+            if fields['db_name'] in self.databases:
+                raise OpenERPStandInError('database "%s" already exists' % fields['db_name'])
+            self.databases[fields['db_name']] = OpenERPStandInDatabase(fields['db_name'],
+                                                                       fields.get('create_admin_pwd'),
+                                                                       records=0)
+        return True
+
+    def _database_duplicate(self, params):
+        self._count_call('database/duplicate')
+        fields = self._fields_params(params)
+        self._check_super_admin(fields.get('super_admin_pwd'))
+        with self._lock:
+            source = self.databases[fields['db_original_name']]
+            self.databases[fields['db_name']] = source.duplicate(fields['db_name'])
+        return True
+
+    def _database_drop(self, params):
+        self._count_call('database/drop')
+        fields = self._fields_params(params)
+        self._check_super_admin(fields.get('drop_pwd'))
+        with self._lock:
+            if self.databases.pop(fields.get('drop_db'), None) is None:
+                return {'error': 'Could not drop database !', 'title': 'Drop Database'}
+        return True
+
+    def _database_change_password(self, params):
+        self._count_call('database/change_password')
+        fields = self._fields_params(params)
+        self._check_super_admin(fields.get('old_pwd'))
+        self.admin_password = fields['new_pwd']
+        return True
+
+    # dataset service
+    def _dataset_search_read(self, params):
+        self._count_call('dataset/search_read')
+        model = self._get_model(params)
+        with self._lock:
+            records = model._select(params.get('domain'), order=params.get('sort'))
+            total = len(records)
+            offset = params.get('offset') or 0
+            limit = params.get('limit')
+            records = records[offset:offset + limit] if limit else records[offset:]
+            fields = params.get('fields') or list(model.fields)
+            return {'length': total, 'records': [model._read_record(record, fields) for record in records]}
+
+    def _dataset_load(self, params):
+        self._count_call('dataset/load')
+        model = self._get_model(params)
+        with self._lock:
+            return {'value': model.read(params['id'])}
+
+    def _dataset_exec_workflow(self, params):
+        self._count_call('dataset/exec_workflow')
+        model = self._get_model(params)
+        with self._lock:
+            return model.exec_workflow(params['id'], params['signal'])
+
+    def _dataset_call_kw(self, params):
+        model = self._get_model(params)
+        method_name = params.get('method', '')
+        self._count_call('%s.%s' % (model.name, method_name))
+        method = getattr(model, method_name, None)
+        if method_name.startswith('_') or method is None:
+            raise OpenERPStandInError("'%s' object has no attribute '%s'" % (model.name, method_name))
+        with self._lock:
+            try:
+                return method(*(params.get('args') or []), **(params.get('kwargs') or {}))
+            except OpenERPStandInError:
+                raise
+            except (TypeError, KeyError, ValueError) as exc:
+                raise OpenERPStandInError('%s: %s' % (exc.__class__.__name__, exc))
+
+    # export service: form posted, the data field holds the JSON encoded export parameters
+    def _export(self, form):
+        data = json.loads(form['data'])
+        model = self._get_model({'session_id': form.get('session_id'), 'model': data['model']})
+        field_names = [field['name'] for field in data['fields']]
+        labels = field_names if data.get('import_compat') else [field['label'] for field in data['fields']]
+        with self._lock:
+            ids = data.get('ids') or model.search(data.get('domain') or [])
+            lines = [labels]
+            for record in model.read(ids, field_names):
+                line = []
+                for field in field_names:
+                    value = record.get(field)
+                    if isinstance(value, list) and len(value) == 2 and model.fields[field]['type'] == 'many2one':
+                        value = value[1]
+                    elif isinstance(value, list):
+                        value = ','.join(str(id) for id in value)
+                    line.append('' if value is False or value is None else u'%s' % value)
+                lines.append(line)
+        return lines
+
+    def _http_export_csv(self, form):
+        self._count_call('export/csv')
+        body = u''.join(u','.join(u'"%s"' % value.replace(u'"', u'""') for value in line) + u'\r\n'
+                        for line in self._export(form))
+        return 200, [('Content-Type', 'text/csv;charset=utf8'),
+                     ('Content-Disposition', 'attachment; filename="export.csv"'),
+                     ('Set-Cookie', 'fileToken=%s; Path=/' % form.get('token'))], body.encode('utf-8')
+
+    def _http_export_xls(self, form):
+        # not a real xls file (the stand-in has no xlwt): tab separated values with the xls content type
+        self._count_call('export/xls')
+        body = u'\n'.join(u'\t'.join(line) for line in self._export(form)).encode('utf-8')
+        return 200, [('Content-Type', 'application/vnd.ms-excel'),
+                     ('Content-Disposition', 'attachment; filename="export.xls"'),
+                     ('Set-Cookie', 'fileToken=%s; Path=/' % form.get('token'))], body
+
+    # binary service
+    def _http_binary_saveas(self, form):
+        self._count_call('binary/saveas')
+        model = self._get_model(form)
+        field = form['field']
+        filename_field = form.get('filename_field')
+        with self._lock:
+            record = model.read(int(form['id']), [field] + ([filename_field] if filename_field else []))
+        if not record or not record.get(field):
+            return 404, [('Content-Type', 'text/plain')], b'Not Found'
+        filename = (filename_field and record.get(filename_field)) or '%s_%s' % (model.name.replace('.', '_'),
+                                                                                   form['id'])
+        return 200, [('Content-Type', 'application/octet-stream'),
+                     ('Content-Disposition', 'attachment; filename="%s"' % filename)], \
+            base64.b64decode(record[field])
+
+    def _http_binary_upload_attachment(self, form):
+        self._count_call('binary/upload_attachment')
+        attachment_obj = self._get_model(dict(form, model='ir.attachment'))
+        filename, content = form['ufile']
+        with self._lock:
+            attachment_id = attachment_obj.create({
+                'name': filename,
+                'datas': base64.b64encode(content).decode('ascii'),
+                'datas_fname': filename,
+                'res_model': form['model'],
+                'res_id': int(form['id']),
+            })
+        # same answer as OpenERP 7: a script calling the callback of the upload iframe
+        return 200, [('Content-Type', 'text/html')], (
+            '<script language="javascript" type="text/javascript">\n'
+            '    var win = window.top.window;\n'
+            '    win.jQuery(win).trigger(%s, %s);\n'
+            '</script>' % (json.dumps(form.get('callback')),
+                           json.dumps({'filename': filename, 'id': attachment_id}))).encode('utf-8')
+
+    # stand-in service
+    def _standin_stats(self, params):
+        with self._lock:
+            return copy.deepcopy(self.stats)
+
+    def _standin_reset_stats(self, params):
+        self.reset_stats()
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an OpenERP JSON-RPC stand-in server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8069)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to each request")
+    parser.add_argument('--records', type=int, default=1000, help="number of res.partner records")
+    parser.add_argument('--payload-size', type=int, default=0, help="size of each res.partner comment")
+    args = parser.parse_args()
+
+    server = OpenERPStandInServer(host=args.host, port=args.port, latency=args.latency,
+                                  records=args.records, payload_size=args.payload_size)
+    print("OpenERP stand-in server listening on %s (database: %s, login: admin, password: admin)"
+          % (server.url, server.DEFAULT_DB))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# coding: utf8
+"""
+HTTP transport used by OpenERPJSONRPCClient.
+
+The transport owns a requests.Session so that every call made by a client (and by all the
+service and model proxies it hands out) reuses the same pool of keep-alive connections and
+the same cookie jar (which holds the werkzeug 'sid' cookie).
+"""
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:  # Python 2
+    from urlparse import urlsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def _host_key(url):
+    """:return: the (scheme, host, port) of url, as in urllib3 pool keys"""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    return scheme, (parts.hostname or '').lower(), parts.port or DEFAULT_PORTS.get(scheme)
+
+
+def _pool_host_key(pool_key):
+    if hasattr(pool_key, 'key_host'):  # urllib3 >= 1.20 PoolKey
+        return pool_key.key_scheme, pool_key.key_host, pool_key.key_port
+    return tuple(pool_key[:3])
+
+
+class OpenERPHTTPTransport(object):
+    """
+    A pooled, keep-alive HTTP transport.
+
+    :param pool_connections: number of per-host connection pools to keep (one per OpenERP server url)
+    :type pool_connections: int
+    :param pool_maxsize: maximum number of connections kept alive per host
+    :type pool_maxsize: int
+    :param pool_block: when True, a request waits for a free connection instead of opening
+                       an extra (non pooled) one when pool_maxsize is reached
+    :type pool_block: bool
+    :param idle_timeout: seconds after which the pooled connections to a host which has not been
+                         requested are dropped, they are re-opened on next request. None to keep
+                         them forever.
+    :type idle_timeout: float
+    :param timeout: default timeout (in seconds) passed to each request. None to wait forever.
+    :type timeout: float
+    """
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False, idle_timeout=None, timeout=None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+
+        self._session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=pool_connections,
+                                    pool_maxsize=pool_maxsize,
+                                    pool_block=pool_block)
+        self._session.mount('http://', self._adapter)
+        self._session.mount('https://', self._adapter)
+
+        self._lock = threading.Lock()
+        self._last_used = {}  # (scheme, host, port) => time of the last request
+
+    @property
+    def cookies(self):
+        """Cookie jar shared by all requests (holds the 'sid' cookie)"""
+        return self._session.cookies
+
+    def post(self, url, data, **kwargs):
+        """
+        POST data to url using a pooled connection.
+
+        :param url: url to post to
+        :param data: request body
+        :param kwargs: any other requests.Session.post() keyword argument
+        :return: the server response
+        :rtype: requests.Response
+        """
+        self._drop_idle_connections(url)
+        kwargs.setdefault('timeout', self.timeout)
+        return self._session.post(url, data=data, **kwargs)
+
+    def _drop_idle_connections(self, url):
+        """Closes the pools of the hosts, including the one of url, not requested for idle_timeout seconds"""
+        if self.idle_timeout is None:
+            return
+        now = time.time()
+        with self._lock:
+            expired = set(host for host, used in self._last_used.items() if now - used > self.idle_timeout)
+            for host in expired:
+                del self._last_used[host]
+            self._last_used[_host_key(url)] = now
+        if expired:
+            # connections have been idle for too long, server or proxies may have closed them
+            pools = self._adapter.poolmanager.pools
+            for pool_key in pools.keys():
+                if _pool_host_key(pool_key) in expired:
+                    pools.pop(pool_key, None)
+
+    def close(self):
+        """Close all pooled connections"""
+        self._session.close()
@@ -0,0 +1,145 @@
+# coding: utf8
+"""
+Write-behind buffering of write() calls.
+
+Pending writes are merged per record (last write wins, x2many commands are appended) then, on
+flush, records sharing identical values are written with one write(ids, vals) call. The buffer is
+flushed when max_pending records are pending, flush_interval seconds after the first pending write
+or explicitly. Failures of the flushes made on size or by the timer are raised by the next add() or
+flush() as one OpenERPWriteBufferError.
+"""
+import collections
+import json
+import threading
+
+
+class OpenERPWriteBufferError(BaseException):
+    """
+    Raised when buffered writes failed. failed lists (ids, vals, kwargs, exception) of each of them.
+    """
+    def __init__(self, failed):
+        BaseException.__init__(self, failed)
+        self.failed = failed
+
+    def __str__(self):
+        return "%d buffered write(s) failed, first one on ids %s: %s" % (len(self.failed), self.failed[0][0],
+                                                                         self.failed[0][3])
+
+
+class OpenERPWriteBuffer(object):
+    """
+    :param dispatch: callable receiving (ids, vals, kwargs) which performs one write and returns
+                     the exception raised by the call or None
+    :param max_pending: number of pending records which triggers a flush
+    :type max_pending: int
+    :param flush_interval: seconds after which pending writes are flushed by a timer thread.
+                           None to flush only on size or explicitly.
+    :type flush_interval: float
+    """
+    def __init__(self, dispatch, max_pending=1000, flush_interval=None):
+        self._dispatch = dispatch
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # flushes are serialized to keep writes in order
+        self._pending = collections.OrderedDict()  # kwargs key => (kwargs, OrderedDict of id => vals)
+        self._pending_count = 0
+        self._timer = None
+        self.failed = []  # (ids, vals, kwargs, exception) of failed writes
+        self._unreported = []  # failed writes of flushes made on size or by the timer, not raised yet
+        self.stats = {'writes': 0, 'calls': 0}
+
+    def __len__(self):
+        """number of records with pending writes"""
+        return self._pending_count
+
+    @staticmethod
+    def _merge(pending_vals, vals):
+        for field, value in vals.items():
+            previous = pending_vals.get(field)
+            if isinstance(value, list) and isinstance(previous, list):
+                # x2many commands are applied one after the other
+                pending_vals[field] = previous + value
+            else:
+                pending_vals[field] = value
+
+    def add(self, ids, vals, kwargs=None):
+        """
+        Buffer a write(ids, vals, **kwargs) call.
+
+        :raise OpenERPWriteBufferError: when writes flushed on size or by the timer failed since the
+                                        last add() or flush(). The call is not buffered then.
+        """
+        self._raise_unreported()
+        kwargs = kwargs or {}
+        key = json.dumps(kwargs, sort_keys=True)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = self._pending[key] = (kwargs, collections.OrderedDict())
+            records = entry[1]
+            for id in ids if isinstance(ids, (list, tuple)) else [ids]:
+                if id not in records:
+                    records[id] = {}
+                    self._pending_count += 1
+                self._merge(records[id], vals)
+            self.stats['writes'] += 1
+            flush = self._pending_count >= self.max_pending
+            if not flush and self.flush_interval is not None and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._background_flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush:
+            self._background_flush()
+
+    def _background_flush(self):
+        # nobody waits for the result, failures are raised by the next add() or flush()
+        failed = self._flush()
+        with self._lock:
+            self._unreported.extend(failed)
+
+    def _raise_unreported(self, failed=()):
+        with self._lock:
+            unreported, self._unreported = self._unreported, []
+        if unreported:
+            raise OpenERPWriteBufferError(unreported + list(failed))
+
+    def flush(self):
+        """
+        Sends pending writes: one write() per group of records sharing identical values.
+        Failed writes are appended to failed, they don't stop the others.
+
+        :return: list of (ids, vals, kwargs, exception) of the writes which failed during this flush
+        :rtype: list
+        :raise OpenERPWriteBufferError: when writes flushed on size or by the timer failed since the
+                                        last add() or flush(). It carries them and those of this flush.
+        """
+        failed = self._flush()
+        self._raise_unreported(failed)
+        return failed
+
+    def _flush(self):
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, collections.OrderedDict()
+                self._pending_count = 0
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+            failed = []
+            for kwargs, records in pending.values():
+                groups = collections.OrderedDict()  # vals json => (vals, ids)
+                for id, vals in records.items():
+                    groups.setdefault(json.dumps(vals, sort_keys=True), (vals, []))[1].append(id)
+                for vals, ids in groups.values():
+                    exception = self._dispatch(ids, vals, kwargs)
+                    if exception is not None:
+                        failed.append((ids, vals, kwargs, exception))
+                    self.stats['calls'] += 1
+            self.failed.extend(failed)
+            return failed
+
+    def close(self):
+        """Flush and stop the timer"""
+        return self.flush()
@@ -0,0 +1,114 @@
+# coding: utf8
+"""
+Bulk resolution of external ids (xmlids) using ir.model.data.
+"""
+import threading
+
+
+class OpenERPXMLIDResolverBase(object):
+    """
+    The resolved xmlids cache and the ir.model.data queries shared by OpenERPXMLIDResolver
+    and its asyncio flavor, which only differ in the way queries are sent.
+
+    :param json_rpc_client: client used to query ir.model.data
+    :param chunk_size: maximum number of xmlids resolved per call
+    :type chunk_size: int
+    """
+    FIELDS = ['module', 'name', 'model', 'res_id']
+
+    def __init__(self, json_rpc_client, chunk_size=1000):
+        self._json_rpc_client = json_rpc_client
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._references = {}  # xmlid => (model, res_id)
+
+    def _store(self, records):
+        references = dict(('%s.%s' % (record['module'], record['name']), (record['model'], record['res_id']))
+                          for record in records)
+        with self._lock:
+            self._references.update(references)
+
+    def _missing_domains(self, xmlids):
+        """:return: one ir.model.data domain per chunk of the xmlids not resolved yet"""
+        with self._lock:
+            missing = [xmlid for xmlid in set(xmlids) if xmlid not in self._references]
+
+        domains = []
+        for start in range(0, len(missing), self.chunk_size):
+            names_by_module = {}
+            for xmlid in missing[start:start + self.chunk_size]:
+                module, _, name = xmlid.partition('.')
+                names_by_module.setdefault(module, []).append(name)
+
+            # ['|', '&', (module, =, m1), (name, in, [...]), '&', (module, =, m2), (name, in, [...])]
+            domain = ['|'] * (len(names_by_module) - 1)
+            for module, names in names_by_module.items():
+                domain += ['&', ('module', '=', module), ('name', 'in', names)]
+            domains.append(domain)
+        return domains
+
+    def _resolved(self, xmlids):
+        with self._lock:
+            return dict((xmlid, self._references[xmlid]) for xmlid in xmlids if xmlid in self._references)
+
+    @staticmethod
+    def _object_reference(references, xmlid):
+        if xmlid not in references:
+            raise ValueError('No such external ID currently defined in the system: %s' % xmlid)
+        return references[xmlid]
+
+    def clear(self):
+        with self._lock:
+            self._references.clear()
+
+
+class OpenERPXMLIDResolver(OpenERPXMLIDResolverBase):
+    """
+    Resolves 'module.name' xmlids into (model, res_id) tuples.
+
+    xmlids are resolved by chunks of chunk_size with one ir.model.data search_read per chunk.
+    Resolved xmlids are kept in memory so that each one is asked to the server only once.
+
+    :param json_rpc_client: client used to query ir.model.data
+    :type json_rpc_client: OpenERPJSONRPCClient
+    :param chunk_size: maximum number of xmlids resolved per call
+    :type chunk_size: int
+    """
+    def resolve(self, xmlids, context={}):
+        """
+        Resolve a list of xmlids.
+
+        :param xmlids: list of 'module.name' strings
+        :return: a dict of {xmlid: (model, res_id)}. Unknown xmlids are missing from the dict.
+        :rtype: dict
+        """
+        for domain in self._missing_domains(xmlids):
+            records = self._json_rpc_client.dataset_search_read('ir.model.data',
+                                                                 fields=self.FIELDS,
+                                                                 domain=domain,
+                                                                 context=context)['records']
+            self._store(records)
+        return self._resolved(xmlids)
+
+    def get_object_reference(self, module, name, context={}):
+        """
+        ir.model.data.get_object_reference() equivalent
+
+        :return: a (model, res_id) tuple
+        :raise ValueError: if xmlid does not exist
+        """
+        xmlid = '%s.%s' % (module, name)
+        return self._object_reference(self.resolve([xmlid], context=context), xmlid)
+
+    def preload(self, modules, context={}):
+        """
+        Resolve all xmlids of some modules at once.
+
+        :param modules: list of module names
+        """
+        records = self._json_rpc_client.iter_search_read('ir.model.data',
+                                                         domain=[('module', 'in', list(modules))],
+                                                         fields=self.FIELDS,
+                                                         page_size=self.chunk_size * 10,
+                                                         context=context)
+        self._store(records)
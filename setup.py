@@ -20,9 +20,13 @@ setup(
     classifiers=[
         "Development Status :: 4 - Beta",
         'Programming Language :: Python :: 2.7',
+        'Programming Language :: Python :: 3',
         'Intended Audience :: Developers',
         'License :: OSI Approved :: BSD License',
         'Topic :: Internet :: WWW/HTTP'
     ],
     install_requires = ['requests>=1.1.0', ],
+    extras_require = {
+        'async': ['aiohttp>=3.0', ],
+    },
 )
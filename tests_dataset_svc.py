@@ -87,6 +87,16 @@ class TestDatasetService(unittest.TestCase):
             print "data.fault_code: %s" % exc.data['fault_code']
             raise exc
 
+    def test_055_iter_search_read(self):
+        """test iter_search_read() keyset pagination"""
+        result = self.server.session_authenticate("test_dataset", "admin", "admin")
+        self.assertTrue(result, "Failed to authenticate against test_dataset database")
+
+        all_views = self.server.dataset_search_read("ir.ui.view", fields=['name'], sort='id')['records']
+        for prefetch in (False, True):
+            views = list(self.server.iter_search_read("ir.ui.view", fields=['name'], page_size=7, prefetch=prefetch))
+            self.assertEqual([v['id'] for v in views], [v['id'] for v in all_views])
+
     def NOtest_060_exec_workflow(self):
         """test exec_workflow via Model proxy"""
 
@@ -0,0 +1,102 @@
+# coding: utf8
+"""
+AsyncOpenERPJSONRPCClient tests (Python 3 only) run against the bundled OpenERP stand-in server.
+"""
+import asyncio
+import unittest
+
+from openerp_jsonrpc_client import OpenERPJSONRPCClient, OpenERPJSONRPCClientBase
+from openerp_jsonrpc_client.aio import AsyncOpenERPJSONRPCClient, aiohttp
+from openerp_jsonrpc_client.testing import OpenERPStandInServer
+from tests_offline_client import OfflineTestCase
+
+
+@unittest.skipIf(aiohttp is None, "requires Python 3 and aiohttp")
+class TestAsyncClient(OfflineTestCase):
+
+    def test_010_concurrent_reads(self):
+        async def main():
+            async with AsyncOpenERPJSONRPCClient(self.stand_in.url, max_concurrency=5) as server:
+                await server.session_authenticate(OpenERPStandInServer.DEFAULT_DB, 'admin', 'admin')
+                partner_obj = server.get_model('res.partner')
+                return await asyncio.gather(*[partner_obj.read(partner_id, ['name']) for partner_id in range(2, 22)])
+
+        partners = asyncio.run(main())
+        self.assertEqual([partner['id'] for partner in partners], list(range(2, 22)))
+
+    def run_with_client(self, test):
+        async def main():
+            async with AsyncOpenERPJSONRPCClient(self.stand_in.url, max_concurrency=5) as server:
+                await server.session_authenticate(OpenERPStandInServer.DEFAULT_DB, 'admin', 'admin')
+                return await test(server)
+        return asyncio.run(main())
+
+    def test_020_get_object_reference(self):
+        async def test(server):
+            reference = await server.get_object_reference('standin', 'partner_1')
+            calls = self.server_calls('dataset/search_read')
+            self.assertEqual(await server.get_object_reference('standin', 'partner_1'), reference)
+            self.assertEqual(self.server_calls('dataset/search_read'), calls)
+            with self.assertRaises(ValueError):
+                await server.get_object_reference('standin', 'no_such_xmlid')
+            return reference
+
+        self.assertEqual(self.run_with_client(test), ('res.partner', 2))
+
+    def test_030_iter_search_read(self):
+        expected_ids = self.server.get_model('res.partner').search([], order='id')
+
+        async def test(server):
+            pages = []
+            for prefetch in (False, True):
+                pages.append([record['id'] async for record in server.iter_search_read('res.partner',
+                                                                                      fields=['name'],
+                                                                                      page_size=7,
+                                                                                      prefetch=prefetch)])
+            # stopping early cancels the prefetched page
+            async for record in server.iter_search_read('res.partner', page_size=7, prefetch=True):
+                break
+            return pages
+
+        self.assertEqual(self.run_with_client(test), [expected_ids, expected_ids])
+
+    def test_040_reauthenticate(self):
+        async def test(server):
+            partner_obj = server.get_model('res.partner')
+            session_id = server._session_id
+            self.stand_in.expire_sessions()
+            partners = await asyncio.gather(*[partner_obj.read(partner_id, ['name']) for partner_id in (2, 3, 4)])
+            self.assertNotEqual(server._session_id, session_id)
+            return partners
+
+        self.assertEqual([partner['name'] for partner in self.run_with_client(test)],
+                         ['Partner 1', 'Partner 2', 'Partner 3'])
+
+    def test_050_shared_base(self):
+        async def test(server):
+            self.assertIsInstance(server, OpenERPJSONRPCClientBase)
+            self.assertNotIsInstance(server, OpenERPJSONRPCClient)
+            for name in ('map', 'record_environment', 'export_session', 'download', 'oe_jsonrpc_stream'):
+                self.assertFalse(hasattr(server, name), name)
+
+            self.assertIn(OpenERPStandInServer.DEFAULT_DB, await server.db_get_list())
+            self.assertIn(OpenERPStandInServer.DEFAULT_DB, await server.get_service('database').get_list())
+
+            calls = self.server_calls('dataset/search_read')
+            references = await server.xmlid_resolver.resolve(['standin.partner_1', 'standin.partner_2',
+                                                              'standin.no_such_xmlid'])
+            self.assertEqual(self.server_calls('dataset/search_read'), calls + 1)
+            self.assertEqual(await server.get_object_reference('standin', 'partner_2'), ('res.partner', 3))
+            self.assertEqual(self.server_calls('dataset/search_read'), calls + 1)
+
+            server.xmlid_resolver.clear()
+            await server.xmlid_resolver.preload(['standin'])
+            self.assertEqual(await server.get_object_reference('standin', 'partner_3'), ('res.partner', 4))
+            return references
+
+        self.assertEqual(self.run_with_client(test), {'standin.partner_1': ('res.partner', 2),
+                                                       'standin.partner_2': ('res.partner', 3)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,997 @@
+# coding: utf8
+"""
+Tests run against the bundled OpenERP stand-in server. No OpenERP server is required.
+"""
+import array
+import gc
+import io
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+import weakref
+
+from openerp_jsonrpc_client import *
+from openerp_jsonrpc_client import codec, columnar
+import openerp_jsonrpc_client.transport
+from openerp_jsonrpc_client.balancer import OpenERPLoadBalancedClient, OpenERPNodeSet
+from openerp_jsonrpc_client.pool import OpenERPSessionPool, OpenERPSessionPoolClosedError, \
+    OpenERPSessionPoolExhaustedError
+from openerp_jsonrpc_client.testing import OpenERPStandInServer
+
+
+class OfflineTestCase(unittest.TestCase):
+    RECORDS = 120
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stand_in = OpenERPStandInServer(records=cls.RECORDS).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stand_in.stop()
+
+    def setUp(self):
+        self.server = OpenERPJSONRPCClient(self.stand_in.url)
+        self.server.session_authenticate(OpenERPStandInServer.DEFAULT_DB, 'admin', 'admin')
+
+    def tearDown(self):
+        self.server.close()
+
+    def server_calls(self, name):
+        return self.stand_in.stats['calls'].get(name, 0)
+
+
+class TestStandInServer(OfflineTestCase):
+
+    def test_010_session(self):
+        session_info = self.server.session_get_info()
+        self.assertEqual(session_info['uid'], 1)
+        self.assertEqual(self.server.user_context['uid'], 1)
+
+    def test_020_unauthenticated_call(self):
+        server = OpenERPJSONRPCClient(self.stand_in.url)
+        with self.assertRaises(OpenERPJSONRPCClientException) as cm:
+            server.get_model('res.partner').search([])
+        self.assertEqual(cm.exception.data['type'], 'session_invalid')
+
+    def test_030_database(self):
+        self.server.db_create('admin', 'test_offline', False, 'en_US', 'admin')
+        self.server.db_duplicate('admin', 'test_offline', 'test_offline_bis')
+        self.assertTrue({'test_offline', 'test_offline_bis'} <= set(self.server.db_get_list()))
+        self.server.db_drop('admin', 'test_offline')
+        self.server.db_drop('admin', 'test_offline_bis')
+        self.assertEqual(self.server.db_get_list(), [OpenERPStandInServer.DEFAULT_DB])
+
+    def test_040_model_proxy(self):
+        partner_obj = self.server.get_model('res.partner')
+        partner_id = partner_obj.create({'name': 'Cyril'})
+        self.assertTrue(partner_obj.write([partner_id], {'ref': 'CM'}))
+        self.assertEqual(partner_obj.read(partner_id, ['ref'])['ref'], 'CM')
+        self.assertEqual(partner_obj.search([('ref', '=', 'CM')]), [partner_id])
+        partner_obj.unlink([partner_id])
+        self.assertEqual(partner_obj.search([('ref', '=', 'CM')]), [])
+
+    def test_050_server_error(self):
+        with self.assertRaises(OpenERPJSONRPCClientException) as cm:
+            self.server.get_model('res.partner').no_such_method()
+        self.assertEqual(cm.exception.code, 200)
+
+
+class TestClient(OfflineTestCase):
+
+    def test_010_shared_params_are_not_modified(self):
+        params = {'context': {}}
+        self.server.oe_jsonrpc(self.server._url_for_method('session', 'get_session_info'), 'call', params)
+        self.assertEqual(params, {'context': {}})
+
+    def test_020_threads_share_one_client(self):
+        partner_obj = self.server.get_model('res.partner')
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(10):
+                    partner_obj.read([2], ['name'])
+            except BaseException as exc:
+                errors.append(exc)
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_025_transport_idle_eviction(self):
+        transport = OpenERPHTTPTransport(idle_timeout=60, timeout=5)
+        local_url = self.stand_in.url.replace('127.0.0.1', 'localhost')
+        data = '{"jsonrpc": "2.0", "method": "call", "params": {}, "id": 1}'
+        for url in (self.stand_in.url, local_url):
+            self.assertEqual(transport.post(url + '/web/session/get_session_info', data).status_code, 200)
+        self.assertEqual(len(transport._adapter.poolmanager.pools), 2)
+
+        # only the pool of the host not requested for idle_timeout seconds is closed
+        stand_in_host = openerp_jsonrpc_client.transport._host_key(self.stand_in.url)
+        transport._last_used[stand_in_host] -= 61
+        transport.post(local_url + '/web/session/get_session_info', data)
+        self.assertEqual([key.key_host for key in transport._adapter.poolmanager.pools.keys()], ['localhost'])
+        self.assertNotIn(stand_in_host, transport._last_used)
+        transport.close()
+
+        server = OpenERPJSONRPCClient(self.stand_in.url, timeout=5)
+        self.assertEqual(server.transport.timeout, 5)
+
+    def test_030_codecs(self):
+        server = OpenERPJSONRPCClient(self.stand_in.url, codec=OpenERPJSONCodec())
+        server.session_authenticate(OpenERPStandInServer.DEFAULT_DB, 'admin', 'admin')
+        self.assertEqual(server.get_model('res.partner').read([2], ['name']),
+                         self.server.get_model('res.partner').read([2], ['name']))
+
+    @unittest.skipIf(codec.ujson is None, "requires ujson")
+    def test_035_ujson_codec(self):
+        request = {
+            'jsonrpc': '2.0', 'method': 'call', 'id': 3,
+            'params': {
+                'model': 'res.partner', 'method': 'write', 'args': [[2, 3], {
+                    'name': u'Soci\xe9t\xe9 "A/B"\n\U0001f600', 'credit_limit': 1250.75, 'active': True,
+                    'parent_id': False, 'comment': None, 'category_id': [[6, 0, [1, 2]]]}],
+                'kwargs': {'context': {'lang': 'fr_FR', 'tz': 'Europe/Paris', 1: 'non str key'}},
+            },
+        }
+        encoded = OpenERPUjsonCodec().encode(request)
+        self.assertIsInstance(encoded, bytes)
+        self.assertEqual(encoded, OpenERPJSONCodec().encode(request))
+
+    def test_040_iter_search_read(self):
+        expected = self.server.dataset_search_read('res.partner', fields=['name'], sort='id')['records']
+        for prefetch in (False, True):
+            records = list(self.server.iter_search_read('res.partner', fields=['name'], page_size=7,
+                                                        prefetch=prefetch))
+            self.assertEqual(records, expected)
+
+    def test_050_stream(self):
+        expected = self.server.dataset_search_read('res.partner', fields=['name', 'category_id'])['records']
+        records = list(self.server.dataset_search_read('res.partner', fields=['name', 'category_id'], stream=True))
+        self.assertEqual(records, expected)
+        with self.assertRaises(OpenERPJSONRPCClientException):
+            list(self.server.dataset_call_kw_stream('res.partner', 'no_such_method'))
+
+    def test_060_map(self):
+        results = list(self.server.map('res.partner', 'read', [[2], [3], [99999], [4]], max_workers=3))
+        self.assertEqual([result.index for result in results], [0, 1, 2, 3])
+        self.assertEqual([result.ok for result in results], [True, True, True, True])
+        self.assertEqual(results[1].result[0]['id'], 3)
+
+        results = list(self.server.map('res.partner', 'write', [([2], {'ref': 'R2'}), ([99999], {'ref': 'X'})]))
+        self.assertTrue(results[0].ok)
+        self.assertIsInstance(results[1].exception, OpenERPJSONRPCClientException)
+
+    def test_065_map_unordered(self):
+        lock = threading.Lock()
+        stalled = [0.5]  # seconds the first call_kw request stalls
+
+        def latency(service, method):
+            with lock:
+                return stalled.pop() if stalled and method == 'call_kw' else 0
+        self.stand_in.latency = latency
+        try:
+            start = time.time()
+            completions = [(result.index, time.time() - start)
+                           for result in self.server.map('res.partner', 'read', [[id] for id in range(2, 8)],
+                                                         max_workers=3, ordered=False)]
+        finally:
+            self.stand_in.latency = 0.0
+        self.assertEqual(sorted(index for index, _ in completions), list(range(6)))
+        # results are yielded as they complete, the stalled call comes last
+        self.assertLess(completions[0][1], 0.3)
+        self.assertGreaterEqual(completions[-1][1], 0.5)
+        self.assertLess(completions[-2][1], 0.3)
+
+    def test_070_batched_model(self):
+        partner_obj = self.server.get_batched_model('res.partner')
+        reads_before = self.server_calls('res.partner.read')
+        deferred = [partner_obj.read(partner_id, ['name']) for partner_id in range(2, 12)]
+        self.assertFalse(any(result.done() for result in deferred))
+        self.assertEqual(self.server_calls('res.partner.read'), reads_before)
+        self.assertEqual([result.result()['id'] for result in deferred], list(range(2, 12)))
+        self.assertTrue(all(result.done() for result in deferred))
+        self.assertEqual(self.server_calls('res.partner.read'), reads_before + 1)
+        self.assertEqual(partner_obj.read([2, 999999, 3], ['name']).result(), [deferred[0].result(),
+                                                                               deferred[1].result()])
+
+    def test_075_batched_model_window(self):
+        partner_obj = self.server.get_batched_model('res.partner', window=0.3)
+        reads_before = self.server_calls('res.partner.read')
+        names = {}
+
+        def read(partner_id):
+            # the result is asked at once, other threads join the batch during the window
+            names[partner_id] = partner_obj.read(partner_id, ['name']).result()['name']
+        threads = [threading.Thread(target=read, args=(partner_id,)) for partner_id in range(2, 12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(names, dict((partner_id, 'Partner %d' % (partner_id - 1)) for partner_id in range(2, 12)))
+        self.assertEqual(self.server_calls('res.partner.read'), reads_before + 1)
+
+    def test_080_metadata_cache(self):
+        server = OpenERPJSONRPCClient(self.stand_in.url, metadata_cache=OpenERPMetadataCache())
+        server.session_authenticate(OpenERPStandInServer.DEFAULT_DB, 'admin', 'admin')
+        calls_before = self.server_calls('res.partner.fields_get')
+        fields = server.get_model('res.partner').fields_get()
+        self.assertEqual(server.get_model('res.partner').fields_get(), fields)
+        self.assertEqual(self.server_calls('res.partner.fields_get'), calls_before + 1)
+
+    def test_083_metadata_cache_eviction(self):
+        cache = OpenERPMetadataCache(max_size=2, ttl=0.2)
+        server = OpenERPJSONRPCClient(self.stand_in.url, metadata_cache=cache)
+        server.session_authenticate(OpenERPStandInServer.DEFAULT_DB, 'admin', 'admin')
+
+        def fields_get(*models):
+            for model in models:
+                server.get_model(model).fields_get()
+            return cache.hits, cache.misses
+
+        # least recently used answer is evicted first
+        self.assertEqual(fields_get('res.partner', 'res.users', 'res.partner'), (1, 2))
+        self.assertEqual(fields_get('res.partner.category', 'res.partner', 'res.users'), (2, 4))
+        self.assertEqual(len(cache), 2)
+        # expired answers are asked again
+        time.sleep(0.3)
+        self.assertEqual(fields_get('res.users'), (2, 5))
+
+    def test_085_metadata_cache_persistence(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'metadata.json')
+            cache = OpenERPMetadataCache(path=path, save_interval=None)
+            server = OpenERPJSONRPCClient(self.stand_in.url, metadata_cache=cache)
+            server.session_authenticate(OpenERPStandInServer.DEFAULT_DB, 'admin', 'admin')
+            fields = server.get_model('res.partner').fields_get()
+            # misses are not written one by one
+            self.assertFalse(os.path.exists(path))
+            cache.close()
+            self.assertTrue(os.path.exists(path))
+
+            # another process reloads the answers
+            calls_before = self.server_calls('res.partner.fields_get')
+            server.metadata_cache = OpenERPMetadataCache(path=path)
+            self.assertEqual(server.get_model('res.partner').fields_get(), fields)
+            self.assertEqual(self.server_calls('res.partner.fields_get'), calls_before)
+            self.assertEqual(server.metadata_cache.hits, 1)
+
+            # expired answers are not reloaded
+            cache = OpenERPMetadataCache(path=path, ttl=0)
+            server.metadata_cache = cache
+            server.get_model('res.users').fields_get()
+            cache.flush()
+            self.assertEqual(len(OpenERPMetadataCache(path=path)), 1)
+
+            # a truncated file is ignored, then overwritten
+            with open(path) as cache_file:
+                content = cache_file.read()
+            with open(path, 'w') as cache_file:
+                cache_file.write(content[:len(content) // 2])
+            cache = OpenERPMetadataCache(path=path, save_interval=None)
+            self.assertEqual(len(cache), 0)
+            server.metadata_cache = cache
+            server.get_model('res.users').fields_get()
+            cache.close()
+            self.assertEqual(len(OpenERPMetadataCache(path=path)), 1)
+
+            # caches are not kept alive to be flushed at exit
+            cache_ref = weakref.ref(OpenERPMetadataCache(path=path))
+            gc.collect()
+            self.assertIsNone(cache_ref())
+        finally:
+            shutil.rmtree(directory)
+
+    def test_090_xmlid_resolver(self):
+        references = self.server.xmlid_resolver.resolve(['standin.partner_%d' % i for i in range(1, 50)]
+                                                        + ['standin.no_such_xmlid'])
+        self.assertEqual(len(references), 49)
+        self.assertEqual(self.server.get_object_reference('standin', 'partner_1'), references['standin.partner_1'])
+        with self.assertRaises(ValueError):
+            self.server.get_object_reference('standin', 'no_such_xmlid')
+
+    def test_095_xmlid_preload(self):
+        resolver = OpenERPXMLIDResolver(self.server)
+        calls_before = self.server_calls('dataset/search_read')
+        resolver.preload(['standin'])
+        self.assertEqual(self.server_calls('dataset/search_read'), calls_before + 1)
+        xmlids = ['standin.partner_%d' % i for i in range(1, self.RECORDS + 1)]
+        references = resolver.resolve(xmlids)
+        # all xmlids of the module are known, none is asked again
+        self.assertEqual(self.server_calls('dataset/search_read'), calls_before + 1)
+        self.assertEqual(len(references), self.RECORDS)
+        self.assertEqual(references['standin.partner_1'], ('res.partner', 2))
+
+    def test_100_instrumentation(self):
+        metrics = self.server.add_hook(OpenERPMetricsCollector(slow_call_threshold=60))
+        calls = []
+
+        class Recorder(OpenERPCallHook):
+            def after_call(self, call_info):
+                calls.append(call_info)
+        self.server.add_hook(Recorder())
+
+        partner_obj = self.server.get_model('res.partner')
+        partner_obj.read([2], ['name'])
+        with self.assertRaises(OpenERPJSONRPCClientException):
+            partner_obj.no_such_method()
+        list(self.server.dataset_search_read('res.partner', fields=['name'], stream=True))
+
+        self.assertEqual([call_info.key for call_info in calls],
+                         ['res.partner.read', 'res.partner.no_such_method', 'dataset/search_read'])
+        self.assertTrue(calls[0].request_size and calls[0].response_size and calls[0].network_time)
+        self.assertEqual(calls[1].error['code'], 200)
+        self.assertGreater(calls[2].response_size, self.RECORDS * 10)
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['res.partner.read']['calls'], 1)
+        self.assertEqual(snapshot['res.partner.no_such_method']['errors'], 1)
+        self.assertEqual(sum(count for _, count in snapshot['dataset/search_read']['histogram']), 1)
+        self.assertEqual(len(metrics.hot_calls(limit=2)), 2)
+
+    def test_110_reauthenticate(self):
+        authentications_before = self.server_calls('session/authenticate')
+        self.stand_in.expire_sessions()
+        self.assertEqual(self.server.get_model('res.partner').read([2], ['id']), [{'id': 2}])
+        self.assertEqual(self.server_calls('session/authenticate'), authentications_before + 1)
+
+        # streamed calls too
+        self.stand_in.expire_sessions()
+        self.assertEqual(list(self.server.dataset_call_kw_stream('res.partner', 'read', [2, 3], ['id'])),
+                         [{'id': 2}, {'id': 3}])
+        self.assertEqual(self.server_calls('session/authenticate'), authentications_before + 2)
+
+        server = OpenERPJSONRPCClient(self.stand_in.url, auto_reauthenticate=False)
+        server.session_authenticate(OpenERPStandInServer.DEFAULT_DB, 'admin', 'admin')
+        self.stand_in.expire_sessions()
+        with self.assertRaises(OpenERPJSONRPCClientException) as cm:
+            server.get_model('res.partner').read([2], ['id'])
+        self.assertEqual(cm.exception.code, 100)
+
+    def test_120_lazy_connection(self):
+        handshakes_before = self.server_calls('session/get_session_info')
+        server = OpenERPJSONRPCClient('http://127.0.0.1:1')  # nothing listens there
+        server = OpenERPJSONRPCClient(self.stand_in.url)
+        self.assertEqual(self.server_calls('session/get_session_info'), handshakes_before)
+        self.assertIn(OpenERPStandInServer.DEFAULT_DB, server.db_get_list())
+        self.assertEqual(self.server_calls('session/get_session_info'), handshakes_before + 1)
+
+    def test_130_persisted_session(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'session.json')
+            self.server.save_session(path)
+
+            server = OpenERPJSONRPCClient(self.stand_in.url)
+            self.assertFalse(server.load_session(os.path.join(directory, 'no_such_file.json')))
+            calls_before = (self.server_calls('session/get_session_info'), self.server_calls('session/authenticate'))
+            self.assertTrue(server.load_session(path))
+            self.assertEqual(server.get_model('res.partner').read([2], ['id']), [{'id': 2}])
+            self.assertEqual(server.user_context, self.server.user_context)
+            self.assertEqual((self.server_calls('session/get_session_info'), self.server_calls('session/authenticate')),
+                             calls_before)
+
+            # the restored session expired, credentials are used to re-authenticate
+            self.stand_in.expire_sessions()
+            server.set_credentials(OpenERPStandInServer.DEFAULT_DB, 'admin', 'admin')
+            self.assertEqual(server.get_model('res.partner').read([2], ['id']), [{'id': 2}])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_140_bulk(self):
+        partner_obj = self.server.get_model('res.partner')
+        values = [{'name': 'Bulk %d' % i, 'ref': 'BULK'} for i in range(95)]
+        values[42]['color'] = 'not a number'
+        loads_before, creates_before = self.server_calls('res.partner.load'), self.server_calls('res.partner.create')
+        results = partner_obj.create_many(values, chunk_size=10, max_workers=3)
+        # one call per chunk, none per record
+        self.assertEqual(self.server_calls('res.partner.load') - loads_before, len(results))
+        self.assertLess(len(results), 20)
+        self.assertEqual(self.server_calls('res.partner.create'), creates_before)
+        failed = [result for result in results if not result.ok]
+        self.assertEqual(len(failed), 1)
+        # no record of the failed chunk is created, all of them are reported
+        self.assertIn(values[42], failed[0].args)
+        self.assertIsNone(failed[0].result)
+        self.assertIsInstance(failed[0].exception, OpenERPJSONRPCClientLoadError)
+        self.assertEqual([message['record'] for message in failed[0].exception.messages],
+                         [failed[0].args.index(values[42])])
+        failed_names = [vals['name'] for vals in failed[0].args]
+        self.assertEqual(partner_obj.search([('ref', '=', 'BULK'), ('name', 'in', failed_names)]), [])
+        ids = [id for result in results if result.ok for id in result.result]
+        self.assertEqual(len(ids), 95 - len(failed[0].args))
+
+        self.assertTrue(all(result.ok for result in partner_obj.write_many(ids, {'ref': 'BULK2'}, chunk_size=7)))
+        self.assertEqual(sorted(partner_obj.search([('ref', '=', 'BULK2')])), sorted(ids))
+        self.assertTrue(all(result.ok for result in partner_obj.unlink_many(ids, chunk_size=7, max_workers=2)))
+        self.assertEqual(partner_obj.search([('ref', 'in', ['BULK', 'BULK2'])]), [])
+
+        # OpenERP 7 create() does not accept a list of values
+        results = partner_obj.create_many(values[:3], multi_create=True)
+        self.assertIsInstance(results[0].exception, OpenERPJSONRPCClientException)
+
+        # a failed chunk shrinks the next ones
+        results = partner_obj.create_many(values, chunk_size=10, target_duration=None)
+        self.assertEqual([len(result.args) for result in results[3:7]], [10, 10, 5, 5])
+        partner_obj.unlink_many([id for result in results if result.ok for id in result.result])
+
+    def test_150_adaptive_chunker(self):
+        chunker = OpenERPAdaptiveChunker(chunk_size=10, target_duration=1.0, max_payload_size=10000)
+        chunker.record(10, 0.1)  # 10ms per record, 100 records per second
+        self.assertEqual(chunker.chunk_size, 20)  # grows at most twice
+        chunker.record(20, 0.2)
+        chunker.record(40, 0.4)
+        chunker.record(80, 0.8)
+        self.assertEqual(chunker.chunk_size, 100)
+        chunker.record(100, 1.0, payload_size=20000)  # 200 bytes per record
+        self.assertEqual(chunker.chunk_size, 50)
+        self.assertEqual([len(chunk) for chunk in chunker.chunks(range(120))], [50, 50, 20])
+        chunker.record_failure(50)
+        self.assertEqual(chunker.chunk_size, 25)
+
+    def test_160_write_buffer(self):
+        writes_before = self.server_calls('res.partner.write')
+        with self.server.get_buffered_model('res.partner', max_pending=1000) as partner_obj:
+            for partner_id in range(2, 42):
+                partner_obj.write([partner_id], {'ref': 'EVEN' if partner_id % 2 else 'ODD'})
+                partner_obj.write(partner_id, {'ref': 'EVEN' if partner_id % 2 == 0 else 'ODD', 'color': 3})
+            partner_obj.write([2], {'category_id': [(4, 1)]})
+            partner_obj.write([2], {'category_id': [(4, 2)]})
+            self.assertEqual(self.server_calls('res.partner.write'), writes_before)
+            # other calls see pending writes
+            self.assertEqual(len(partner_obj.search([('ref', '=', 'EVEN'), ('color', '=', 3)])), 20)
+            self.assertEqual(partner_obj.read(2, ['category_id'])['category_id'][-2:], [1, 2])
+        self.assertEqual(self.server_calls('res.partner.write'), writes_before + 3)
+
+        partner_obj = self.server.get_buffered_model('res.partner', max_pending=2, flush_interval=0.05)
+        # queued then flushed on size
+        self.assertTrue(partner_obj.write([2, 99999], {'ref': 'X'}))
+        self.assertEqual(len(partner_obj.write_buffer.failed), 1)
+        # the failure is raised by the next write, which is not queued
+        with self.assertRaises(OpenERPWriteBufferError) as cm:
+            partner_obj.write([4], {'ref': 'LOST'})
+        self.assertEqual(cm.exception.failed[0][0], [2, 99999])
+        partner_obj.write([3], {'ref': 'TIMER'})
+        time.sleep(0.3)
+        self.assertEqual(self.server.get_model('res.partner').read(3, ['ref'])['ref'], 'TIMER')
+        self.assertNotEqual(self.server.get_model('res.partner').read(4, ['ref'])['ref'], 'LOST')
+
+    def test_165_write_buffer_flush_interval(self):
+        partner_obj = self.server.get_buffered_model('res.partner', flush_interval=0.3)
+        writes_before = self.server_calls('res.partner.write')
+        for partner_id in (4, 5, 6):
+            partner_obj.write([partner_id], {'ref': 'INTERVAL'})
+        time.sleep(0.1)
+        self.assertEqual(self.server_calls('res.partner.write'), writes_before)
+        # flushed by the timer, without any other call on the proxy, in one coalesced write
+        time.sleep(0.5)
+        self.assertEqual(self.server_calls('res.partner.write'), writes_before + 1)
+        self.assertEqual(self.server.get_model('res.partner').search([('ref', '=', 'INTERVAL')]), [4, 5, 6])
+
+        # failures of timer flushes are raised as one exception by the next flush or when leaving the block
+        with self.assertRaises(OpenERPWriteBufferError) as cm:
+            with self.server.get_buffered_model('res.partner', flush_interval=0.05) as partner_obj:
+                partner_obj.write([99998], {'ref': 'INTERVAL'})
+                partner_obj.write([99999], {'ref': 'INTERVAL2'})
+                time.sleep(0.3)
+        self.assertEqual(sorted(failure[0] for failure in cm.exception.failed), [[99998], [99999]])
+
+        partner_obj = self.server.get_buffered_model('res.partner', flush_interval=0.05)
+        partner_obj.write([99999], {'ref': 'INTERVAL'})
+        time.sleep(0.3)
+        self.assertEqual(len(partner_obj.write_buffer), 0)
+        with self.assertRaises(OpenERPWriteBufferError) as cm:
+            partner_obj.flush()
+        self.assertEqual(len(cm.exception.failed), 1)
+        self.assertEqual(partner_obj.flush(), [])
+
+    def test_170_records(self):
+        partner_obj = self.server.get_model('res.partner')
+        partners = partner_obj.search_records([('parent_id', '!=', False)], limit=30)
+        self.assertEqual(len(partners), 30)
+        reads_before = self.server_calls('res.partner.read')
+        names = [(partner.name, partner.parent_id.name, partner.user_id.login) for partner in partners]
+        # one read for partners, one for their companies, one for users
+        self.assertEqual(self.server_calls('res.partner.read'), reads_before + 2)
+        self.assertEqual(names[0][1], partner_obj.read(partners[0].parent_id.id, ['name'])['name'])
+        self.assertEqual(names[0][2], 'admin')
+
+        categories = partners.mapped('category_id')
+        self.assertEqual(categories.model_name, 'res.partner.category')
+        self.assertTrue(all(name.startswith('Category') for name in categories.mapped('name')))
+        self.assertEqual(partners.mapped('parent_id.child_ids').filtered(lambda p: p in partners), partners)
+
+        with self.assertRaises(ValueError):
+            partners.name
+        with self.assertRaises(OpenERPJSONRPCClientException):
+            partners[0].no_such_method()
+
+        partners[:2].write({'ref': 'RECORDS'})
+        self.assertEqual(partners[0].ref, 'RECORDS')
+        self.assertEqual(partner_obj.browse(99999).name, False)
+
+    def test_175_records_related_ids(self):
+        env = self.server.record_environment
+        partners = self.server.get_model('res.partner').search_records([('parent_id', '!=', False)])
+        partners[0].parent_id
+        scans = []
+        cached_values = env.cached_values
+        env.cached_values = lambda *args: scans.append(args) or cached_values(*args)
+        parents = [partner.parent_id for partner in partners]
+        # related ids are computed once for the whole prefetch group, not once per record
+        self.assertEqual(len(scans), 0)
+        self.assertEqual(parents[-1]._prefetch_ids, parents[0]._prefetch_ids)
+        self.assertEqual(set(parents[0]._prefetch_ids), set(parent.id for parent in parents))
+
+        env.invalidate('res.partner')
+        partners[0].parent_id
+        self.assertEqual(len(scans), 1)
+        del env.cached_values
+
+    def test_180_columnar(self):
+        fields = ['name', 'color', 'credit_limit', 'customer', 'parent_id', 'category_id', 'ref']
+        expected = self.server.dataset_search_read('res.partner', fields=fields, sort='id')['records']
+        result = self.server.dataset_search_read('res.partner', fields=fields, sort='id', columnar=True)
+        self.assertIsInstance(result, OpenERPColumnarResult)
+        self.assertEqual(len(result), len(expected))
+        self.assertEqual(result.to_records(), expected)
+        self.assertEqual(result[-1], expected[-1])
+        self.assertEqual(result[5].parent_id, expected[5]['parent_id'])
+        self.assertEqual(result.column('color'), [record['color'] for record in expected])
+
+        pages = list(self.server.iter_search_read('res.partner', fields=fields, page_size=50, columnar=True))
+        self.assertEqual([len(page) for page in pages], [50, 50, len(expected) - 100])
+        self.assertEqual([row.to_dict() for page in pages for row in page], expected)
+
+        if columnar.numpy is not None:
+            arrays = result.to_numpy()
+            self.assertEqual(arrays['credit_limit'].sum(), sum(record['credit_limit'] for record in expected))
+            self.assertEqual(list(arrays['parent_id'][:3]), [0, 0, expected[2]['parent_id'][0]])
+
+        # integers beyond 32 bits fit, beyond 64 bits the column becomes a list
+        result = OpenERPColumnarResult({'size': 'integer'})
+        result.extend([{'id': 1, 'size': 2 ** 40}, {'id': 2, 'size': False}, {'id': 3, 'size': 2 ** 70}])
+        self.assertEqual(result.column('size'), [2 ** 40, False, 2 ** 70])
+        self.assertIsInstance(result.columns['id'].values, array.array)
+
+    def test_190_export(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'partners.csv')
+            progress = []
+            written = self.server.export_csv('res.partner', ['name', 'ref', 'parent_id'], path,
+                                             domain=[('id', '<', 11)], chunk_size=100,
+                                             progress=lambda done, total: progress.append((done, total)))
+            with open(path, 'rb') as export_file:
+                lines = export_file.read().decode('utf-8').splitlines()
+            self.assertEqual(os.path.getsize(path), written)
+            self.assertEqual(lines[0], '"name","ref","parent_id"')
+            self.assertEqual(len(lines), 1 + 10)
+            self.assertEqual(progress[-1], (written, written))
+            self.assertGreater(len(progress), 1)
+
+            output = io.BytesIO()
+            self.server.export_xls('res.partner', [{'name': 'name', 'label': 'Name'}], output, ids=[2, 3])
+            self.assertEqual(output.getvalue().decode('utf-8').splitlines(), ['Name', 'Partner 1', 'Partner 2'])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_200_binary(self):
+        directory = tempfile.mkdtemp()
+        try:
+            content = os.urandom(200000)
+            source = os.path.join(directory, 'source.bin')
+            with open(source, 'wb') as source_file:
+                source_file.write(content)
+
+            progress = []
+            attachment_id = self.server.upload_attachment('res.partner', 2, source, chunk_size=65536,
+                                                          progress=lambda sent, size: progress.append(sent))
+            self.assertEqual(progress, [65536, 131072, 196608, 200000])
+            attachment = self.server.get_model('ir.attachment').read([attachment_id], ['datas_fname', 'res_id'])[0]
+            self.assertEqual((attachment['datas_fname'], attachment['res_id']), ('source.bin', 2))
+
+            path = os.path.join(directory, 'download.bin')
+            reads_before = self.server_calls('ir.attachment.read')
+            self.assertEqual(self.server.download_attachment(attachment_id, path), len(content))
+            self.assertEqual(self.server_calls('ir.attachment.read'), reads_before)
+            with open(path, 'rb') as download_file:
+                self.assertEqual(download_file.read(), content)
+
+            other_id = self.server.upload_attachment('res.partner', 3, io.BytesIO(b'hello'), filename='hello.txt')
+            results = self.server.download_attachments([attachment_id, other_id, 999999], directory, max_workers=2)
+            self.assertEqual([os.path.basename(result.result or '') for result in results],
+                             ['%s_source.bin' % attachment_id, '%s_hello.txt' % other_id, ''])
+            self.assertIsNotNone(results[2].exception)
+            with open(results[1].result, 'rb') as download_file:
+                self.assertEqual(download_file.read(), b'hello')
+        finally:
+            shutil.rmtree(directory)
+
+    def test_220_coalescing(self):
+        self.server.coalescer = OpenERPCallCoalescer()
+        partner_obj = self.server.get_model('res.partner')
+        reads_before = self.server_calls('res.partner.read')
+        results = []
+        errors = []
+
+        def worker():
+            try:
+                results.append(partner_obj.read([2, 3], ['name']))
+                partner_obj.no_such_method()
+            except OpenERPJSONRPCClientException as exc:
+                errors.append(exc)
+        self.stand_in.latency = 0.2
+        try:
+            threads = [threading.Thread(target=worker) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            self.stand_in.latency = 0.0
+
+        self.assertEqual(self.server_calls('res.partner.read'), reads_before + 1)
+        self.assertEqual(self.server.coalescer.stats, {'calls': 1, 'coalesced': 4, 'in_flight': 0})
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertIsNot(results[0], results[1])
+        self.assertEqual(len(errors), 5)  # no_such_method is not coalesced
+
+    def test_230_hedging(self):
+        self.server.hedging = OpenERPHedgingPolicy(initial_delay=0.05, budget=0)
+        partner_obj = self.server.get_model('res.partner')
+        stalled = []  # seconds the next call_kw requests stall
+
+        self.stand_in.latency = lambda service, method: stalled.pop() if stalled and method == 'call_kw' else 0
+        try:
+            stalled.append(1.0)
+            start = time.time()
+            self.assertEqual(partner_obj.read([2], ['id']), [{'id': 2}])
+            self.assertLess(time.time() - start, 0.5)
+
+            # the budget allows no other hedge, the call is not eligible for one
+            stalled.append(0.2)
+            self.assertEqual(partner_obj.read([3], ['id']), [{'id': 3}])
+            with self.assertRaises(OpenERPJSONRPCClientException):
+                partner_obj.no_such_method()
+        finally:
+            self.stand_in.latency = 0.0
+        self.assertEqual(self.server.hedging.stats, {'calls': 2, 'hedged': 1, 'wins': 1, 'denied': 0, 'over_budget': 1,
+                                                     'saturated': 0, 'hedge_rate': 0.5})
+
+        # a call eligible for a hedge whose budget is used by another call while it waits is denied one
+        hedging = OpenERPHedgingPolicy(initial_delay=0.05, budget=0)
+        in_flight = threading.Event()
+        first = BackgroundCall(hedging.call, 'res.partner.read', lambda: (in_flight.set(), time.sleep(0.2)))
+        in_flight.wait()
+        # the token the first call has not used yet makes the second one eligible too
+        hedging.call('res.partner.read', lambda: time.sleep(0.2))
+        first.result()
+        self.assertEqual((hedging.hedged, hedging.denied, hedging.over_budget), (1, 1, 0))
+
+        # worker threads are reused, calls are sent from the caller thread when they are all busy
+        self.server.hedging = OpenERPHedgingPolicy(budget=1, max_workers=1)
+        for partner_id in range(2, 12):
+            partner_obj.read([partner_id], ['id'])
+        self.assertEqual(len(self.server.hedging._pool), 1)
+        self.server.hedging.call('res.partner.read', lambda: self.server.hedging.call('res.partner.read', lambda: 1))
+        self.assertEqual(self.server.hedging.saturated, 1)
+
+    def test_235_worker_pool(self):
+        pool = WorkerPool(max_workers=2, idle_timeout=0.1)
+        release = threading.Event()
+        done = []
+        for _ in range(2):
+            self.assertTrue(pool.try_submit(lambda: done.append(release.wait(5))))
+        self.assertFalse(pool.try_submit(done.append, None))
+        release.set()
+        while pool._idle < 2:
+            time.sleep(0.01)
+        self.assertTrue(pool.try_submit(done.append, 'reused'))
+        time.sleep(0.3)
+        self.assertEqual((done[-1], len(pool)), ('reused', 0))
+
+    def test_240_record_cache(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'records.sqlite')
+            partner_obj = self.server.get_cached_model('res.partner', OpenERPRecordCache(path))
+            ids = list(range(2, 12))
+            expected = self.server.get_model('res.partner').read(ids, ['name', 'ref'])
+            self.assertEqual(partner_obj.read(ids, ['name', 'ref']), expected)
+            self.assertEqual(partner_obj.record_cache.misses, 10)
+            partner_obj.record_cache.close()
+
+            # a cache file is reused by another process
+            partner_obj = self.server.get_cached_model('res.partner', OpenERPRecordCache(path))
+            records = self.stand_in.databases[OpenERPStandInServer.DEFAULT_DB].models['res.partner'].records
+            records[11]['ref'] = 'CHANGED'
+            records[11]['write_date'] = '2099-01-01 00:00:00'
+            reads_before = self.server_calls('res.partner.read')
+            records = partner_obj.search_read([('id', 'in', ids)], ['name', 'ref'])
+            self.assertEqual(self.server_calls('res.partner.read'), reads_before + 1)
+            self.assertEqual([record['id'] for record in records], ids)
+            self.assertEqual(records[-1]['ref'], 'CHANGED')
+            self.assertEqual((partner_obj.record_cache.hits, partner_obj.record_cache.misses), (9, 1))
+            self.assertEqual(partner_obj.read(2, ['ref']), self.server.get_model('res.partner').read(2, ['ref']))
+            self.assertEqual(len(partner_obj.record_cache), 11)
+            # write_date has microseconds: writes in the same second are seen
+            for ref in ('FIRST', 'SECOND'):
+                self.server.get_model('res.partner').write([3], {'ref': ref})
+                self.assertEqual(partner_obj.read(3, ['name', 'ref'])['ref'], ref)
+            # records are cached for the user and with the user context
+            rows = partner_obj.record_cache._db.execute('SELECT DISTINCT uid, context FROM records').fetchall()
+            self.assertEqual(rows, [(1, OpenERPRecordCache._context_key(self.server.user_context))])
+            versions = dict(partner_obj.record_cache._db.execute("SELECT id, version FROM records "
+                                                                 "WHERE id = 2 AND fields = 'ref'"))
+            for uid, cached_ids in ((1, [2]), (2, [])):
+                self.assertEqual(list(partner_obj.record_cache.get(OpenERPStandInServer.DEFAULT_DB, uid, 'res.partner',
+                                                                   ['ref'], self.server.user_context, versions)),
+                                 cached_ids)
+            partner_obj.record_cache.close()
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestModelSync(OfflineTestCase):
+    RECORDS = 30
+
+    def setUp(self):
+        super(TestModelSync, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.state = OpenERPSyncState(os.path.join(self.directory, 'state.sqlite'))
+        self.mirror = {}
+        self.sink = OpenERPCallbackSink(lambda model, records: self.mirror.update((r['id'], r) for r in records),
+                                        lambda model, ids: [self.mirror.pop(id) for id in ids])
+        self.partner_obj = self.server.get_model('res.partner')
+        # records modified over time
+        records = self.stand_in.databases[OpenERPStandInServer.DEFAULT_DB].models['res.partner'].records
+        for id, record in records.items():
+            record['write_date'] = '2020-01-01 00:%02d:00' % id
+
+    def tearDown(self):
+        self.state.close()
+        shutil.rmtree(self.directory)
+        super(TestModelSync, self).tearDown()
+
+    def model_sync(self, sink=None, state=None, **kwargs):
+        return OpenERPModelSync(self.server, 'res.partner', sink or self.sink, state or self.state,
+                                fields=['name', 'ref'], page_size=7, id_chunk_size=7, **kwargs)
+
+    def test_010_incremental(self):
+        partner_ids = self.partner_obj.search([])
+        stats = self.model_sync().run()
+        self.assertEqual((stats['upserted'], stats['deleted']), (len(partner_ids), 0))
+        self.assertEqual(sorted(self.mirror), sorted(partner_ids))
+
+        self.partner_obj.write([3, 4], {'ref': 'CHANGED'})
+        self.partner_obj.unlink([5])
+        # the record of the high-water mark second is read again
+        self.assertEqual(self.model_sync().run(), {'upserted': 3, 'deleted': 1, 'pages': 1})
+        self.assertEqual(self.mirror[3]['ref'], 'CHANGED')
+        self.assertNotIn(5, self.mirror)
+
+    def test_020_resume(self):
+        partner_ids = self.partner_obj.search([])
+        pages = []
+
+        def upsert(model, records):
+            if len(pages) == 2:
+                raise RuntimeError("interrupted")
+            pages.append(records)
+            self.mirror.update((record['id'], record) for record in records)
+        with self.assertRaises(RuntimeError):
+            self.model_sync(OpenERPCallbackSink(upsert)).run()
+
+        stats = self.model_sync().run()
+        self.assertEqual(stats['upserted'], len(partner_ids) - 14)
+        self.assertEqual(sorted(self.mirror), sorted(partner_ids))
+        with self.assertRaises(ValueError):
+            self.model_sync(domain=[('customer', '=', True)]).run()
+
+    def test_030_sinks(self):
+        partner_ids = self.partner_obj.search([])
+        jsonl_path = os.path.join(self.directory, 'changes.jsonl')
+        sink = OpenERPJSONLinesSink(jsonl_path)
+        self.model_sync(sink).run()
+        sink.close()
+        with open(jsonl_path) as jsonl_file:
+            self.assertEqual(len(jsonl_file.readlines()), len(partner_ids))
+
+        sink = OpenERPSQLiteSink(os.path.join(self.directory, 'mirror.sqlite'))
+        state = OpenERPSyncState(os.path.join(self.directory, 'sqlite_state.sqlite'))
+        self.model_sync(sink, state).run()
+        self.assertEqual(sink._db.execute('SELECT COUNT(*) FROM res_partner').fetchone()[0], len(partner_ids))
+        sink.close()
+        state.close()
+
+    def test_040_created_records(self):
+        self.model_sync().run()
+        # never written records have no write_date, they are followed on their create_date
+        partner_id = self.partner_obj.create({'name': 'Created', 'ref': 'NEW'})
+        self.assertFalse(self.partner_obj.read(partner_id, ['write_date'])['write_date'])
+        self.model_sync().run()
+        self.assertEqual(self.mirror[partner_id]['ref'], 'NEW')
+        self.partner_obj.unlink([partner_id])
+
+    def test_050_overlap(self):
+        self.model_sync().run()
+        # a transaction which wrote before the high-water mark commits after the run
+        record = self.stand_in.databases[OpenERPStandInServer.DEFAULT_DB].models['res.partner'].records[10]
+        record.update({'ref': 'LATE', 'write_date': '2020-01-01 00:30:30'})
+        self.model_sync().run()
+        self.assertNotEqual(self.mirror[10]['ref'], 'LATE')
+        self.model_sync(overlap=60).run()
+        self.assertEqual(self.mirror[10]['ref'], 'LATE')
+
+
+class TestSessionPool(OfflineTestCase):
+
+    def setUp(self):
+        super(TestSessionPool, self).setUp()
+        self.pool = OpenERPSessionPool(max_size=2)
+        self.credentials = (self.stand_in.url, OpenERPStandInServer.DEFAULT_DB, 'admin', 'admin')
+
+    def tearDown(self):
+        self.pool.close()
+        super(TestSessionPool, self).tearDown()
+
+    def test_010_reuse(self):
+        authentications_before = self.server_calls('session/authenticate')
+        for _ in range(5):
+            with self.pool.session(*self.credentials) as server:
+                server.get_model('res.partner').search([])
+        self.assertEqual(self.server_calls('session/authenticate'), authentications_before + 1)
+        self.assertEqual(self.pool.stats['reused'], 4)
+
+        self.stand_in.expire_sessions()
+        with self.pool.session(*self.credentials) as server:
+            self.assertEqual(server.get_model('res.partner').read([2], ['id']), [{'id': 2}])
+
+    def test_020_max_size(self):
+        clients = [self.pool.checkout(*self.credentials) for _ in range(2)]
+        self.assertIsNot(clients[0], clients[1])
+        with self.assertRaises(OpenERPSessionPoolExhaustedError):
+            self.pool.checkout(*self.credentials, timeout=0.05)
+        self.pool.checkin(clients[0])
+        self.assertIs(self.pool.checkout(*self.credentials, timeout=0.05), clients[0])
+
+    def test_030_idle_eviction(self):
+        self.pool.idle_timeout = 0
+        self.pool.checkin(self.pool.checkout(*self.credentials))
+        self.pool.evict_idle()
+        self.assertEqual((len(self.pool), self.pool.stats['evicted']), (0, 1))
+
+    def test_040_wrong_password(self):
+        with self.assertRaises(OpenERPJSONRPCClientAuthenticationError):
+            self.pool.checkout(self.stand_in.url, OpenERPStandInServer.DEFAULT_DB, 'admin', 'wrong')
+        self.assertEqual(len(self.pool), 0)
+
+    def test_050_wake_up_other_key(self):
+        self.pool.max_size = 1
+        # same server under another url: another key
+        other_credentials = (self.stand_in.url.replace('127.0.0.1', 'localhost'),) + self.credentials[1:]
+        client = self.pool.checkout(*self.credentials)
+        other_client = self.pool.checkout(*other_credentials)
+
+        results = {}
+
+        def wait_for(name, credentials):
+            try:
+                results[name] = self.pool.checkout(*credentials, timeout=2)
+            except OpenERPSessionPoolExhaustedError as exc:
+                results[name] = exc
+
+        waiters = [threading.Thread(target=wait_for, args=('first', self.credentials))]
+        waiters.append(threading.Thread(target=wait_for, args=('other', other_credentials)))
+        for waiter in waiters:
+            waiter.start()
+            time.sleep(0.1)  # first waiter is first in the condition queue
+        self.pool.checkin(other_client)
+        waiters[1].join()
+        self.assertIs(results['other'], other_client)
+        self.pool.checkin(client)
+        waiters[0].join()
+        self.assertIs(results['first'], client)
+
+    def test_060_max_total(self):
+        self.pool.max_total = 1
+        other_credentials = (self.stand_in.url.replace('127.0.0.1', 'localhost'),) + self.credentials[1:]
+        client = self.pool.checkout(*self.credentials)
+        with self.assertRaises(OpenERPSessionPoolExhaustedError):
+            self.pool.checkout(*other_credentials, timeout=0.05)
+        self.pool.checkin(client)
+        # the idle client of the other key is closed to make room
+        self.pool.checkin(self.pool.checkout(*other_credentials, timeout=0.05))
+        self.assertEqual((len(self.pool), self.pool.stats['evicted']), (1, 1))
+
+    def test_070_closed(self):
+        clients = [self.pool.checkout(*self.credentials) for _ in range(2)]
+        errors = []
+
+        def wait_for_a_client():
+            try:
+                self.pool.checkout(*self.credentials, timeout=5)
+            except OpenERPSessionPoolClosedError as exc:
+                errors.append(exc)
+        waiter = threading.Thread(target=wait_for_a_client)
+        waiter.start()
+        time.sleep(0.05)
+        self.pool.close()
+        # the waiter is woken up
+        waiter.join(1)
+        self.assertEqual(len(errors), 1)
+
+        with self.assertRaises(OpenERPSessionPoolClosedError):
+            self.pool.checkout(*self.credentials)
+        for client in clients:
+            self.pool.checkin(client)
+        self.assertEqual(len(self.pool), 0)
+
+
+class TestLoadBalancedClient(OfflineTestCase):
+
+    def setUp(self):
+        self.nodes = [OpenERPStandInServer(records=10).start() for _ in range(2)]
+        # a port nobody listens on
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        dead_url = 'http://127.0.0.1:%s' % sock.getsockname()[1]
+        sock.close()
+        self.server = OpenERPLoadBalancedClient([dead_url] + [node.url for node in self.nodes],
+                                                max_failures=1, eject_time=60)
+
+    def tearDown(self):
+        self.server.close()
+        for node in self.nodes:
+            node.stop()
+
+    def test_010_affinity_and_failover(self):
+        # the first node picked is down: the session is opened on another one
+        self.server.session_authenticate(OpenERPStandInServer.DEFAULT_DB, 'admin', 'admin')
+        self.assertEqual(self.server.node, self.nodes[0].url)
+        self.assertFalse(self.server.nodes.nodes[0].healthy)
+
+        for _ in range(4):
+            self.server.get_model('res.partner').read([2], ['name'])
+        self.assertEqual([node.stats['calls'].get('res.partner.read', 0) for node in self.nodes], [4, 0])
+
+        for _ in range(4):
+            self.server.db_get_list()
+        self.assertEqual([node.stats['calls'].get('database/get_list', 0) for node in self.nodes], [2, 2])
+
+        # the node holding the session goes down: the client authenticates on the other one
+        self.nodes[0].stop()
+        self.assertEqual(self.server.get_model('res.partner').read([2], ['id']), [{'id': 2}])
+        self.assertEqual(self.server.node, self.nodes[1].url)
+        self.assertEqual(self.nodes[1].stats['calls'].get('session/authenticate'), 1)
+
+    def test_020_node_set(self):
+        nodes = OpenERPNodeSet(['http://a', 'http://b'], max_failures=2, eject_time=0)
+        a, b = nodes.nodes
+        nodes.begin(a)
+        self.assertIs(nodes.pick(), b)
+        nodes.end(a, 0.1)
+        for _ in range(2):
+            nodes.begin(b)
+            nodes.end(b, 1.0, failed=True)
+        self.assertFalse(b.healthy)
+        # eject_time is over: b gets a probe request then is readmitted
+        self.assertIs(nodes.pick(), b)
+        nodes.begin(b)
+        nodes.end(b, 0.1)
+        self.assertTrue(b.healthy)
+        self.assertRaises(ValueError, OpenERPNodeSet, ['http://a'], strategy='random')
+
+
+if __name__ == '__main__':
+    unittest.main()